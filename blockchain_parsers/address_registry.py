@@ -0,0 +1,239 @@
+"""
+blockchain_parsers/address_registry.py — Protocol Address Registry
+
+Per-chain registry of labelled contract addresses (routers, lending pools,
+bridges, staking contracts) for TSC γ-axis transaction classification:
+sorted fixed-width columns, memory-mapped read-only and binary-searched,
+so label sets of hundreds of thousands of addresses load in milliseconds
+and are shared between worker processes through the page cache.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import List, Any, Iterable, Optional, Sequence, Tuple, Union
+import json
+import os
+
+import numpy as np
+
+
+NO_CODE = 255  # Category code for addresses not in the registry
+
+# One registry entry: (hex address, category code, label)
+Entry = Tuple[str, int, str]
+
+
+def to_s20(addresses: Union[np.ndarray, Iterable[str]]) -> np.ndarray:
+    """Hex address strings (or an S20 array, passed through) → S20 array."""
+    if isinstance(addresses, np.ndarray) and addresses.dtype == np.dtype("S20"):
+        return addresses
+    return np.array([bytes.fromhex(a[2:]) for a in addresses], dtype="S20")
+
+
+def _prefix(addresses: np.ndarray) -> np.ndarray:
+    """First 8 bytes of each S20 address as big-endian uint64 (same sort order)."""
+    raw = np.frombuffer(np.ascontiguousarray(addresses).tobytes(), np.uint8).reshape(-1, 20)
+    return raw[:, :8].copy().view(">u8").ravel().astype(np.uint64)
+
+
+class AddressRegistry:
+    """
+    Sorted address → (category code, label) table.
+
+    Layout:
+        {root}/{chain_id}/registry/
+            addresses.npy   # S20, sorted ascending
+            prefix.npy      # uint64 first 8 bytes, for integer binary search
+            codes.npy       # uint8 category per address
+            label_ids.npy   # uint32 index into labels.json
+            labels.json     # distinct label strings
+
+    Lookups binary-search the uint64 prefix column and confirm against the
+    full address; runs of addresses sharing a prefix (vanity 0x0000…
+    contracts) fall back to searching the S20 column. Category codes are
+    opaque here (GammaParser stores TransactionType codes).
+
+    S20 arrays compare and sort correctly, but numpy drops trailing NUL
+    bytes when converting elements to Python bytes: use `to_hex`.
+
+    Usage:
+        AddressRegistry.from_entries(entries).save(default_cache_dir(), "ethereum")
+        registry = AddressRegistry.load(default_cache_dir(), "ethereum")
+        codes = registry.codes(to_addresses)
+    """
+
+    FILES = ("addresses", "prefix", "codes", "label_ids")
+
+    def __init__(
+        self,
+        addresses: np.ndarray,
+        prefix: np.ndarray,
+        codes: np.ndarray,
+        label_ids: np.ndarray,
+        labels: List[str]
+    ):
+        self.addresses = addresses
+        self.prefix = prefix
+        self._codes = codes
+        self._label_ids = label_ids
+        self.label_names = labels
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Entry]) -> "AddressRegistry":
+        """Build an in-memory registry (later duplicates of an address win)."""
+        table = {address.lower(): (code, label) for address, code, label in entries}
+        addresses = to_s20(table)
+        order = np.argsort(addresses, kind="stable")
+        labels = list(dict.fromkeys(label for _, label in table.values()))
+        label_index = {label: i for i, label in enumerate(labels)}
+        codes = np.array([code for code, _ in table.values()], dtype=np.uint8)
+        label_ids = np.array([label_index[label] for _, label in table.values()], dtype=np.uint32)
+        addresses = addresses[order]
+        return cls(addresses, _prefix(addresses), codes[order], label_ids[order], labels)
+
+    @staticmethod
+    def path(root: str, chain_id: str) -> str:
+        return os.path.join(root, chain_id, "registry")
+
+    @classmethod
+    def exists(cls, root: str, chain_id: str) -> bool:
+        return os.path.exists(os.path.join(cls.path(root, chain_id), "labels.json"))
+
+    def save(self, root: str, chain_id: str):
+        path = self.path(root, chain_id)
+        os.makedirs(path, exist_ok=True)
+        arrays = dict(zip(self.FILES, (self.addresses, self.prefix, self._codes, self._label_ids)))
+        for name, array in arrays.items():
+            tmp = os.path.join(path, name + ".tmp.npy")
+            np.save(tmp, np.asarray(array))
+            os.replace(tmp, os.path.join(path, name + ".npy"))
+        # labels.json last: its presence marks a complete registry
+        tmp = os.path.join(path, "labels.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.label_names, f)
+        os.replace(tmp, os.path.join(path, "labels.json"))
+
+    @classmethod
+    def load(cls, root: str, chain_id: str) -> "AddressRegistry":
+        """
+        Memory-map a saved registry read-only.
+
+        Raises:
+            FileNotFoundError: if no registry was saved for the chain
+        """
+        path = cls.path(root, chain_id)
+        with open(os.path.join(path, "labels.json")) as f:
+            labels = json.load(f)
+        arrays = [np.load(os.path.join(path, name + ".npy"), mmap_mode="r") for name in cls.FILES]
+        return cls(*arrays, labels)
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def __contains__(self, address: str) -> bool:
+        return bool(self.index([address])[0] >= 0)
+
+    # -- lookups ------------------------------------------------------------
+
+    def index(self, addresses: Union[np.ndarray, Sequence[str]]) -> np.ndarray:
+        """Row of each address in the registry (int64, -1 if absent)."""
+        query = to_s20(addresses)
+        if len(query) == 0 or len(self.addresses) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        prefix = _prefix(query)
+        lo = np.searchsorted(self.prefix, prefix, side="left")
+        hi = np.searchsorted(self.prefix, prefix, side="right")
+        rows = lo.astype(np.int64)
+        shared = hi - lo > 1
+        if shared.any():
+            rows[shared] = np.searchsorted(self.addresses, query[shared])
+        rows[rows == len(self.addresses)] = 0
+        return np.where(self.addresses[rows] == query, rows, -1)
+
+    def codes(self, addresses: Union[np.ndarray, Sequence[str]]) -> np.ndarray:
+        """Category code of each address (uint8, NO_CODE if absent)."""
+        rows = self.index(addresses)
+        return np.where(rows >= 0, self._codes[np.maximum(rows, 0)], NO_CODE).astype(np.uint8)
+
+    def labels(self, addresses: Union[np.ndarray, Sequence[str]]) -> List[Optional[str]]:
+        rows = self.index(addresses)
+        label_ids = self._label_ids[np.maximum(rows, 0)]
+        return [self.label_names[i] if r >= 0 else None for r, i in zip(rows.tolist(), label_ids.tolist())]
+
+    def entries(self) -> List[Entry]:
+        """All rows as (hex address, code, label), in address order."""
+        return list(zip(self.to_hex(self.addresses), self._codes.tolist(),
+                        (self.label_names[i] for i in self._label_ids.tolist())))
+
+    @staticmethod
+    def to_hex(addresses: np.ndarray) -> List[str]:
+        return ["0x" + a.ljust(20, b"\x00").hex() for a in addresses.tolist()]
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+def test_registry_lookup():
+    """
+    Benchmark a mainnet-scale registry.
+
+    Success criteria:
+    - Every registered address found with its code and label; others miss
+    - Vanity addresses sharing a prefix and trailing-NUL addresses resolve
+    - Load (memory-map) in milliseconds; >1M batched lookups per second
+    """
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 300_000
+    raw = rng.integers(0, 256, size=(n, 20), dtype=np.uint8)
+    raw[:50, :8] = 0          # Vanity 0x0000000000000000… contracts share a prefix
+    raw[50:60, 12:] = 0       # Trailing NUL bytes
+    addresses = ["0x" + row.tobytes().hex() for row in raw]
+    entries = [(a, i % 11, "protocol-%d" % (i % 997)) for i, a in enumerate(addresses)]
+
+    with tempfile.TemporaryDirectory() as root:
+        start = time.perf_counter()
+        AddressRegistry.from_entries(entries).save(root, "ethereum")
+        build_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        registry = AddressRegistry.load(root, "ethereum")
+        load_elapsed = time.perf_counter() - start
+
+        unknown = ["0x" + row.tobytes().hex() for row in rng.integers(0, 256, (1000, 20), dtype=np.uint8)]
+        codes = registry.codes(addresses[:1000] + unknown)
+        assert codes[:1000].tolist() == [i % 11 for i in range(1000)]
+        assert (codes[1000:] == NO_CODE).all()
+        assert registry.labels(addresses[40:60]) == ["protocol-%d" % i for i in range(40, 60)]
+        assert addresses[55] in registry and unknown[0] not in registry
+        assert registry.entries()[:1] and len(registry.entries()) == n
+
+        query = to_s20(rng.choice(addresses, 2_000_000))
+        start = time.perf_counter()
+        found = registry.index(query)
+        lookup_elapsed = time.perf_counter() - start
+        assert (found >= 0).all()
+
+    rate = len(query) / lookup_elapsed
+    assert load_elapsed < 0.05, "Registry should memory-map in milliseconds"
+    assert rate > 1_000_000
+    print(f"✓ Address registry ({n:,} addresses, {n * 33 / 1e6:.1f}MB on disk):")
+    print(f"  Build {build_elapsed:.2f}s; load {load_elapsed * 1000:.1f}ms; "
+          f"lookups {rate / 1e6:.1f}M/s")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Address Registry Test Suite")
+    print("=" * 60)
+    print()
+
+    test_registry_lookup()
+    print()
@@ -8,11 +8,44 @@ Part of TSC-blockchain Phase 0 (Partner implementation).
 
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Sequence, Tuple, Union
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import cached_property
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+import asyncio
+import json
+import math
+import socket
+import ssl
+import threading
 import time
 
+import numpy as np
+
+from .concentration import concentration_summary
+from .header_store import HeaderStore, default_cache_dir
+from .mev import (SWAP_TOPICS, TOKEN0_SELECTOR, TOKEN1_SELECTOR, WRAPPED_NATIVE,
+                  PoolRegistry, SwapLogCache, concat_swaps, decode_swap_logs, detect_mev)
+from .quantiles import BlockSketchStore
+from .rolling import BlockMoments, BlockMomentStore
+from .timestamp_index import TimestampIndex
+from .token_ledger import KEEP_CHECKPOINTS, TRANSFER_TOPIC, TransferLedger
+from .validator_snapshots import SLOTS_PER_EPOCH, ValidatorSnapshotStore
+
+
+# Beacon chain genesis time and slot length, for mapping execution blocks
+# to consensus-layer state ids
+BEACON_GENESIS = {"ethereum": (1_606_824_023, 12)}
+
+# Max block span per eth_getLogs call (common provider limit)
+LOG_BLOCK_RANGE = 2000
+
+# Full-transaction blocks per fetch round (bounds decoded JSON held in memory)
+FULL_BLOCK_FETCH = 256
+
 
 @dataclass
 class OnChainMetrics:
@@ -40,6 +73,7 @@ class OnChainMetrics:
     avg_gas_price: float
     base_fee: Optional[float]  # EIP-1559 chains only
     priority_fee_p50: Optional[float]
+    priority_fee_p95: Optional[float]
     
     # Metadata
     chain_id: str
@@ -47,6 +81,644 @@ class OnChainMetrics:
     block_height: int
 
 
+# ============================================================================
+# RPC Fetch Engine
+# ============================================================================
+
+class RpcError(Exception):
+    """A JSON-RPC call failed (transport failure or error object in response)."""
+
+
+class _RetryableRpcError(RpcError):
+    """Transient failure (transport, HTTP 429/5xx, rate limit): retry or fail over."""
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for provider request quotas.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each
+    JSON-RPC call inside a batch costs one token, which is how most providers
+    meter batch requests.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available, then take them."""
+        # A batch larger than the bucket waits for a full bucket instead of forever
+        tokens = min(float(tokens), self.capacity)
+        while True:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class _HttpConnection:
+    """One keep-alive HTTP/1.1 connection speaking JSON POST over asyncio streams."""
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.tls else 80)
+        self.path = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def _open(self):
+        context = ssl.create_default_context() if self.tls else None
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=context),
+            self.timeout
+        )
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            # Small request/response exchanges stall ~40ms on Nagle + delayed ACK
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def post(self, body: bytes) -> Tuple[int, bytes]:
+        """Send one request; reconnects transparently if the server closed the socket."""
+        if self._writer is None:
+            await self._open()
+        try:
+            return await asyncio.wait_for(self._round_trip(body), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _round_trip(self, body: bytes) -> Tuple[int, bytes]:
+        head = (
+            "POST %s HTTP/1.1\r\n"
+            "Host: %s\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: %d\r\n"
+            "Connection: keep-alive\r\n\r\n" % (self.path, self.host, len(body))
+        )
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readexactly(2)
+            payload = b"".join(chunks)
+        else:
+            payload = await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, payload
+
+
+class RpcEndpoint:
+    """
+    One provider in a BatchRpcClient pool: keep-alive connections, live
+    latency/error statistics and a circuit breaker.
+
+    Routing score is the EWMA batch latency, inflated by the recent error
+    rate and by current load, so traffic drifts to the fastest healthy
+    endpoint without starving the rest. An endpoint with no samples yet
+    gets exactly one request (scored first) until its first answer.
+
+    Breaker: `failure_threshold` consecutive failures open the circuit for
+    `cooldown` seconds (doubling while it keeps failing, up to 5 minutes);
+    after that one half-open probe is let through and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int,
+        timeout: float,
+        failure_threshold: int = 5,
+        cooldown: float = 10.0,
+        window: int = 128
+    ):
+        self.url = url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.latencies: deque = deque(maxlen=window)  # Recent batch latencies (s)
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0  # EWMA of failures per attempt
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = cooldown
+        self.probing = False
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self._pool: Optional[asyncio.LifoQueue] = None
+
+    def connections(self) -> asyncio.LifoQueue:
+        # Created lazily on the I/O loop; LIFO keeps the warmest sockets busy
+        if self._pool is None:
+            self._pool = asyncio.LifoQueue()
+            for _ in range(self.pool_size):
+                self._pool.put_nowait(_HttpConnection(self.url, self.timeout))
+        return self._pool
+
+    def close(self):
+        while self._pool is not None and not self._pool.empty():
+            self._pool.get_nowait().close()
+        self._pool = None
+
+    # -- health -------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        if self.consecutive_failures < self.failure_threshold:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half-open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half-open" and not self.probing)
+
+    def score(self) -> float:
+        if self.ewma_latency is None:
+            return 0.0 if self.in_flight == 0 else math.inf
+        return self.ewma_latency * (1 + 4 * self.error_rate) * (1 + self.in_flight / self.pool_size)
+
+    def percentile(self, q: float) -> Optional[float]:
+        return float(np.percentile(self.latencies, q)) if self.latencies else None
+
+    def record_latency(self, seconds: float):
+        self.latencies.append(seconds)
+        self.ewma_latency = seconds if self.ewma_latency is None else \
+            0.8 * self.ewma_latency + 0.2 * seconds
+
+    def record_success(self, seconds: float):
+        self.record_latency(seconds)
+        self.error_rate *= 0.8
+        self.consecutive_failures = 0
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self):
+        self.failures += 1
+        self.error_rate = 0.8 * self.error_rate + 0.2
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            if self.consecutive_failures > self.failure_threshold:
+                # Failed half-open probe: back off harder
+                self.cooldown = min(self.cooldown * 2, 300.0)
+            self.open_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "p50_latency": self.percentile(50),
+            "p95_latency": self.percentile(95),
+        }
+
+
+class BatchRpcClient:
+    """
+    Batched, concurrent JSON-RPC client (the β fetch engine).
+
+    Calls are packed into JSON-RPC batch arrays of `batch_size` and sent over
+    a pool of keep-alive connections, with at most `max_in_flight` batches
+    outstanding and an optional token-bucket limit of `rate_limit` calls/sec.
+    Failed batches (transport errors, HTTP 429/5xx, provider rate-limit
+    errors) are retried with exponential backoff.
+
+    Given several endpoint URLs, each batch goes to the healthy endpoint
+    with the best live score (see RpcEndpoint). A batch still outstanding
+    after the `hedge_percentile` latency of its endpoint is duplicated to
+    the next-best endpoint and the first good answer wins, so one slow or
+    failing provider no longer stalls a measurement. Failing endpoints are
+    ejected by their circuit breaker until a probe succeeds.
+
+    All network I/O runs on a private event-loop thread, so the public
+    methods are plain blocking calls and also work inside Jupyter, where an
+    event loop is already running.
+
+    Usage:
+        rpc = BatchRpcClient("https://...", batch_size=100, max_in_flight=8)
+        rpc = BatchRpcClient(["https://a...", "https://b..."])  # endpoint pool
+        blocks = rpc.fetch_blocks(range(19_000_000, 19_001_000))
+    """
+
+    # JSON-RPC error codes that providers use for "slow down"
+    RETRYABLE_CODES = {-32005, -32029, 429}
+
+    # Hedge after this fixed delay until an endpoint has latency samples
+    DEFAULT_HEDGE_DELAY = 0.25
+    MIN_HEDGE_SAMPLES = 16
+
+    def __init__(
+        self,
+        url: Union[str, Sequence[str]],
+        batch_size: int = 100,
+        max_in_flight: int = 8,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_retries: int = 4,
+        timeout: float = 30.0,
+        hedge_percentile: Optional[float] = 95.0,
+        failure_threshold: int = 5,
+        cooldown: float = 10.0
+    ):
+        urls = [url] if isinstance(url, str) else list(url)
+        if not urls:
+            raise ValueError("at least one RPC endpoint is required")
+        self.url = urls[0]
+        self.batch_size = max(1, int(batch_size))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.endpoints = [
+            RpcEndpoint(u, self.max_in_flight, timeout, failure_threshold, cooldown) for u in urls
+        ]
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+
+    # -- event loop plumbing ---------------------------------------------------
+
+    def _run(self, coro):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="rpc-fetch", daemon=True
+                )
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        """Close pooled connections and stop the I/O thread."""
+        if self._loop is None:
+            return
+
+        async def _drain():
+            for endpoint in self.endpoints:
+                endpoint.close()
+
+        asyncio.run_coroutine_threadsafe(_drain(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = self._slots = None
+
+    # -- routing --------------------------------------------------------------------
+
+    def _pick(self, exclude: Optional[RpcEndpoint] = None) -> Optional[RpcEndpoint]:
+        """Best-scoring available endpoint; if every breaker is open, the one reopening first."""
+        candidates = [e for e in self.endpoints if e is not exclude]
+        if not candidates:
+            return None
+        healthy = [e for e in candidates if e.available()]
+        if healthy:
+            return min(healthy, key=RpcEndpoint.score)
+        if exclude is not None:
+            return None  # Never hedge onto an ejected endpoint
+        return min(candidates, key=lambda e: e.open_until)
+
+    def _hedge_delay(self, endpoint: RpcEndpoint) -> float:
+        if len(endpoint.latencies) < self.MIN_HEDGE_SAMPLES:
+            return self.DEFAULT_HEDGE_DELAY
+        return endpoint.percentile(self.hedge_percentile)
+
+    def endpoint_stats(self) -> List[Dict[str, Any]]:
+        """Live per-endpoint routing statistics."""
+        return [e.stats() for e in self.endpoints]
+
+    # -- core batch path ----------------------------------------------------------
+
+    async def _attempt(self, endpoint: RpcEndpoint, body: bytes, expected: int) -> list:
+        """
+        One request to one endpoint, recorded in its statistics.
+
+        Raises _RetryableRpcError on transient failures and RpcError on
+        permanent ones; a cancelled hedge loser counts its elapsed time as
+        a (censored) latency sample.
+        """
+        pool = endpoint.connections()
+        probe = endpoint.state == "half-open"
+        endpoint.probing |= probe
+        endpoint.in_flight += 1
+        endpoint.requests += 1
+        conn = await pool.get()
+        start = time.monotonic()
+        try:
+            status, raw = await conn.post(body)
+        except asyncio.CancelledError:
+            endpoint.record_latency(time.monotonic() - start)
+            raise
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as exc:
+            endpoint.record_failure()
+            raise _RetryableRpcError("%s: %r" % (endpoint.url, exc))
+        finally:
+            pool.put_nowait(conn)
+            endpoint.in_flight -= 1
+            if probe:
+                endpoint.probing = False
+        try:
+            responses, error = self._parse_response(status, raw, expected)
+        except RpcError:
+            endpoint.record_success(time.monotonic() - start)  # Endpoint is up; request is bad
+            raise
+        if error is not None:
+            endpoint.record_failure()
+            raise _RetryableRpcError("%s: %s" % (endpoint.url, error))
+        endpoint.record_success(time.monotonic() - start)
+        return responses
+
+    async def _hedged(self, body: bytes, expected: int) -> list:
+        """
+        Send to the best endpoint, and also to the runner-up if the first is
+        slower than its hedge delay or fails transiently. First good answer
+        wins; the loser is cancelled.
+        """
+        primary = self._pick()
+        tasks = {asyncio.ensure_future(self._attempt(primary, body, expected)): primary}
+        backup = self._pick(exclude=primary) if self.hedge_percentile is not None else None
+        delay = self._hedge_delay(primary) if backup is not None else None
+        error: Optional[Exception] = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=delay,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    endpoint = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self.hedges_won += endpoint is not primary
+                        return task.result()
+                    if not isinstance(error, _RetryableRpcError):
+                        raise error
+                if backup is not None and (not done or not tasks):
+                    # Primary is past its latency percentile, or failed fast
+                    self.hedges_sent += 1
+                    tasks[asyncio.ensure_future(self._attempt(backup, body, expected))] = backup
+                    backup = delay = None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _send_batch(self, calls: List[Tuple[str, list]], raise_errors: bool = True) -> List[Any]:
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire(len(calls))
+            async with self._slots:
+                try:
+                    responses = await self._hedged(body, len(calls))
+                except _RetryableRpcError as exc:
+                    error: Exception = exc
+                else:
+                    by_id = {r.get("id"): r for r in responses}
+                    return [self._unwrap(by_id.get(i), raise_errors) for i in range(len(calls))]
+            if attempt < self.max_retries:
+                await asyncio.sleep(min(0.25 * 2 ** attempt, 8.0))
+        raise RpcError("batch of %d calls failed after %d attempts: %s"
+                       % (len(calls), self.max_retries + 1, error))
+
+    def _parse_response(
+        self,
+        status: int,
+        raw: bytes,
+        expected: int
+    ) -> Tuple[Optional[list], Optional[Exception]]:
+        """
+        Decode a batch response.
+
+        Returns (responses, None) on success or (None, error) when the batch
+        should be retried; raises RpcError for non-retryable failures.
+        """
+        if status == 429 or status >= 500:
+            return None, RpcError("HTTP %d" % status)
+        if status != 200:
+            raise RpcError("HTTP %d: %s" % (status, raw[:200]))
+        try:
+            responses = json.loads(raw)
+        except ValueError as exc:
+            return None, RpcError("malformed response: %s" % exc)
+        if not isinstance(responses, list):
+            # Some providers reply to an over-sized batch with a single error object
+            code = (responses.get("error") or {}).get("code")
+            if code in self.RETRYABLE_CODES:
+                return None, RpcError("rate limited (code %s)" % code)
+            raise RpcError("expected batch response, got: %s" % str(responses)[:200])
+        for r in responses:
+            if (r.get("error") or {}).get("code") in self.RETRYABLE_CODES:
+                return None, RpcError("rate limited (code %s)" % r["error"]["code"])
+        if len(responses) != expected:
+            return None, RpcError("expected %d responses, got %d" % (expected, len(responses)))
+        return responses, None
+
+    @staticmethod
+    def _unwrap(response: Optional[Dict[str, Any]], raise_errors: bool = True) -> Any:
+        if response is None:
+            raise RpcError("missing response in batch")
+        if "error" in response:
+            if not raise_errors:
+                return RpcError(response["error"])
+            raise RpcError(response["error"])
+        return response.get("result")
+
+    async def _gather_batches(self, calls: List[Tuple[str, list]], raise_errors: bool = True) -> List[Any]:
+        # Batches beyond max_in_flight wait on the connection pool
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        results = await asyncio.gather(*(self._send_batch(c, raise_errors) for c in chunks))
+        return [r for chunk in results for r in chunk]
+
+    # -- public blocking API ------------------------------------------------------
+
+    def call(self, method: str, params: Optional[list] = None) -> Any:
+        """Single JSON-RPC call (sent as a one-element batch)."""
+        return self.batch([(method, params or [])])[0]
+
+    def batch(self, calls: List[Tuple[str, list]], raise_errors: bool = True) -> List[Any]:
+        """
+        Run many calls concurrently; results come back in input order.
+
+        With raise_errors=False, a call answered with a JSON-RPC error
+        object (e.g. a reverted eth_call) yields an RpcError instance in its
+        slot instead of failing the whole batch; transport failures still
+        raise.
+        """
+        if not calls:
+            return []
+        return self._run(self._gather_batches(list(calls), raise_errors))
+
+    def fetch_blocks(
+        self,
+        numbers: Iterable[int],
+        full_transactions: bool = False
+    ) -> List[Optional[Dict[str, Any]]]:
+        """eth_getBlockByNumber for every height in `numbers`, in input order."""
+        return self.batch([
+            ("eth_getBlockByNumber", [hex(n), full_transactions]) for n in numbers
+        ])
+
+
+# ============================================================================
+# Rolling Window Aggregates
+# ============================================================================
+
+class SlidingWindowAggregator:
+    """
+    Running performance aggregates over the most recent `window_size` blocks.
+    
+    Daily checkpoints over a 7200-block window overlap almost entirely, so
+    instead of recomputing, the aggregator keeps running sums of block gaps,
+    tx count, gas used and fullness: advancing adds the new blocks and
+    retires the oldest ones, O(new blocks) per update.
+    
+    Integer sums are exact. The fullness sum is floating point, so it is
+    rebuilt from the retained blocks once per full window turnover to keep
+    add/subtract rounding from accumulating.
+    
+    Usage:
+        agg = SlidingWindowAggregator(7200)
+        agg.push(heights, timestamps, tx_counts, gas_used, gas_limits)
+        metrics = agg.metrics()
+    """
+    
+    def __init__(self, window_size: int = 7200):
+        self.window_size = window_size
+        self.reset()
+    
+    def reset(self):
+        # (height, timestamp, tx_count, gas_used, fullness) per retained block
+        self._blocks: deque = deque()
+        self._gap_sum = 0
+        self._tx_sum = 0
+        self._gas_sum = 0
+        self._fullness_sum = 0.0
+        self._since_rebase = 0
+    
+    def __len__(self) -> int:
+        return len(self._blocks)
+    
+    @property
+    def start(self) -> Optional[int]:
+        return self._blocks[0][0] if self._blocks else None
+    
+    @property
+    def end(self) -> Optional[int]:
+        return self._blocks[-1][0] if self._blocks else None
+    
+    def push(
+        self,
+        heights: Iterable[int],
+        timestamps: Iterable[int],
+        tx_counts: Iterable[int],
+        gas_used: Iterable[int],
+        gas_limits: Iterable[int]
+    ):
+        """Append consecutive blocks after `end`, retiring blocks that fall out."""
+        for h, ts, txs, used, limit in zip(heights, timestamps, tx_counts, gas_used, gas_limits):
+            h, ts, txs, used = int(h), int(ts), int(txs), int(used)
+            if self._blocks:
+                if h != self.end + 1:
+                    raise ValueError("expected block %d, got %d" % (self.end + 1, h))
+                self._gap_sum += ts - self._blocks[-1][1]
+            fullness = used / max(int(limit), 1)
+            self._blocks.append((h, ts, txs, used, fullness))
+            self._tx_sum += txs
+            self._gas_sum += used
+            self._fullness_sum += fullness
+            
+            if len(self._blocks) > self.window_size:
+                _, old_ts, old_txs, old_used, old_fullness = self._blocks.popleft()
+                self._gap_sum -= self._blocks[0][1] - old_ts
+                self._tx_sum -= old_txs
+                self._gas_sum -= old_used
+                self._fullness_sum -= old_fullness
+            
+            self._since_rebase += 1
+            if self._since_rebase >= self.window_size:
+                self._fullness_sum = math.fsum(b[4] for b in self._blocks)
+                self._since_rebase = 0
+    
+    def metrics(self) -> Dict[str, float]:
+        """Same keys as BetaParser.query_performance_metrics over the window."""
+        n = len(self._blocks)
+        if n == 0:
+            raise ValueError("window is empty")
+        return {
+            "avg_block_time": self._gap_sum / max(n - 1, 1),
+            "avg_finality_time": math.nan,
+            "throughput_tps": self._tx_sum / max(self._gap_sum, 1),
+            "avg_gas_used": self._gas_sum / n,
+            "block_fullness": self._fullness_sum / n,
+        }
+
+
+def _iso_to_unix(date: str) -> int:
+    """ISO date/datetime string (UTC unless an offset is given) → unix seconds."""
+    dt = datetime.fromisoformat(date)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _is_revert(result: Any) -> bool:
+    """True for a batch slot holding an eth_call error that reports an EVM revert."""
+    if not isinstance(result, RpcError) or not result.args:
+        return False
+    error = result.args[0]
+    if isinstance(error, dict):
+        return error.get("code") == 3 or "revert" in str(error.get("message", "")).lower()
+    return "revert" in str(error).lower()
+
+
 class BetaParser:
     """
     Extracts on-chain metrics for TSC β-axis articulation.
@@ -59,23 +731,99 @@ class BetaParser:
     TODO (Partner): Implement all methods marked with 'raise NotImplementedError'
     """
     
-    def __init__(self, chain_id: str, rpc_url: Optional[str] = None):
+    def __init__(
+        self,
+        chain_id: str,
+        rpc_url: Optional[Union[str, Sequence[str]]] = None,
+        batch_size: int = 100,
+        max_in_flight: int = 8,
+        rate_limit: Optional[float] = None,
+        cache_dir: Optional[str] = None,
+        beacon_url: Optional[str] = None,
+        validator_entities: Optional[Dict[str, str]] = None,
+        window_size: int = 7200,
+        token_address: Optional[str] = None,
+        token_start_block: int = 0,
+        token_keep_checkpoints: Optional[int] = KEEP_CHECKPOINTS
+    ):
         """
         Initialize parser with RPC connection.
         
         Args:
             chain_id: Blockchain identifier
-            rpc_url: RPC endpoint URL (or None to use default/env var)
-        
-        TODO: Initialize connections
-        - RPC provider (Web3, ethers, or raw HTTP)
-        - Beacon chain API (for PoS metrics)
-        - Rate limiting (exponential backoff)
-        - Caching layer (Redis or local disk)
+            rpc_url: RPC endpoint URL, or a list of URLs to use as a hedged,
+                latency-routed endpoint pool (or None to use default/env var)
+            batch_size: JSON-RPC calls per batch request
+            max_in_flight: Max concurrent batch requests (connection pool size)
+            rate_limit: Provider quota in calls/sec (None = unlimited)
+            cache_dir: Root of the on-disk cache (default: $TSC_CACHE_DIR
+                or ~/.cache/tsc-blockchain)
+            beacon_url: Beacon node REST API (PoS validator metrics)
+            validator_entities: Validator pubkey → operator name (e.g. from
+                rated.network) for entity-level concentration
+            window_size: Blocks per rolling checkpoint window (spec: 7200)
+            token_address: ERC-20 contract for token economics; its Transfer
+                ledger checkpoints every `window_size` blocks
+            token_start_block: Token deployment height (ledger replay starts here)
+            token_keep_checkpoints: Ledger checkpoints retained (latest N,
+                None = all); only those heights stay queryable
         """
         self.chain_id = chain_id
         self.rpc_url = rpc_url or self._get_default_rpc()
-        self.cache = {}  # TODO: Replace with proper cache
+        self.rpc = BatchRpcClient(
+            self.rpc_url,
+            batch_size=batch_size,
+            max_in_flight=max_in_flight,
+            rate_limit=rate_limit
+        )
+        # Cache stores are opened (and their directories created) on first use
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.beacon_url = beacon_url
+        self.validator_entities = validator_entities or {}
+        self._entity_ids = {entity: i for i, entity in
+                            enumerate(dict.fromkeys(self.validator_entities.values()))}
+        self._snapshot_groups = np.zeros(0, dtype=np.int64)  # Entity id by validator index
+        self.rolling = SlidingWindowAggregator(window_size)
+        self.token_address = token_address
+        self.token_start_block = token_start_block
+        self.token_keep_checkpoints = token_keep_checkpoints
+    
+    @cached_property
+    def headers(self) -> HeaderStore:
+        return HeaderStore(self.cache_dir, self.chain_id)
+    
+    @cached_property
+    def block_index(self) -> TimestampIndex:
+        return TimestampIndex(self.cache_dir, self.chain_id)
+    
+    @cached_property
+    def validator_snapshots(self) -> ValidatorSnapshotStore:
+        return ValidatorSnapshotStore(self.cache_dir, self.chain_id)
+    
+    @cached_property
+    def fee_sketches(self) -> BlockSketchStore:
+        return BlockSketchStore(self.cache_dir, self.chain_id, "priority_fee")
+    
+    @cached_property
+    def gas_prices(self) -> BlockMomentStore:
+        return BlockMomentStore(self.cache_dir, self.chain_id, "gas_price")
+    
+    @cached_property
+    def swap_logs(self) -> SwapLogCache:
+        return SwapLogCache(self.cache_dir, self.chain_id)
+    
+    @cached_property
+    def pools(self) -> PoolRegistry:
+        return PoolRegistry(self.cache_dir, self.chain_id)
+    
+    @cached_property
+    def token_ledger(self) -> Optional[TransferLedger]:
+        if not self.token_address:
+            return None
+        return TransferLedger(self.cache_dir, self.chain_id, self.token_address,
+                              checkpoint_interval=self.rolling.window_size,
+                              start_block=self.token_start_block,
+                              keep_checkpoints=self.token_keep_checkpoints)
         
     def _get_default_rpc(self) -> str:
         """
@@ -102,46 +850,126 @@ class BetaParser:
             Dict with validator metrics:
             {
                 "validator_count": int,
-                "stake_distribution": {validator_addr: stake_amount},
-                "entity_grouping": {entity_name: [validator_addrs]},  # if known
+                "stakes": np.ndarray,  # stake per validator (ETH), beacon index order
+                "stake_gini": float,
+                "nakamoto_coefficient": int,
+                "top10_share": float,
+                "hhi": float,
+                # if validator_entities is configured:
+                "entity_count": int,
+                "max_entity_share": float,  # validator_decentralization witness
+                "entity_nakamoto_coefficient": int,
             }
         
-        TODO: Implement
-        Chain-specific approaches:
+        Stakes stay in a NumPy array end to end (no {addr: stake} dict) and
+        all metrics come from `concentration_summary`, one sorted pass —
+        ~30ms for 1M validators.
+        
+        **Ethereum (PoS):** implemented
+        - Beacon API: /eth/v1/beacon/states/{state}/validators
+        - Stake = effective_balance (the consensus weight), in ETH, of
+          validators active in the epoch containing the execution block
+        - Historical epochs go through `self.validator_snapshots` (base set
+          plus per-epoch deltas): each epoch's full list is downloaded once,
+          and repeat or backfill queries rebuild the stake array locally
+        - block_number=-1 queries the "head" state directly (not stored)
+        - Entity grouping via `validator_entities` (pubkey → operator)
         
-        **Ethereum (PoS):**
-        - Query beacon chain API for validator set
-        - Endpoint: /eth/v1/beacon/states/{block}/validators
-        - Extract: validator pubkeys, balances, status
-        - Group by entity (Lido, Coinbase, etc.) if data available
+        TODO: Other chains
         
         **Bitcoin (PoW):**
         - Query last N blocks (e.g., 1000 blocks = ~1 week)
-        - Count blocks mined by each address
-        - Estimate hash power distribution
+        - Count blocks mined by each address (header store `miner` column)
         - Known pools: F2Pool, Antpool, etc.
         
         **Solana:**
         - Query getVoteAccounts RPC method
         - Extract: validator identities, activated stake
-        - Compute stake concentration
         
-        Metrics to compute:
-        1. **Gini coefficient:** Measure concentration
-           - 0 = perfect equality
-           - 1 = one validator controls everything
-           - Use standard formula: G = (2 * sum(i * x_i)) / (n * sum(x_i)) - (n+1)/n
+        Metric definitions (see concentration.py):
+        1. **Gini coefficient:** G = (2 * sum(i * x_i)) / (n * sum(x_i)) - (n+1)/n
+           0 = perfect equality, 1 = one validator controls everything
+        2. **Nakamoto coefficient:** Min validators to control >50% stake
+           Higher is better (more decentralized)
+        """
+        if self.chain_id not in BEACON_GENESIS:
+            raise NotImplementedError("Validator distribution for %s" % self.chain_id)
+        if not self.beacon_url:
+            raise ValueError("beacon_url is required for validator metrics")
         
-        2. **Nakamoto coefficient:** Min validators to control >50%
-           - Sort validators by stake descending
-           - Count until cumulative stake > 50%
-           - Higher is better (more decentralized)
+        if block_number < 0:
+            validators = self._fetch_beacon_validators("head", active_only=True)
+            stakes = np.fromiter(
+                (int(v["validator"]["effective_balance"]) for v in validators),
+                dtype=np.float64, count=len(validators)
+            ) / 1e9
+            pubkeys = [v["validator"]["pubkey"] for v in validators]
+            group_ids = self._entity_group_ids(pubkeys) if self.validator_entities else None
+        else:
+            epoch = self._beacon_epoch(block_number)
+            snapshots = self.validator_snapshots
+            if epoch not in snapshots:
+                snapshots.record(epoch, self._fetch_beacon_validators(str(epoch * SLOTS_PER_EPOCH)))
+            stakes, indices = snapshots.active_stakes(epoch)
+            group_ids = self._snapshot_group_ids(epoch)[indices] if self.validator_entities else None
+        result = self._stake_metrics(stakes)
         
-        Challenge: Distinguishing validator entities (one org runs multiple validators)
-        - Use known entity mappings (e.g., rated.network data for Ethereum)
-        - Or treat each validator independently
-        """
-        raise NotImplementedError("Partner to implement validator distribution query")
+        if group_ids is not None:
+            result.update(self._entity_metrics(stakes, group_ids))
+        return result
+    
+    def _entity_group_ids(self, pubkeys: Iterable[str]) -> np.ndarray:
+        """Dense operator id per validator pubkey (-1 = unattributed)."""
+        return np.fromiter(
+            (self._entity_ids.get(self.validator_entities.get(pubkey), -1) for pubkey in pubkeys),
+            dtype=np.int64
+        )
+    
+    def _snapshot_group_ids(self, epoch: int) -> np.ndarray:
+        """Entity id by validator index, extended as the snapshot set grows."""
+        pubkeys = self.validator_snapshots.state(epoch)["pubkeys"]
+        known = len(self._snapshot_groups)
+        if len(pubkeys) > known:
+            new_ids = self._entity_group_ids("0x" + row.tobytes().hex() for row in pubkeys[known:])
+            self._snapshot_groups = np.concatenate([self._snapshot_groups, new_ids])
+        return self._snapshot_groups
+    
+    @staticmethod
+    def _stake_metrics(stakes: np.ndarray) -> Dict[str, Any]:
+        summary = concentration_summary(stakes, top_n=10)
+        return {
+            "validator_count": len(stakes),
+            "stakes": stakes,
+            "stake_gini": summary["gini"],
+            "nakamoto_coefficient": summary["nakamoto_coefficient"],
+            "top10_share": summary["top_n_share"],
+            "hhi": summary["hhi"],
+        }
+    
+    @staticmethod
+    def _entity_metrics(stakes: np.ndarray, group_ids: np.ndarray) -> Dict[str, Any]:
+        summary = concentration_summary(stakes, group_ids=group_ids)
+        return {
+            "entity_count": summary["holder_count"],
+            "max_entity_share": summary["max_share"],
+            "entity_nakamoto_coefficient": summary["nakamoto_coefficient"],
+        }
+    
+    def _beacon_epoch(self, block_number: int) -> int:
+        """Beacon epoch containing an execution block."""
+        genesis, seconds_per_slot = BEACON_GENESIS[self.chain_id]
+        timestamp = self._timestamps_at([block_number])[0]
+        if timestamp is None:
+            raise ValueError("block %d is past the chain head" % block_number)
+        return (timestamp - genesis) // seconds_per_slot // SLOTS_PER_EPOCH
+    
+    def _fetch_beacon_validators(self, state_id: str, active_only: bool = False) -> List[Dict[str, Any]]:
+        url = "%s/eth/v1/beacon/states/%s/validators%s" % (
+            self.beacon_url.rstrip("/"), state_id, "?status=active" if active_only else ""
+        )
+        request = Request(url, headers={"Accept": "application/json"})
+        with urlopen(request, timeout=300) as response:
+            return json.loads(response.read())["data"]
     
     def query_performance_metrics(
         self,
@@ -165,37 +993,199 @@ class BetaParser:
                 "block_fullness": float (0-1, how full are blocks?)
             }
         
-        TODO: Implement
-        1. **Fetch blocks:**
-           - Query eth_getBlockByNumber for each block in range
-           - Extract: timestamp, transactions, gasUsed
-           - Cache to avoid re-queries
+        Implementation:
+        1. **Fetch blocks:** heights missing from the local header store
+           (`self.headers`) are fetched with eth_getBlockByNumber, packed into
+           JSON-RPC batches and sent concurrently by `self.rpc` (rate-limited,
+           retried with backoff). Everything else is read from the store's
+           memory-mapped columns, so a warm window costs no RPC at all.
+        
+        2. **Block time:** (last.timestamp - first.timestamp) / (end - start)
         
-        2. **Block time:**
-           - Compute: (last_block.timestamp - first_block.timestamp) / (end - start)
-           - Watch for outliers (long gaps indicate issues)
+        3. **Finality time:** lag between the head block and the latest
+           `finalized` block (PoS), sampled whenever new blocks are fetched
+           and persisted with the store. NaN on chains without a finalized tag.
         
-        3. **Finality time:**
-           - PoS (Ethereum): Query beacon chain for finalized blocks
-           - PoW (Bitcoin): Consider 6 confirmations = ~60 minutes
-           - Estimate: time between block production and finalization
+        4. **Throughput:** total transactions / time span (ACTUAL throughput,
+           vs. claimed in α)
         
-        4. **Throughput:**
-           - Count total transactions in range
-           - Divide by time span (in seconds)
-           - This is ACTUAL throughput (vs. claimed in α)
+        5. **Block fullness:** mean of gasUsed / gasLimit (high = congestion)
+        """
+        if end_block <= start_block:
+            raise ValueError("end_block must be greater than start_block")
+        
+        self._fetch_headers(self.headers.missing(start_block, end_block), sample_finality=True)
+        cols = self.headers.read(
+            start_block, end_block, ["timestamp", "gas_used", "gas_limit", "tx_count"]
+        )
+        metrics = self._summarize_columns(cols)
+        metrics["avg_finality_time"] = self.headers.meta.get("finality_lag", math.nan)
+        return metrics
+    
+    def _fetch_headers(self, heights: Iterable[int], sample_finality: bool = False):
+        """Fetch `heights` over RPC into the header store (no-op if empty)."""
+        heights = [int(h) for h in heights]
+        if not heights:
+            return
+        blocks = self.rpc.fetch_blocks(heights)
+        if any(b is None for b in blocks):
+            raise RpcError("heights %d-%d extend past the chain head" % (heights[0], heights[-1]))
+        if sample_finality:
+            self.headers.meta["finality_lag"] = self._query_finality_lag()
+        self.headers.put_blocks(blocks)
+    
+    def _query_finality_lag(self) -> float:
+        """Seconds between the head block and the latest finalized block."""
+        try:
+            head, finalized = self.rpc.batch([
+                ("eth_getBlockByNumber", ["latest", False]),
+                ("eth_getBlockByNumber", ["finalized", False]),
+            ])
+        except RpcError:
+            # Pre-merge / PoW nodes reject the "finalized" tag
+            return math.nan
+        if head is None or finalized is None:
+            return math.nan
+        return float(int(head["timestamp"], 16) - int(finalized["timestamp"], 16))
+    
+    @staticmethod
+    def _summarize_columns(cols: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """Reduce header columns for a block range to the performance metrics dict."""
+        timestamps = cols["timestamp"]
+        n = len(timestamps)
+        elapsed = float(timestamps[-1]) - float(timestamps[0])
+        gas_used = cols["gas_used"].astype(np.float64)
+        gas_limit = np.maximum(cols["gas_limit"].astype(np.float64), 1.0)
+        
+        return {
+            "avg_block_time": elapsed / max(n - 1, 1),
+            "avg_finality_time": math.nan,
+            "throughput_tps": float(cols["tx_count"].sum(dtype=np.uint64)) / max(elapsed, 1.0),
+            "avg_gas_used": float(gas_used.mean()),
+            "block_fullness": float((gas_used / gas_limit).mean()),
+        }
+    
+    def update_rolling_window(self, end_block: int) -> Dict[str, float]:
+        """
+        Advance the rolling window to end at `end_block` and return its metrics.
         
-        5. **Block fullness:**
-           - gasUsed / gasLimit for each block
-           - Average across range
-           - High fullness = congestion
+        Args:
+            end_block: Last block of the new window (e.g. today's checkpoint)
+        
+        Returns:
+            Same dict as query_performance_metrics for the `window_size`
+            blocks ending at `end_block`.
         
-        Performance considerations:
-        - Fetching 1000 blocks = 1000 RPC calls (slow!)
-        - Solution: Parallelize queries, respect rate limits
-        - Cache results to disk (don't re-query same blocks)
+        Consecutive daily checkpoints only fetch and fold in the blocks
+        added since the previous call; the first call (or a jump backwards
+        or past a whole window) loads the full window once.
         """
-        raise NotImplementedError("Partner to implement performance metrics")
+        rolling = self.rolling
+        if rolling.end is None or end_block < rolling.end or \
+                end_block - rolling.end >= rolling.window_size:
+            rolling.reset()
+            first = max(end_block - rolling.window_size + 1, 0)
+        else:
+            first = rolling.end + 1
+        
+        if first <= end_block:
+            self._fetch_headers(self.headers.missing(first, end_block), sample_finality=True)
+            cols = self.headers.read(
+                first, end_block, ["timestamp", "tx_count", "gas_used", "gas_limit"]
+            )
+            rolling.push(range(first, end_block + 1), cols["timestamp"], cols["tx_count"],
+                         cols["gas_used"], cols["gas_limit"])
+        
+        metrics = rolling.metrics()
+        metrics["avg_finality_time"] = self.headers.meta.get("finality_lag", math.nan)
+        return metrics
+    
+    def query_fee_market(
+        self,
+        start_block: int,
+        end_block: int
+    ) -> Dict[str, float]:
+        """
+        Fee-market percentiles over every transaction in a block range.
+        
+        Args:
+            start_block: Starting block number
+            end_block: Ending block number (inclusive)
+        
+        Returns:
+            Dict with fee metrics (gwei):
+            {
+                "avg_gas_price": float,     # mean effective gas price
+                "gas_price_cv": float,      # std / mean over transactions
+                "base_fee_cv": float,       # std / mean over blocks (spec: gas_usage_stability)
+                "priority_fee_p50": float,  # effective priority fee (tip)
+                "priority_fee_p95": float,
+                "tx_count": int,
+            }
+        
+        Implementation:
+        Each block's effective priority fees are summarized once into a KLL
+        sketch in `self.fee_sketches` (see quantiles.py), and its effective
+        gas prices into moments in `self.gas_prices` (rolling.py, shared
+        with GammaParser); blocks without either are fetched with full
+        transactions, FULL_BLOCK_FETCH heights per round. A window's
+        percentiles are a merge of cached per-chunk and per-block sketches,
+        so daily and weekly windows never rescan transactions. Sketches and
+        moments of blocks younger than the header store's finality margin
+        are kept provisional and replaced on the next call, so a reorg near
+        the head cannot leave an orphaned block in the percentiles or CVs.
+        Percentiles carry the sketch's rank error (±1.65% of rank at k=200); the
+        average and CVs are exact.
+        """
+        missing = np.union1d(self.fee_sketches.missing(start_block, end_block),
+                             self.gas_prices.missing(start_block, end_block)).tolist()
+        for i in range(0, len(missing), FULL_BLOCK_FETCH):
+            heights = missing[i:i + FULL_BLOCK_FETCH]
+            blocks = self.rpc.fetch_blocks(heights, full_transactions=True)
+            if any(b is None for b in blocks):
+                raise RpcError("heights %d-%d extend past the chain head" % (heights[0], heights[-1]))
+            self.headers.put_blocks(blocks)
+            tips = [self._priority_fees(b) for b in blocks]
+            # Blocks the header store holds as provisional are refetched next run
+            provisional = self.headers.unfinalized(heights)
+            self.fee_sketches.put(dict(zip(heights, tips)), provisional=provisional)
+            prices = [fees + int(b.get("baseFeePerGas") or "0x0", 16) for b, fees in zip(blocks, tips)]
+            groups = np.repeat(np.arange(len(blocks)), [len(p) for p in prices])
+            self.gas_prices.put(heights, BlockMoments.from_groups(groups, np.concatenate(prices), len(blocks)),
+                                provisional=provisional)
+        self._fetch_headers(self.headers.missing(start_block, end_block))
+        
+        sketch, count, _ = self.fee_sketches.window(start_block, end_block)
+        _, avg_price, std_price = self.gas_prices.read(start_block, end_block).total()
+        base_fee = self.headers.read(start_block, end_block, ["base_fee"])["base_fee"]
+        _, avg_base, std_base = BlockMoments.from_values(base_fee).total()
+        p50, p95 = sketch.quantiles([0.5, 0.95]) / 1e9
+        return {
+            "avg_gas_price": avg_price / 1e9,
+            "gas_price_cv": std_price / avg_price if avg_price else math.nan,
+            "base_fee_cv": std_base / avg_base if avg_base else math.nan,
+            "priority_fee_p50": float(p50),
+            "priority_fee_p95": float(p95),
+            "tx_count": count,
+        }
+    
+    @staticmethod
+    def _priority_fees(block: Dict[str, Any]) -> np.ndarray:
+        """
+        Effective priority fee (wei) of each transaction in a full block:
+        min(maxPriorityFeePerGas, maxFeePerGas - baseFee) for EIP-1559
+        transactions, gasPrice - baseFee otherwise (gasPrice on pre-London
+        blocks).
+        """
+        base_fee = int(block.get("baseFeePerGas") or "0x0", 16)
+        txs = block["transactions"]
+        fees = np.empty(len(txs), dtype=np.float64)
+        for i, tx in enumerate(txs):
+            if tx.get("maxPriorityFeePerGas") is not None:
+                fees[i] = min(int(tx["maxPriorityFeePerGas"], 16), int(tx["maxFeePerGas"], 16) - base_fee)
+            else:
+                fees[i] = int(tx["gasPrice"], 16) - base_fee
+        return fees
     
     def query_token_economics(
         self,
@@ -205,7 +1195,7 @@ class BetaParser:
         Query token holder distribution and treasury status.
         
         Args:
-            block_number: Block height to query
+            block_number: Block height to query (-1 = latest finalized)
         
         Returns:
             Dict with economic metrics:
@@ -217,20 +1207,17 @@ class BetaParser:
                 "supply_inflation_rate": float,  # Annual inflation (if applicable)
             }
         
-        TODO: Implement
-        **Token holder distribution:**
-        - Option 1: Query analytics platform (Nansen, Etherscan)
-          - Pros: Pre-computed, fast
-          - Cons: Costs money, trust third party
-          - Example: Etherscan API /api?module=token&action=tokenholderlist
-        
-        - Option 2: Compute from scratch
-          - Pros: First-party data, reproducible
-          - Cons: Expensive (need to scan all ERC20 Transfer events)
-          - Probably too slow for Phase 0
-        
-        **Recommendation:** Use Etherscan/Nansen for Phase 0-1a
+        Implementation:
+        **Token holder distribution:** computed first-party from the token's
+        Transfer events (no Etherscan/Nansen rate limits). `self.token_ledger`
+        replays eth_getLogs results in block order into an address-indexed
+        balance array and checkpoints every `window_size` blocks, keeping
+        the latest `token_keep_checkpoints` (see TransferLedger), so:
+        - A retained checkpoint height is answered from disk with no replay
+        - A later height replays only the blocks since the last checkpoint
+        - Other heights behind the ledger raise KeyError
         
+        TODO:
         **Treasury balance:**
         - If protocol has treasury address (e.g., Uniswap, Compound)
         - Query balance at that address
@@ -241,7 +1228,36 @@ class BetaParser:
         - Compute: (supply_new - supply_old) / supply_old
         - For PoS chains: Inflation = staking rewards - burned fees
         """
-        raise NotImplementedError("Partner to implement token economics")
+        if self.token_ledger is None:
+            raise ValueError("token_address not configured")
+        if block_number == -1:
+            finalized = self.rpc.call("eth_getBlockByNumber", ["finalized", False])
+            block_number = int(finalized["number"], 16)
+        
+        ledger = self.token_ledger
+        if block_number > ledger.last_block:
+            ledger.replay(self._fetch_transfer_logs, block_number)
+        stats = ledger.stats_at(block_number)
+        return {
+            "token_holder_count": stats["token_holder_count"],
+            "token_holder_gini": stats["token_holder_gini"],
+            "top10_concentration": stats["top10_concentration"],
+            "treasury_balance": 0.0,
+            "supply_inflation_rate": 0.0,
+        }
+    
+    def _fetch_transfer_logs(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """Transfer logs of the configured token, one eth_getLogs per LOG_BLOCK_RANGE, batched."""
+        calls = [
+            ("eth_getLogs", [{
+                "fromBlock": hex(lo),
+                "toBlock": hex(min(lo + LOG_BLOCK_RANGE - 1, to_block)),
+                "address": self.token_ledger.token_address,
+                "topics": [TRANSFER_TOPIC],
+            }])
+            for lo in range(from_block, to_block + 1, LOG_BLOCK_RANGE)
+        ]
+        return [log for logs in self.rpc.batch(calls) for log in logs]
     
     def query_mev_metrics(
         self,
@@ -259,43 +1275,105 @@ class BetaParser:
             Dict with MEV metrics (or None if not measurable):
             {
                 "mev_extracted_eth": float,
-                "mev_percent_of_fees": float,
+                "mev_percent_of_fees": float,  # vs. base fees burned in range
                 "sandwich_attack_count": int,
                 "arbitrage_tx_count": int,
+                "unresolved_pools": int,       # Swap emitters skipped (token0() reverted)
             }
         
-        TODO: Implement (OPTIONAL - may skip for Phase 0)
-        
-        **Challenges:**
-        MEV is hard to measure accurately. Approaches:
-        
-        1. **Use MEV-Boost data:**
-           - Flashbots relay publishes MEV-Boost bids
-           - Shows validator payments for block ordering rights
-           - Available for Ethereum post-Merge
-           - API: https://boost-relay.flashbots.net/
+        Implementation (heuristic detection, see mev.py):
+        1. Swap logs (Uniswap V2/V3 Swap events, all pools) for the range
+           come from `self.swap_logs`, decoded columns cached per aligned
+           1000-block chunk. Missing chunks are fetched with one batch of
+           eth_getLogs calls; chunks past the finalized head are not cached.
+        2. Pool tokens come from `self.pools` (token0()/token1() via one
+           batched eth_call round trip per new pool set). Contracts whose
+           calls revert are recorded as unresolvable and their swaps skipped.
+        3. `detect_mev` makes one ordered pass over all swaps with per-pool
+           hash maps: sandwiches (front-run, victim, back-run by the same
+           actor) and cyclic same-transaction arbitrage.
         
-        2. **Heuristic detection:**
-           - Detect sandwich attacks (victim tx surrounded by attacker txs)
-           - Detect arbitrage (same token bought/sold in one block)
-           - Detect liquidations (lending protocol liquidation calls)
-           - This is imprecise but gives order-of-magnitude estimate
+        mev_extracted_eth counts only profits realized in WETH, so it is a
+        lower bound. Returns None on chains without a wrapped-native token.
         
-        3. **Use research tools:**
-           - Eigenphi (MEV analytics)
-           - Zeromev
-           - These have APIs but may cost money
+        TODO: MEV-Boost relay payments (Flashbots relay API) for the
+        builder-side view; liquidations.
+        """
+        if self.chain_id not in WRAPPED_NATIVE:
+            return None
+        swaps = self._swap_columns(start_block, end_block)
+        pools = sorted({"0x" + p.ljust(20, b"\x00").hex() for p in swaps["pool"].tolist()})
+        self._resolve_pools(pools)
+        unknown = [p for p in pools if p not in self.pools.tokens]
+        if unknown:
+            # Swap-topic emitters without token0()/token1(): not analyzable
+            skip = np.isin(swaps["pool"], np.array([bytes.fromhex(p[2:]) for p in unknown], dtype="S20"))
+            swaps = {name: col[~skip] for name, col in swaps.items()}
+        mev = detect_mev(swaps, self.pools.tokens, WRAPPED_NATIVE[self.chain_id])
         
-        **Recommendation for Phase 0:**
-        Return None (skip MEV measurement)
-        Revisit in Phase 1b if needed
+        self._fetch_headers(self.headers.missing(start_block, end_block))
+        cols = self.headers.read(start_block, end_block, ["gas_used", "base_fee"])
+        burned_eth = float(np.dot(cols["gas_used"].astype(np.float64),
+                                  cols["base_fee"].astype(np.float64))) / 1e18
+        return {
+            "mev_extracted_eth": mev["mev_extracted_eth"],
+            "mev_percent_of_fees": 100.0 * mev["mev_extracted_eth"] / burned_eth if burned_eth else math.nan,
+            "sandwich_attack_count": mev["sandwich_attack_count"],
+            "arbitrage_tx_count": mev["arbitrage_tx_count"],
+            "unresolved_pools": len(unknown),
+        }
+    
+    def _swap_columns(self, start_block: int, end_block: int) -> Dict[str, np.ndarray]:
+        """Decoded swaps for [start, end]: cached chunks plus one batched fetch."""
+        cache = self.swap_logs
+        missing = cache.missing(start_block, end_block)
+        fresh = []
+        if missing:
+            finalized = int(self.rpc.call("eth_getBlockByNumber", ["finalized", False])["number"], 16)
+            ranges = []
+            for chunk_start in missing:
+                chunk_end = chunk_start + cache.chunk_size - 1
+                # Unfinalized chunks: fetch only what the window needs
+                ranges.append((chunk_start, chunk_end if chunk_end <= finalized
+                               else min(chunk_end, end_block)))
+            results = self.rpc.batch([
+                ("eth_getLogs", [{"fromBlock": hex(lo), "toBlock": hex(hi), "topics": [SWAP_TOPICS]}])
+                for lo, hi in ranges
+            ])
+            for (lo, hi), logs in zip(ranges, results):
+                swaps = decode_swap_logs(logs)
+                if hi == lo + cache.chunk_size - 1 and hi <= finalized:
+                    cache.put(lo, swaps)
+                else:
+                    fresh.append(swaps)
+        swaps = concat_swaps([cache.read(start_block, end_block)] + fresh)
+        keep = (swaps["block"] >= start_block) & (swaps["block"] <= end_block)
+        return {name: col[keep] for name, col in swaps.items()}
+    
+    def _resolve_pools(self, pools: List[str]):
+        """
+        Fetch token0/token1 for pools not yet in the registry (one batch).
         
-        **Rationale:**
-        MEV is important but hard to measure accurately
-        Focus on easier metrics first (validator distribution, performance)
+        Errors are handled per call: any contract can emit the V2 Swap topic,
+        so a pool whose token0()/token1() reverts or returns no word is
+        recorded as unresolvable; other call errors leave the pool
+        unresolved for this run only.
         """
-        # Stub: Return None for now
-        return None
+        missing = self.pools.missing(pools)
+        if not missing:
+            return
+        results = self.rpc.batch([
+            ("eth_call", [{"to": pool, "data": selector}, "latest"])
+            for pool in missing for selector in (TOKEN0_SELECTOR, TOKEN1_SELECTOR)
+        ], raise_errors=False)
+        resolved, unresolvable = {}, []
+        for i, pool in enumerate(missing):
+            pair = results[2 * i:2 * i + 2]
+            if all(isinstance(r, str) and len(r) == 66 for r in pair):
+                resolved[pool] = ("0x" + pair[0][-40:], "0x" + pair[1][-40:])
+            elif all(isinstance(r, str) or _is_revert(r) for r in pair):
+                unresolvable.append(pool)
+        self.pools.update(resolved, unresolvable)
     
     def extract_all_metrics(
         self,
@@ -312,43 +1390,75 @@ class BetaParser:
         Returns:
             OnChainMetrics object with all measurements
         
-        TODO: Implement
-        1. Convert dates to block numbers
-           - Use eth_getBlockByTimestamp (if available)
-           - Or binary search: query blocks until timestamp matches
+        Implementation:
+        1. Convert dates to block numbers (window is [start 00:00 UTC,
+           end 00:00 UTC)) with `self.block_index`: a persistent
+           (height, timestamp) index searched by interpolation. Known
+           boundaries resolve locally; new ones (e.g. today's) cost one or
+           two batched RPC probes instead of a ~25-call binary search.
         
-        2. Call all query_* methods:
-           - validator_dist = self.query_validator_distribution(end_block)
+        2. Call the query_* methods:
            - perf = self.query_performance_metrics(start_block, end_block)
-           - econ = self.query_token_economics(end_block)
            - mev = self.query_mev_metrics(start_block, end_block)  # optional
+           - fees = self.query_fee_market(start_block, end_block)
+           - validator_dist = self.query_validator_distribution(end_block)
+             (when a beacon endpoint is configured)
+           - econ = self.query_token_economics(end_block)
+             (when a token address is configured)
         
         3. Aggregate into OnChainMetrics object
         
-        4. Cache result (don't recompute same window)
+        Header data for the window is cached in `self.headers`, so a warm
+        rerun does no RPC and no JSON decoding.
         
         Performance target: <10 minutes per chain
         """
-        # TODO: Implement
-        # Stub implementation:
+        start_block = self._block_at_timestamp(_iso_to_unix(window_start))
+        end_block = self._block_at_timestamp(_iso_to_unix(window_end)) - 1
+        
+        perf = self.query_performance_metrics(start_block, end_block)
+        mev = self.query_mev_metrics(start_block, end_block)
+        fees = self.query_fee_market(start_block, end_block)
+        base_fee = self.headers.read(start_block, end_block, ["base_fee"])["base_fee"]
+        validators = (self.query_validator_distribution(end_block) if self.beacon_url
+                      else {"validator_count": 0, "stake_gini": 0.0, "nakamoto_coefficient": 0})
+        econ = (self.query_token_economics(end_block) if self.token_ledger
+                else {"token_holder_gini": 0.0, "treasury_balance": 0.0})
+        
         return OnChainMetrics(
-            validator_count=0,
-            stake_gini=0.0,
-            nakamoto_coefficient=0,
-            avg_block_time=0.0,
-            avg_finality_time=0.0,
-            throughput_tps=0.0,
-            token_holder_gini=0.0,
-            treasury_balance=0.0,
-            mev_extracted_24h=None,
-            avg_gas_price=0.0,
-            base_fee=None,
-            priority_fee_p50=None,
+            validator_count=validators["validator_count"],
+            stake_gini=validators["stake_gini"],
+            nakamoto_coefficient=validators["nakamoto_coefficient"],
+            avg_block_time=perf["avg_block_time"],
+            avg_finality_time=perf["avg_finality_time"],
+            throughput_tps=perf["throughput_tps"],
+            token_holder_gini=econ["token_holder_gini"],
+            treasury_balance=econ["treasury_balance"],
+            mev_extracted_24h=mev["mev_extracted_eth"] if mev else None,
+            avg_gas_price=fees["avg_gas_price"],
+            base_fee=float(base_fee.mean()) / 1e9 if base_fee.any() else None,  # gwei
+            priority_fee_p50=fees["priority_fee_p50"],
+            priority_fee_p95=fees["priority_fee_p95"],
             chain_id=self.chain_id,
             measured_at=datetime.now(),
-            block_height=0
+            block_height=end_block
         )
     
+    def _timestamps_at(self, heights: List[int]) -> List[Optional[int]]:
+        """
+        Block timestamps for the timestamp index: header store first, one
+        batched RPC round trip for the rest. None for heights past the head.
+        """
+        missing = [h for h in heights if not self.headers.is_final(h)]
+        if missing:
+            self.headers.put_blocks(self.rpc.fetch_blocks(missing))
+        return [int(self.headers.get(h, "timestamp")) if self.headers.has(h) else None
+                for h in heights]
+    
+    def _block_at_timestamp(self, ts: int) -> int:
+        """First block with timestamp >= ts (see TimestampIndex.lookup)."""
+        return self.block_index.lookup(ts, fetch=self._timestamps_at)
+    
     def compute_beta_features(
         self,
         metrics: OnChainMetrics
@@ -428,6 +1538,97 @@ def test_ethereum_validators():
     print(f"  Stake Gini: {dist.get('stake_gini', 'N/A')}")
 
 
+def test_validator_distribution_stub():
+    """
+    Test validator metrics end to end against the stub beacon API.
+    
+    Success criteria:
+    - Block number maps to a beacon state and returns every validator
+    - Gini/Nakamoto match the concentration engine on the same stakes
+    - Entity grouping flags an operator above the 25% witness target
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer
+    
+    n = 20_000
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            StubRpcServer(beacon_validators=n) as server:
+        # One operator runs the first 30% of validators
+        entities = {"0x%096x" % i: "operator-a" for i in range(int(n * 0.3))}
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir,
+                            beacon_url=server.url, validator_entities=entities)
+        dist = parser.query_validator_distribution(block_number=18_000_000)
+        parser.rpc.close()
+    
+    assert dist["validator_count"] == n
+    assert 0 <= dist["stake_gini"] < 0.05, "Near-uniform 32 ETH stakes"
+    assert dist["nakamoto_coefficient"] > n // 2 - n // 20
+    assert dist["max_entity_share"] > 0.25, "operator-a should breach the 25% target"
+    
+    print(f"✓ Validator distribution (stub beacon):")
+    print(f"  Validators: {dist['validator_count']:,}, Gini {dist['stake_gini']:.4f}, "
+          f"Nakamoto {dist['nakamoto_coefficient']:,}")
+    print(f"  Entities: {dist['entity_count']:,}, max entity share {dist['max_entity_share']:.1%}")
+
+def test_validator_snapshots():
+    """
+    Test a year of daily validator distributions from delta snapshots.
+    
+    Success criteria:
+    - Snapshot stakes match the beacon's own ?status=active list
+    - Warm backfill of 365 daily checkpoints: no beacon requests, seconds
+    - Epochs recorded out of order rebuild the same stake arrays
+    - Base + deltas are a small fraction of the raw per-day downloads
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer, SyntheticChain
+    from blockchain_parsers.validator_snapshots import ValidatorSnapshotStore
+    
+    n = 2000
+    blocks = [18_000_000 - day * 7200 for day in range(365)][::-1]
+    chain = SyntheticChain(validator_churn=True)
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            StubRpcServer(chain, beacon_validators=n) as server:
+        cold = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir,
+                          beacon_url=server.url)
+        start = time.perf_counter()
+        cold_dists = [cold.query_validator_distribution(b) for b in blocks]
+        cold_elapsed = time.perf_counter() - start
+        cold.rpc.close()
+        
+        warm = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir,
+                          beacon_url=server.url)
+        beacon_before = server.beacon_request_count
+        start = time.perf_counter()
+        warm_dists = [warm.query_validator_distribution(b) for b in blocks]
+        warm_elapsed = time.perf_counter() - start
+        assert server.beacon_request_count == beacon_before, "Warm backfill must stay local"
+        
+        for b, dist in zip(blocks[::73], warm_dists[::73]):
+            epoch = warm._beacon_epoch(b)
+            direct = warm._fetch_beacon_validators(str(epoch * 32), active_only=True)
+            expected = np.array([int(v["validator"]["effective_balance"]) for v in direct]) / 1e9
+            assert np.array_equal(dist["stakes"], expected), b
+        for cold_dist, warm_dist in zip(cold_dists, warm_dists):
+            assert cold_dist["stake_gini"] == warm_dist["stake_gini"]
+        
+        epochs = warm.validator_snapshots.epochs()
+        shuffled = ValidatorSnapshotStore(cache_dir, "shuffled")
+        for epoch in epochs[::-30] + epochs[15::30]:
+            shuffled.record(epoch, chain.validators(str(epoch * 32), n))
+        for epoch in sorted(shuffled.epochs()):
+            assert np.array_equal(shuffled.active_stakes(epoch)[0],
+                                  warm.validator_snapshots.active_stakes(epoch)[0]), epoch
+        
+        stored = warm.validator_snapshots.nbytes()
+        raw = len(json.dumps({"data": chain.validators(str(epochs[-1] * 32), n)})) * len(epochs)
+        warm.rpc.close()
+    
+    print(f"✓ Validator snapshots: {len(blocks)} daily checkpoints, "
+          f"{len(warm_dists[-1]['stakes']):,} active validators at the end")
+    print(f"  Cold (download + record): {cold_elapsed:.1f}s; warm backfill: {warm_elapsed:.2f}s")
+    print(f"  Stored: {stored / 1e6:.1f}MB vs ~{raw / 1e6:.0f}MB of daily JSON")
+
 def test_performance_metrics():
     """
     Test computing performance metrics over block range.
@@ -474,6 +1675,227 @@ def test_token_economics():
     print(f"  Top 10 concentration: {econ.get('top10_concentration', 'N/A')}")
 
 
+def test_token_ledger_stub():
+    """
+    Test the Transfer-event ledger against a synthetic log file.
+    
+    Success criteria:
+    - Exact balances match a pure-Python replay of the same transfers
+    - Holder stats at a checkpoint come from disk with no RPC
+    - A fresh parser resumes from the last checkpoint (O(new) replay)
+    - A cold replay keeping 3 checkpoints writes a fraction of the interval
+      checkpoints; only the retained heights stay queryable
+    """
+    import os
+    import tempfile
+    from blockchain_parsers.concentration import gini, top_n_share
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer, write_transfer_log_file
+    
+    token = "0x00000000000000000000000000000000000000aa"
+    first, last, window = 18_000_000, 18_030_000, 7200
+    with tempfile.TemporaryDirectory() as cache_dir:
+        log_path = os.path.join(cache_dir, "transfers.jsonl")
+        expected = write_transfer_log_file(log_path, token, first, last)
+        with StubRpcServer(logs_path=log_path) as server:
+            parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir,
+                                window_size=window, token_address=token,
+                                token_start_block=first)
+            mid = first + 2 * window
+            parser.query_token_economics(mid)
+            
+            resumed = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir,
+                                 window_size=window, token_address=token,
+                                token_start_block=first)
+            assert resumed.token_ledger.last_block == mid, "Should resume from checkpoint"
+            start = time.perf_counter()
+            econ = resumed.query_token_economics(last)
+            replay_elapsed = time.perf_counter() - start
+            
+            calls_before = server.call_count
+            start = time.perf_counter()
+            checkpointed = resumed.query_token_economics(first + 3 * window - 1)
+            stats_elapsed = time.perf_counter() - start
+            assert server.call_count == calls_before, "Checkpointed height needs no RPC"
+            
+            for address, balance in expected.items():
+                assert resumed.token_ledger.balance_of(address) == balance, address
+            holders = np.array([float(b) for b in expected.values()])
+            assert econ["token_holder_count"] == len(expected)
+            assert abs(econ["token_holder_gini"] - gini(holders)) < 1e-9
+            assert abs(econ["top10_concentration"] - top_n_share(holders, 10)) < 1e-9
+            
+            # Cold replay from deployment, keeping the latest 3 checkpoints
+            ledger = TransferLedger(os.path.join(cache_dir, "kept"), "ethereum", token,
+                                    checkpoint_interval=1000, start_block=first, keep_checkpoints=3)
+            writes = []
+            checkpoint = ledger.checkpoint
+            ledger.checkpoint = lambda: (writes.append(ledger.last_block), checkpoint())
+            ledger.replay(resumed._fetch_transfer_logs, last)
+            assert ledger.checkpoints() == [last - 1001, last - 1, last]
+            assert len(writes) < (last - first) // 1000 // 2, writes
+            assert ledger.stats_at(last - 1)["token_holder_count"] > 0
+            try:
+                ledger.stats_at(writes[0])
+                assert False, "Pruned checkpoint heights must raise"
+            except KeyError:
+                pass
+            parser.rpc.close()
+            resumed.rpc.close()
+        checkpoints = resumed.token_ledger.checkpoints()
+    
+    print(f"✓ Token ledger: {len(expected)} holders, Gini {econ['token_holder_gini']:.3f}, "
+          f"top-10 {econ['top10_concentration']:.1%}")
+    print(f"  {len(checkpoints)} checkpoints; resume replay {replay_elapsed * 1000:.0f}ms, "
+          f"checkpointed stats {stats_elapsed * 1000:.1f}ms "
+          f"({checkpointed['token_holder_count']} holders)")
+
+
+def test_mev_detection():
+    """
+    Benchmark MEV detection on a synthetic day with planted MEV.
+    
+    Success criteria:
+    - Every planted sandwich and arbitrage found, no false positives
+    - mev_extracted_eth equals the planted WETH profit
+    - Same-direction swaps inside the front-run's or back-run's own
+      transaction are not victims
+    - Swap-topic emitters whose token0() reverts (or has no code) are
+      recorded as unresolvable and skipped instead of failing the query
+    - Warm 7200-block window (swap logs cached) in seconds
+    """
+    import os
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import (NO_CODE_POOL, REVERTING_POOL, StubRpcServer,
+                                                   write_swap_log_file)
+    
+    start_block, window = 18_000_000, 7200
+    end_block = start_block + window - 1
+    with tempfile.TemporaryDirectory() as cache_dir:
+        log_path = os.path.join(cache_dir, "swaps.jsonl")
+        planted = write_swap_log_file(log_path, start_block, end_block, non_pool_every=50)
+        with StubRpcServer(logs_path=log_path) as server:
+            parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+            start = time.perf_counter()
+            cold = parser.query_mev_metrics(start_block, end_block)
+            cold_elapsed = time.perf_counter() - start
+            
+            calls_before = server.call_count
+            start = time.perf_counter()
+            warm = parser.query_mev_metrics(start_block, end_block)
+            warm_elapsed = time.perf_counter() - start
+            assert server.call_count == calls_before, "Warm window should not touch RPC"
+            parser.rpc.close()
+            n_swaps = len(parser.swap_logs.read(start_block, end_block)["block"])
+            reloaded = PoolRegistry(cache_dir, "ethereum")
+    
+    assert cold == warm and warm["unresolved_pools"] == 2
+    assert reloaded.unresolvable == {REVERTING_POOL, NO_CODE_POOL} and not reloaded.missing([REVERTING_POOL])
+    assert warm["sandwich_attack_count"] == planted["sandwiches"]
+    assert warm["arbitrage_tx_count"] == planted["arbitrages"]
+    assert abs(warm["mev_extracted_eth"] - planted["profit_eth"]) < 1e-9 * planted["profit_eth"]
+    
+    # (tx, recipient, amount0, amount1) in one pool: front-run, "victim", back-run
+    pool, bot, user = b"\x01" * 20, b"\x0b" * 20, b"\x0c" * 20
+    front, victim, back = (bot, 100.0, -50.0), (user, 10.0, -5.0), (bot, -105.0, 50.0)
+    def sandwiches(rows):
+        swaps = {
+            "block": np.zeros(len(rows), np.int64),
+            "tx_index": np.array([tx for tx, *_ in rows], np.int64),
+            "log_index": np.arange(len(rows)),
+            "pool": np.array([pool] * len(rows), "S20"),
+            "sender": np.array([r for _, r, _, _ in rows], "S20"),
+            "recipient": np.array([r for _, r, _, _ in rows], "S20"),
+            "amount0": np.array([a for *_, a, _ in rows]),
+            "amount1": np.array([b for *_, b in rows]),
+        }
+        return detect_mev(swaps, {"0x" + pool.hex(): ("0xa", "0xb")})["sandwich_attack_count"]
+    assert sandwiches([(0, *front), (1, *victim), (2, *back)]) == 1
+    assert sandwiches([(0, *front), (0, *victim), (2, *back)]) == 0, "Victim in the front-run's tx"
+    assert sandwiches([(0, *front), (2, *victim), (2, *back)]) == 0, "Victim in the back-run's tx"
+    
+    print(f"✓ MEV detection ({window} blocks, {n_swaps:,} swaps):")
+    print(f"  Sandwiches {warm['sandwich_attack_count']}, arbitrage txs {warm['arbitrage_tx_count']}, "
+          f"{warm['mev_extracted_eth']:.2f} ETH ({warm['mev_percent_of_fees']:.3f}% of base fees)")
+    print(f"  Cold (fetch + decode): {cold_elapsed:.1f}s; warm: {warm_elapsed:.2f}s")
+
+
+def test_fee_market_stub():
+    """
+    Test fee percentiles from per-block sketches against exact values.
+    
+    Success criteria:
+    - p50/p95 within the sketch's rank-error bound of the exact percentiles
+    - avg_gas_price, gas_price_cv (stub gasPrice = effective price) and
+      base_fee_cv exact
+    - Warm window, and any sub-window of it, make zero RPC calls
+    - Blocks within the finality margin are refetched: a reorged head
+      replaces their tips and gas prices
+    """
+    import tempfile
+    from blockchain_parsers.header_store import FINALITY_SECONDS
+    from blockchain_parsers.quantiles import normalized_rank_error
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer, SyntheticChain
+    
+    chain = SyntheticChain()
+    start_block, end_block = 18_000_000, 18_001_999
+    with tempfile.TemporaryDirectory() as cache_dir, StubRpcServer(chain) as server:
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+        start = time.perf_counter()
+        cold = parser.query_fee_market(start_block, end_block)
+        cold_elapsed = time.perf_counter() - start
+        
+        calls_before = server.call_count
+        start = time.perf_counter()
+        warm = parser.query_fee_market(start_block, end_block)
+        warm_elapsed = time.perf_counter() - start
+        sub = parser.query_fee_market(start_block + 300, end_block - 700)
+        assert server.call_count == calls_before, "Cached sketches should answer without RPC"
+        parser.rpc.close()
+    
+    # A chain whose last hour of blocks is still provisional, then reorged
+    head, lo = 2000, 1400
+    recent = SyntheticChain(head=head, genesis_time=int(time.time()) - 12 * head)
+    with tempfile.TemporaryDirectory() as cache_dir, StubRpcServer(recent) as server:
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+        before = parser.query_fee_market(lo, head)
+        provisional = parser.fee_sketches.missing(lo, head).tolist()
+        assert provisional == parser.gas_prices.missing(lo, head).tolist()
+        assert abs(len(provisional) - FINALITY_SECONDS // 12) <= 2 and provisional[-1] == head
+        old = {h: len(recent.block(h)["transactions"]) for h in range(lo, head + 1)}
+        recent.tx_per_block = (300, 400)  # Reorg: every unfinalized block is replaced
+        after = parser.query_fee_market(lo, head)
+        parser.rpc.close()
+    assert before["tx_count"] == sum(old.values())
+    assert after["tx_count"] == sum(len(recent.block(h)["transactions"]) if h in provisional else old[h]
+                                    for h in range(lo, head + 1))
+    
+    def exact(lo, hi):
+        blocks = [chain.block(h, full_transactions=True) for h in range(lo, hi + 1)]
+        prices = np.array([int(tx["gasPrice"], 16) for b in blocks for tx in b["transactions"]], np.float64)
+        base_fee = np.array([int(b["baseFeePerGas"], 16) for b in blocks], np.float64)
+        tips = np.sort(np.concatenate([BetaParser._priority_fees(b) for b in blocks]))
+        return tips, prices, base_fee
+    
+    bound = normalized_rank_error(parser.fee_sketches.k)
+    assert cold == warm
+    for result, (lo, hi) in ((warm, (start_block, end_block)),
+                             (sub, (start_block + 300, end_block - 700))):
+        tips, prices, base_fee = exact(lo, hi)
+        assert result["tx_count"] == len(tips)
+        assert abs(result["avg_gas_price"] - prices.mean() / 1e9) < 1e-9 * result["avg_gas_price"]
+        assert abs(result["gas_price_cv"] - prices.std() / prices.mean()) < 1e-9
+        assert abs(result["base_fee_cv"] - base_fee.std() / base_fee.mean()) < 1e-9
+        for q, key in ((0.5, "priority_fee_p50"), (0.95, "priority_fee_p95")):
+            rank = np.searchsorted(tips, result[key] * 1e9, side="right") / len(tips)
+            assert abs(rank - q) <= bound, (key, rank)
+    
+    print(f"✓ Fee market ({end_block - start_block + 1} blocks, {warm['tx_count']:,} txs):")
+    print(f"  p50 {warm['priority_fee_p50']:.3f} gwei, p95 {warm['priority_fee_p95']:.3f} gwei, "
+          f"avg gas price {warm['avg_gas_price']:.2f} gwei (rank error <= {bound:.2%})")
+    print(f"  Gas price CV {warm['gas_price_cv']:.3f}, base-fee CV {warm['base_fee_cv']:.3f}")
+    print(f"  Cold (full blocks): {cold_elapsed:.1f}s; warm: {warm_elapsed * 1000:.0f}ms")
+
+
 def test_cache_effectiveness():
     """
     Test that caching works (don't re-query same blocks).
@@ -504,6 +1926,276 @@ def test_cache_effectiveness():
     assert speedup > 5, "Cache should provide >5x speedup"
 
 
+def test_header_store_warm_run():
+    """
+    Test the persistent header store against a local stub RPC server.
+    
+    Success criteria:
+    - Warm rerun of the same window makes zero RPC requests
+    - Warm rerun is >5x faster (same bar as test_cache_effectiveness)
+    - A fresh parser (new process) reuses the on-disk columns
+    - Results are identical across runs
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer, SyntheticChain
+    
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            StubRpcServer(SyntheticChain(head=23_000_000)) as server:
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+        
+        start1 = time.time()
+        metrics1 = parser.extract_all_metrics("2024-01-01", "2024-01-02")
+        time1 = time.time() - start1
+        cold_requests = server.request_count
+        
+        start2 = time.time()
+        metrics2 = parser.extract_all_metrics("2024-01-01", "2024-01-02")
+        time2 = time.time() - start2
+        assert server.request_count == cold_requests, "Warm run must not touch RPC"
+        parser.rpc.close()
+        
+        # Simulate the next daily run in a new process
+        fresh = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+        metrics3 = fresh.extract_all_metrics("2024-01-01", "2024-01-02")
+        assert server.request_count == cold_requests, "Store must survive between processes"
+        fresh.rpc.close()
+    
+    speedup = time1 / max(time2, 0.001)
+    for m in (metrics2, metrics3):
+        assert (m.avg_block_time, m.throughput_tps, m.block_height) == \
+            (metrics1.avg_block_time, metrics1.throughput_tps, metrics1.block_height)
+    assert abs(metrics1.avg_block_time - 12.0) < 1e-9
+    assert speedup > 5, "Warm store should provide >5x speedup"
+    
+    print(f"✓ Header store:")
+    print(f"  Cold: {time1:.2f}s ({cold_requests} HTTP requests)")
+    print(f"  Warm: {time2 * 1000:.1f}ms (0 HTTP requests), speedup {speedup:.0f}x")
+    print(f"  Window blocks ending at {metrics1.block_height:,}")
+
+
+def test_header_store_finality():
+    """
+    Test that headers near the head are not cached as final.
+
+    Success criteria:
+    - Blocks younger than the finality margin stay in missing() but are readable
+    - Refetching overwrites them (e.g. after a reorg) and aged blocks become final
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import SyntheticChain
+
+    head = 1000
+    chain = SyntheticChain(head=head, genesis_time=int(time.time()) - 12 * head)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = HeaderStore(cache_dir, "ethereum", finality_seconds=600)
+        store.put_blocks(chain.block(h) for h in range(head + 1))
+        # Last 50 blocks (600s at 12s) are provisional
+        assert store.missing(0, head).tolist() == list(range(head - 49, head + 1))
+        assert store.is_final(head - 50) and not store.is_final(head) and store.has(head)
+        assert len(store.read(0, head)["timestamp"]) == head + 1
+
+        # Reorged head block with a different base fee replaces the provisional row
+        reorged = dict(chain.block(head), baseFeePerGas=hex(7))
+        store.put_blocks([reorged])
+        assert store.get(head, "base_fee") == 7
+
+        # Once the margin has passed, the refetch is final and survives reopening
+        HeaderStore(cache_dir, "ethereum", finality_seconds=0).put_blocks(
+            chain.block(h) for h in range(head - 49, head + 1))
+        reopened = HeaderStore(cache_dir, "ethereum")
+        assert len(reopened.missing(0, head)) == 0 and reopened.is_final(head)
+
+    print(f"✓ Header store finality:")
+    print(f"  {head + 1} blocks stored, last 50 provisional until refetched")
+
+def test_timestamp_index():
+    """
+    Test window-boundary resolution through the timestamp index.
+    
+    Success criteria:
+    - Boundaries are exact (first block at or after midnight UTC)
+    - New daily boundaries cost at most 2 RPC probes (vs ~25 for bisection)
+    - Known boundaries resolve locally in microseconds
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer, SyntheticChain
+    
+    # ~0.8% missed slots so the nominal 12s block time is only a seed
+    chain = SyntheticChain(head=23_000_000, missed_per_mille=8)
+    days = ["2024-01-%02d" % d for d in range(1, 31)]
+    
+    with tempfile.TemporaryDirectory() as cache_dir, StubRpcServer(chain) as server:
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+        probes = []
+        for day in days:
+            ts = _iso_to_unix(day)
+            before = parser.block_index.rpc_probes
+            height = parser._block_at_timestamp(ts)
+            probes.append(parser.block_index.rpc_probes - before)
+            assert chain.timestamp(height - 1) < ts <= chain.timestamp(height)
+        parser.rpc.close()
+        
+        start = time.perf_counter()
+        for day in days:
+            parser._block_at_timestamp(_iso_to_unix(day))
+        warm_us = (time.perf_counter() - start) / len(days) * 1e6
+    
+    assert max(probes[1:]) <= 2, "New boundaries should need at most 2 RPC probes"
+    print(f"✓ Timestamp index:")
+    print(f"  Cold start: {probes[0]} probes; next {len(days) - 1} days: "
+          f"{sum(probes[1:]) / (len(days) - 1):.1f} probes/boundary")
+    print(f"  Warm lookup: {warm_us:.1f}µs")
+
+def test_rolling_window():
+    """
+    Test incremental daily checkpoints against full recomputation.
+    
+    Success criteria:
+    - Rolling metrics match query_performance_metrics on the same window
+    - Each daily advance fetches only the new blocks (O(new), not O(window))
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer, SyntheticChain
+    
+    window = 7200
+    first_end = 18_000_000
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            StubRpcServer(SyntheticChain(missed_per_mille=8)) as server:
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir,
+                            window_size=window)
+        parser.update_rolling_window(first_end)
+        
+        for day in range(1, 8):
+            end_block = first_end + day * window
+            calls_before = server.call_count
+            start = time.perf_counter()
+            rolling = parser.update_rolling_window(end_block)
+            elapsed = time.perf_counter() - start
+            new_calls = server.call_count - calls_before
+            
+            # 2 extra calls sample finality (head + finalized)
+            assert new_calls == window + 2, "Daily advance should fetch only new blocks"
+            full = parser.query_performance_metrics(end_block - window + 1, end_block)
+            for key in ("avg_block_time", "throughput_tps", "avg_gas_used", "block_fullness"):
+                assert abs(rolling[key] - full[key]) <= 1e-9 * abs(full[key]), key
+        
+        # Small intra-day step: cost scales with the step, not the window
+        calls_before = server.call_count
+        parser.update_rolling_window(end_block + 300)
+        assert server.call_count - calls_before == 300 + 2
+        parser.rpc.close()
+    
+    print(f"✓ Rolling window: 7 daily advances match full recompute")
+    print(f"  Last advance: {new_calls:,} calls, {elapsed * 1000:.0f}ms; "
+          f"300-block step: 302 calls")
+
+def test_fetch_throughput():
+    """
+    Benchmark the batched fetch engine against a local stub RPC server.
+    
+    Success criteria:
+    - Results identical to sequential single-call fetching
+    - Blocks/sec grows with batch size and concurrency
+    - 7200-block window (1 day) fetches in seconds, not the 45-minute budget
+    """
+    import tempfile
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer
+    
+    n_blocks = 2000
+    start_block = 18_000_000
+    numbers = range(start_block, start_block + n_blocks)
+    
+    # 20ms per request approximates a hosted provider's round trip
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            StubRpcServer(latency=0.02) as server:
+        baseline = BatchRpcClient(server.url, batch_size=1, max_in_flight=1)
+        expected = [baseline.call("eth_getBlockByNumber", [hex(n), False]) for n in numbers[:50]]
+        baseline.close()
+        
+        print(f"✓ Fetch throughput ({n_blocks} blocks, local stub, 20ms RTT):")
+        print(f"  {'batch':>6s} {'in-flight':>10s} {'blocks/s':>10s}")
+        for batch_size in (10, 50, 100):
+            for max_in_flight in (1, 4, 16):
+                rpc = BatchRpcClient(server.url, batch_size=batch_size, max_in_flight=max_in_flight)
+                t0 = time.time()
+                blocks = rpc.fetch_blocks(numbers)
+                elapsed = time.time() - t0
+                rpc.close()
+                
+                assert blocks[:50] == expected, "Batched results must match sequential calls"
+                print(f"  {batch_size:6d} {max_in_flight:10d} {n_blocks / elapsed:10,.0f}")
+        
+        parser = BetaParser("ethereum", rpc_url=server.url, cache_dir=cache_dir)
+        perf = parser.query_performance_metrics(start_block, start_block + 7200)
+        parser.rpc.close()
+    
+    assert abs(perf["avg_block_time"] - 12.0) < 1e-9, "Stub chain has 12s blocks"
+    print(f"  7200-block window: avg block time {perf['avg_block_time']:.1f}s, "
+          f"{perf['throughput_tps']:.1f} TPS")
+
+def test_endpoint_pool():
+    """
+    Test hedged, latency-routed fetching over an endpoint pool.
+    
+    Success criteria:
+    - Identical results to a single healthy endpoint
+    - Dead endpoint ejected by its circuit breaker; slow one mostly avoided
+    - Traffic shifts away when the fastest endpoint degrades mid-run
+    - Pool finishes far faster than the slow endpoint alone
+    """
+    from blockchain_parsers.tests.stub_rpc import StubRpcServer
+    
+    numbers = range(18_000_000, 18_002_000)
+    servers = {
+        "fast": StubRpcServer(latency=0.01),
+        "steady": StubRpcServer(latency=0.03),
+        "flaky": StubRpcServer(latency=0.01, failure_rate=0.3),
+        "slow": StubRpcServer(latency=0.3),
+        "dead": StubRpcServer(failure_rate=1.0),
+    }
+    for server in servers.values():
+        server.start()
+    try:
+        reference = BatchRpcClient(servers["fast"].url, batch_size=10).fetch_blocks(numbers[:100])
+        
+        rpc = BatchRpcClient([s.url for s in servers.values()], batch_size=10, max_in_flight=8)
+        start = time.perf_counter()
+        blocks = rpc.fetch_blocks(numbers)
+        elapsed = time.perf_counter() - start
+        assert blocks[:100] == reference
+        stats = {name: e for name, e in zip(servers, rpc.endpoint_stats())}
+        assert stats["dead"]["state"] != "closed", "Dead endpoint should be ejected"
+        total = sum(e["requests"] for e in stats.values())
+        assert stats["slow"]["requests"] < 0.05 * total, "Slow endpoint should be avoided"
+        
+        # Fastest endpoint degrades: traffic moves to the next best
+        servers["fast"].latency = 0.5
+        before = {name: s["requests"] for name, s in stats.items()}
+        start = time.perf_counter()
+        rpc.fetch_blocks(numbers)
+        degraded_elapsed = time.perf_counter() - start
+        after = {name: s["requests"] - before[name] for name, s in zip(servers, rpc.endpoint_stats())}
+        assert after["steady"] > after["fast"], "Routing should follow live latency"
+        hedges_sent, hedges_won = rpc.hedges_sent, rpc.hedges_won
+        rpc.close()
+        
+        slow_alone = BatchRpcClient(servers["slow"].url, batch_size=10, max_in_flight=8)
+        start = time.perf_counter()
+        slow_alone.fetch_blocks(numbers[:400])
+        slow_elapsed = (time.perf_counter() - start) * len(numbers) / 400
+        slow_alone.close()
+    finally:
+        for server in servers.values():
+            server.stop()
+    
+    assert elapsed < slow_elapsed / 3
+    print(f"✓ Endpoint pool ({len(numbers)} blocks, 5 endpoints):")
+    print(f"  Pool: {elapsed:.2f}s; after fast endpoint degraded: {degraded_elapsed:.2f}s; "
+          f"slow endpoint alone: ~{slow_elapsed:.1f}s")
+    print(f"  Hedges sent {hedges_sent}, won {hedges_won}; "
+          f"requests {before} then {after}")
+
+
 # ============================================================================
 # Main: Run Tests
 # ============================================================================
@@ -531,13 +2223,44 @@ if __name__ == "__main__":
     # test_cache_effectiveness()
     # print()
     
+    test_validator_distribution_stub()  # Works with local stub beacon API
+    print()
+    
+    test_validator_snapshots()  # Works with local stub beacon API
+    print()
+    
+    test_token_ledger_stub()  # Works with local stub RPC server
+    print()
+    
+    test_mev_detection()  # Works with local stub RPC server
+    print()
+    
+    test_fee_market_stub()  # Works with local stub RPC server
+    print()
+    
+    test_header_store_warm_run()  # Works with local stub RPC server
+    print()
+
+    test_header_store_finality()  # Works offline with synthetic blocks
+    print()
+    
+    test_timestamp_index()  # Works with local stub RPC server
+    print()
+    
+    test_rolling_window()  # Works with local stub RPC server
+    print()
+    
+    test_fetch_throughput()  # Works with local stub RPC server
+    print()
+    
+    test_endpoint_pool()  # Works with local stub RPC servers
+    print()
+    
     print("=" * 60)
     print("Next steps:")
     print("1. Configure RPC endpoint (Alchemy/Infura)")
-    print("2. Implement query_validator_distribution()")
-    print("3. Implement query_performance_metrics()")
-    print("4. Implement query_token_economics()")
-    print("5. Implement caching layer")
-    print("6. Uncomment and run all tests")
+    print("2. Extend query_validator_distribution() beyond Ethereum")
+    print("3. Add treasury balance and supply inflation to query_token_economics()")
+    print("4. Uncomment and run all tests")
     print()
     print("Target: All tests passing by end of Month 3")
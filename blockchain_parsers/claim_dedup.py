@@ -0,0 +1,460 @@
+"""
+blockchain_parsers/claim_dedup.py — Near-Duplicate Claim Detection
+
+Deduplication stage for TSC α-axis claim extraction. Claims are normalized
+to word unigrams and bigrams, each shingle set is reduced to a MinHash
+signature, and locality-sensitive hashing over signature bands yields
+candidate pairs in near-linear time. Candidates are confirmed with exact
+sparse TF-IDF cosine similarity (and must state the same numbers), and
+each group of confirmed duplicates keeps its highest-priority source
+(spec > governance > whitepaper).
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import re
+
+import numpy as np
+
+from .retention import hash64
+
+
+_U64 = np.uint64
+
+# Lower value wins when duplicates are merged
+SOURCE_PRIORITY: Dict[str, int] = {"spec": 0, "governance": 1, "whitepaper": 2}
+
+COSINE_THRESHOLD = 0.8
+MINHASH_BANDS = 32  # Signature = BANDS × ROWS MinHash values
+MINHASH_ROWS = 2  # Candidate probability 1 - (1 - J^2)^32: 95% at Jaccard 0.3, 99.99% at 0.5
+MAX_BUCKET = 64  # Larger LSH buckets pair members with the bucket's first claim only
+PAIR_CHUNK = 1 << 20  # Candidate pairs per cosine batch
+
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|[a-z]+|%")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3})")
+
+# Modal and filler words carry no claim identity ("Block time SHALL be 12
+# seconds" and "Block time is 12 seconds" state the same claim)
+STOPWORDS = frozenset(
+    "a an the is are was be been being will shall must should may can could would "
+    "required recommended of to in on for at by with and or as it its this that "
+    "these than per from into each every not no".split()
+)
+
+UNIT_ALIASES = {
+    "s": "second", "sec": "second", "secs": "second",
+    "ms": "millisecond", "msec": "millisecond",
+    "min": "minute", "mins": "minute",
+    "h": "hour", "hr": "hour", "hrs": "hour",
+    "%": "percent", "pct": "percent",
+    "tx": "transaction", "txs": "transaction", "tps": "transaction second",
+    "kb": "kilobyte", "mb": "megabyte", "gb": "gigabyte",
+}
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Claim text → identity tokens: lowercased words and numbers, stopwords
+    dropped, unit aliases expanded, plural "s" stripped, numbers in a
+    canonical form ("12.0" → "12", "30,000,000" → "30000000").
+    """
+    tokens = []
+    for token in _TOKEN.findall(_THOUSANDS.sub("", text.lower())):
+        if token[0].isdigit():
+            tokens.append("%g" % float(token) if len(token) < 16 else token)
+            continue
+        if token in STOPWORDS:
+            continue
+        if token in UNIT_ALIASES:
+            tokens.extend(UNIT_ALIASES[token].split())
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+@dataclass
+class ClaimFeatures:
+    """
+    Sparse shingle matrix of a claim corpus (CSR): row i holds the
+    distinct unigram/bigram ids of claim i and their L2-normalized TF-IDF
+    weights. `numbers` is an order-independent hash of each claim's
+    numeric tokens.
+    """
+    indptr: np.ndarray  # int64, len = claims + 1
+    indices: np.ndarray  # int64 feature ids, sorted within a row
+    weights: np.ndarray  # float64
+    numbers: np.ndarray  # uint64
+    n_features: int
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+
+def _distinct(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted distinct int64 keys and their multiplicities."""
+    keys = np.sort(keys)
+    first = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.zeros(0, np.intp)
+    return keys[first], np.diff(np.append(first, len(keys))).astype(np.float64)
+
+
+def claim_features(texts: Sequence[str]) -> ClaimFeatures:
+    """Tokenize, shingle and TF-IDF-weight a corpus of claim texts."""
+    vocab: Dict[str, int] = {}
+    numbers_vocab: Dict[str, int] = {}
+    rows: List[int] = []
+    ids: List[int] = []
+    number_rows: List[int] = []
+    number_ids: List[int] = []
+    for row, text in enumerate(texts):
+        tokens = normalize_tokens(text)
+        shingles = tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+        ids.extend([vocab.setdefault(shingle, len(vocab)) for shingle in shingles])
+        rows.extend([row] * len(shingles))
+        digits = [numbers_vocab.setdefault(t, len(numbers_vocab)) for t in tokens if t[0].isdigit()]
+        number_ids.extend(digits)
+        number_rows.extend([row] * len(digits))
+
+    # Number-set hash: wrapping sum of the distinct numbers' hashes per row
+    numbers = np.zeros(len(texts), dtype=np.uint64)
+    keys, _ = _distinct(np.array(number_rows, dtype=np.int64) << 32 | np.array(number_ids, dtype=np.int64))
+    if len(keys):
+        number_row = keys >> 32
+        starts = np.flatnonzero(np.concatenate([[True], number_row[1:] != number_row[:-1]]))
+        with np.errstate(over="ignore"):
+            numbers[number_row[starts]] = np.add.reduceat(hash64((keys & 0xFFFFFFFF).astype(np.uint64) + _U64(1)),
+                                                          starts)
+
+    # Distinct (row, feature) entries with term counts
+    keys, counts = _distinct(np.array(rows, dtype=np.int64) << 32 | np.array(ids, dtype=np.int64))
+    row_of, indices = keys >> 32, keys & 0xFFFFFFFF
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(row_of, minlength=len(texts)))]).astype(np.int64)
+
+    df = np.bincount(indices, minlength=len(vocab))
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+    weights = counts * idf[indices]
+    norms = np.sqrt(np.bincount(row_of, weights * weights, minlength=len(texts)))
+    weights /= norms[row_of]
+    return ClaimFeatures(indptr, indices, weights, numbers, len(vocab))
+
+
+def minhash_signatures(features: ClaimFeatures, num_perm: int, seed: int = 0) -> np.ndarray:
+    """
+    (claims × num_perm) uint64 MinHash signatures of the shingle sets.
+    Claims without shingles get all-ones rows (never bucketed).
+    """
+    n = len(features)
+    signatures = np.full((n, num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    nonempty = np.flatnonzero(np.diff(features.indptr) > 0)
+    if len(nonempty) == 0:
+        return signatures
+    starts = features.indptr[nonempty]
+    feature_keys = hash64(np.arange(features.n_features, dtype=np.uint64) + _U64(seed << 32))
+    perm_seeds = hash64(np.arange(num_perm, dtype=np.uint64) + _U64(0xA5A5A5A5))
+    for j in range(num_perm):
+        # Hash each distinct feature once per permutation, then gather per row
+        table = hash64(feature_keys ^ perm_seeds[j])
+        signatures[nonempty, j] = np.minimum.reduceat(table[features.indices], starts)
+    return signatures
+
+
+def _bucket_pairs(keys: np.ndarray, max_bucket: int) -> np.ndarray:
+    """
+    (i, j) claim pairs with i < j sharing a key: every pair in buckets of
+    up to max_bucket claims, each member with the first claim in larger ones.
+    """
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    bounds = np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1], [True]]))
+    sizes = np.diff(bounds)
+    starts = bounds[:-1]
+    pairs = []
+
+    small = (sizes > 1) & (sizes <= max_bucket)
+    if small.any():
+        # For each member at position p of a bucket ending at e: partners p+1 .. e-1
+        members = _bucket_members(starts[small], sizes[small])
+        ends = np.repeat(starts[small] + sizes[small], sizes[small])
+        partners = ends - members - 1
+        left = np.repeat(members, partners)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(partners) - partners, partners)
+        pairs.append(np.stack([order[left], order[left + 1 + offsets]], axis=1))
+
+    large = sizes > max_bucket
+    if large.any():
+        members = _bucket_members(starts[large], sizes[large])
+        leaders = np.repeat(starts[large], sizes[large])
+        keep = members != leaders
+        pairs.append(np.stack([order[leaders[keep]], order[members[keep]]], axis=1))
+
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs).astype(np.int64)
+    return np.sort(pairs, axis=1)
+
+
+def _bucket_members(starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Sorted positions of every member of the given buckets."""
+    return np.repeat(starts, sizes) + np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int, rows: int, max_bucket: int = MAX_BUCKET) -> np.ndarray:
+    """
+    Distinct candidate pairs (i < j) agreeing on all `rows` MinHash values
+    of at least one band, as an (m, 2) int64 array sorted by (i, j).
+    """
+    n = len(signatures)
+    found = []
+    for band in range(bands):
+        block = signatures[:, band * rows:(band + 1) * rows]
+        key = hash64(block[:, 0] ^ _U64(band))
+        for r in range(1, rows):
+            key = hash64(key ^ block[:, r])
+        empty = block[:, 0] == np.iinfo(np.uint64).max
+        key[empty] = hash64(np.flatnonzero(empty).astype(np.uint64) ^ _U64(0xE))  # Unique keys
+        pairs = _bucket_pairs(key, max_bucket)
+        found.append(pairs[:, 0] * n + pairs[:, 1])
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    codes = np.sort(np.concatenate(found))
+    codes = codes[np.concatenate([[True], codes[1:] != codes[:-1]])] if len(codes) else codes
+    return np.stack([codes // n, codes % n], axis=1)
+
+
+def pair_cosines(features: ClaimFeatures, pairs: np.ndarray) -> np.ndarray:
+    """Exact cosine similarity of each (i, j) pair of TF-IDF rows."""
+    result = np.zeros(len(pairs))
+    indptr, indices, weights = features.indptr, features.indices, features.weights
+    for lo in range(0, len(pairs), PAIR_CHUNK):
+        chunk = pairs[lo:lo + PAIR_CHUNK]
+        sides = []
+        for side in (0, 1):
+            row = chunk[:, side]
+            lengths = indptr[row + 1] - indptr[row]
+            owner = np.repeat(np.arange(len(chunk)), lengths)
+            entry = np.repeat(indptr[row] - (np.cumsum(lengths) - lengths), lengths) + np.arange(int(lengths.sum()))
+            sides.append((owner * features.n_features + indices[entry], weights[entry]))
+        keys = np.concatenate([sides[0][0], sides[1][0]])
+        values = np.concatenate([sides[0][1], sides[1][1]])
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        # Features are distinct within a row, so equal neighbours are one from each side
+        match = np.flatnonzero(keys[1:] == keys[:-1])
+        result[lo:lo + len(chunk)] = np.bincount(keys[match] // features.n_features,
+                                                 values[match] * values[match + 1], minlength=len(chunk))
+    return result
+
+
+def connected_components(n: int, edges: np.ndarray) -> np.ndarray:
+    """Component label (smallest member index) of each of n nodes."""
+    labels = np.arange(n)
+    if len(edges) == 0:
+        return labels
+    a, b = edges[:, 0], edges[:, 1]
+    while True:
+        previous = labels.copy()
+        low = np.minimum(labels[a], labels[b])
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        labels = labels[labels]  # Pointer jumping
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def match_keys(features: ClaimFeatures, scopes: Optional[Sequence[Any]] = None) -> np.ndarray:
+    """Per-claim key that two claims must share to be duplicates: numbers, plus scope if given."""
+    if scopes is None:
+        return features.numbers
+    scope_ids: Dict[Any, int] = {}
+    ids = np.array([scope_ids.setdefault(s, len(scope_ids)) for s in scopes], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        return features.numbers + hash64(ids ^ _U64(0x5C0E))
+
+
+@dataclass
+class DedupResult:
+    """
+    Outcome of deduplicate(): every claim maps to the claim kept for its
+    duplicate group (itself if unique).
+    """
+    representative: np.ndarray  # int64 index of the kept claim
+    candidate_pairs: int  # LSH candidates
+    compared_pairs: int  # Candidates with matching numbers and scope (cosine computed)
+    confirmed_pairs: int  # Cosine >= threshold
+
+    @property
+    def keep(self) -> np.ndarray:
+        return self.representative == np.arange(len(self.representative))
+
+
+def deduplicate(
+    texts: Sequence[str],
+    priorities: Sequence[int],
+    scopes: Optional[Sequence[Any]] = None,
+    threshold: float = COSINE_THRESHOLD,
+    bands: int = MINHASH_BANDS,
+    rows: int = MINHASH_ROWS,
+    seed: int = 0
+) -> DedupResult:
+    """
+    Group near-duplicate claims and pick one claim per group.
+
+    Args:
+        texts: claim texts
+        priorities: per-claim source priority, lower wins (SOURCE_PRIORITY)
+        scopes: optional per-claim scope (e.g. chain id); claims in
+            different scopes are never merged
+        threshold: TF-IDF cosine at or above which a pair is a duplicate
+        bands, rows: LSH banding of the MinHash signature
+        seed: MinHash seed (results are deterministic for a given seed)
+
+    Returns:
+        DedupResult; each group (connected by confirmed pairs) is
+        represented by its lowest-priority-value claim, ties broken by
+        input order.
+
+    Pairs are confirmed only when both claims state the same set of
+    numbers, so "block time is 12 seconds" never absorbs "block time is 6
+    seconds" however similar the wording. Recall is bounded by LSH: a pair
+    with shingle Jaccard J is proposed with probability
+    1 - (1 - J^rows)^bands, which with the default 32×2 banding is about 95%
+    at J = 0.3, 73% at 0.2 and 27% at 0.1, so mostly pairs sharing only a
+    few shingles are missed.
+    """
+    n = len(texts)
+    priorities = np.asarray(priorities, dtype=np.int64)
+    features = claim_features(texts)
+    candidates = lsh_candidates(minhash_signatures(features, bands * rows, seed), bands, rows)
+    anchors = match_keys(features, scopes)
+    compared = candidates[anchors[candidates[:, 0]] == anchors[candidates[:, 1]]]
+    edges = compared[pair_cosines(features, compared) >= threshold - 1e-12]
+
+    labels = connected_components(n, edges)
+    rank = priorities * n + np.arange(n)
+    best = np.full(n, np.iinfo(np.int64).max)
+    np.minimum.at(best, labels, rank)
+    return DedupResult(best[labels] % n, len(candidates), len(compared), len(edges))
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+PROPERTIES = [
+    ("block time", "seconds", "s"), ("slot time", "seconds", "s"), ("finality time", "minutes", "min"),
+    ("epoch length", "slots", "slots"), ("block gas limit", "gas", "gas"), ("maximum block size", "bytes", "bytes"),
+    ("validator minimum stake", "ETH", "ETH"), ("governance quorum", "percent", "%"),
+    ("annual issuance rate", "percent", "%"), ("base fee change per block", "percent", "%"),
+    ("unbonding period", "days", "days"), ("proposal voting period", "days", "days"),
+    ("maximum throughput", "transactions per second", "tps"), ("checkpoint interval", "blocks", "blocks"),
+    ("difficulty adjustment interval", "blocks", "blocks"), ("mempool expiry", "hours", "h"),
+    ("slashing penalty", "percent", "%"), ("validator churn limit", "validators", "validators"),
+    ("target block fullness", "percent", "%"), ("maximum supply", "tokens", "tokens"),
+]
+CHAINS = ["ethereum", "bitcoin", "solana", "cosmos", "polkadot", "avalanche", "cardano", "near"]
+TEMPLATES = [
+    "On {chain}, the {prop} SHALL be {value} {unit}.",
+    "The {chain} {prop} is {value} {unit}.",
+    "{chain} target {prop}: {value}{short}",
+    "The {chain} protocol MUST keep the {prop} at {value} {unit}.",
+    "{chain}: {prop} of {value} {unit} is required.",
+    "For {chain} the {prop} will be {value} {unit}.",
+]
+
+
+def synthetic_claims(n_claims: int, seed: int = 0) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Claim sentences with known identity: (texts, source priority, chain,
+    group key) where texts with equal keys state the same (chain,
+    property, value).
+    About 40% of sentences restate an earlier claim in another wording.
+    """
+    rng = np.random.default_rng(seed)
+    n_distinct = int(n_claims * 0.6)
+    chain = rng.integers(0, len(CHAINS), n_distinct)
+    prop = rng.integers(0, len(PROPERTIES), n_distinct)
+    value = rng.integers(1, 5000, n_distinct)
+    group = np.concatenate([np.arange(n_distinct), rng.integers(0, n_distinct, n_claims - n_distinct)])
+    rng.shuffle(group)
+    # Identity = (chain, property, value): collapse colliding draws
+    identity = (chain * len(PROPERTIES) + prop) * 5000 + value
+    template = rng.integers(0, len(TEMPLATES), n_claims)
+    priorities = rng.integers(0, len(SOURCE_PRIORITY), n_claims)
+    texts = []
+    for g, t in zip(group.tolist(), template.tolist()):
+        name, unit, short = PROPERTIES[prop[g]]
+        texts.append(TEMPLATES[t].format(chain=CHAINS[chain[g]].capitalize(), prop=name, value=value[g],
+                                         unit=unit, short=short))
+    return texts, priorities, chain[group], identity[group]
+
+
+def test_minhash_lsh_dedup():
+    """
+    Deduplicate a synthetic corpus of 120k claim sentences.
+
+    Success criteria:
+    - Precision >= 98%: merged claims state the same (chain, property,
+      value); the misses are one-word property swaps with the same chain
+      and number ("slot time" vs "block time: 1092s"), beyond lexical
+      similarity
+    - LSH recall >= 99% of all duplicate pairs (cosine >= threshold, same
+      numbers and chain), enumerated exhaustively
+    - Source priority: every representative outranks or ties its members
+    - Near-linear: candidate pairs within a small multiple of the corpus
+    """
+    import time
+
+    texts, priorities, chains, identity = synthetic_claims(120_000)
+    start = time.perf_counter()
+    result = deduplicate(texts, priorities, scopes=chains.tolist())
+    elapsed = time.perf_counter() - start
+    rep = result.representative
+    merged = ~result.keep
+
+    precision = float((identity[rep[merged]] == identity[merged]).mean())
+    assert precision >= 0.98, precision
+    assert (priorities[rep] <= priorities).all()
+    distinct = len(np.unique(identity))
+    assert abs(int(result.keep.sum()) - distinct) < 0.1 * distinct
+
+    # Exhaustive check: only pairs sharing numbers and chain can be
+    # confirmed, so enumerate all of them and compare with the LSH candidates
+    features = claim_features(texts)
+    eligible = _bucket_pairs(match_keys(features, chains.tolist()), max_bucket=len(texts))
+    truth = eligible[pair_cosines(features, eligible) >= COSINE_THRESHOLD - 1e-12]
+    found = lsh_candidates(minhash_signatures(features, MINHASH_BANDS * MINHASH_ROWS),
+                           MINHASH_BANDS, MINHASH_ROWS)
+    codes = found[:, 0] * len(texts) + found[:, 1]
+    recall = float(np.isin(truth[:, 0] * len(texts) + truth[:, 1], codes).mean())
+    assert recall >= 0.99, recall
+    assert result.candidate_pairs < 50 * len(texts)
+
+    identical = deduplicate(["Block time SHALL be 12 seconds.", "The block time is 12s",
+                             "Block time is 6 seconds.", "The network is highly secure."], [2, 0, 0, 1])
+    assert identical.representative.tolist() == [1, 1, 2, 3]
+
+    print(f"✓ MinHash-LSH claim dedup ({len(texts):,} claims, {MINHASH_BANDS}×{MINHASH_ROWS} bands):")
+    print(f"  {result.candidate_pairs:,} LSH candidates ({result.candidate_pairs / len(texts):.1f}/claim), "
+          f"{result.compared_pairs:,} compared, {result.confirmed_pairs:,} confirmed")
+    print(f"  Kept {int(result.keep.sum()):,} of {len(texts):,} ({distinct:,} distinct claims); "
+          f"precision {precision:.2%}, LSH recall {recall:.2%} of {len(truth):,} duplicate pairs")
+    print(f"  {elapsed:.1f}s ({len(texts) / elapsed:,.0f} claims/s; exhaustive pairs would be "
+          f"{len(texts) * (len(texts) - 1) // 2:,})")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Claim Deduplication Test Suite")
+    print("=" * 60)
+    print()
+
+    test_minhash_lsh_dedup()
+    print()
@@ -0,0 +1,329 @@
+"""
+blockchain_parsers/claim_extraction.py — Single-Pass Claim Extraction Engine
+
+Shared sentence-level extractor for TSC α-axis parsers (specs, whitepapers,
+governance proposals): RFC 2119 keywords, "target" phrasing, numbers and
+the unit vocabulary are compiled into one regular expression together with
+sentence boundaries, and each document is scanned once. Matches stream
+through a small sentence state machine that emits claim spans with their
+keyword, value and unit attached, ready to become ProtocolClaim objects.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Iterator, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import re
+
+
+# RFC 2119 keywords (uppercase, as the RFC requires) → canonical keyword.
+# Only CLAIM_KEYWORDS open a claim; the rest are recognized so that
+# "MUST NOT" is never read as "MUST".
+RFC2119_KEYWORDS = {
+    "MUST NOT": "MUST NOT", "SHALL NOT": "SHALL NOT", "SHOULD NOT": "SHOULD NOT",
+    "NOT RECOMMENDED": "NOT RECOMMENDED", "MUST": "MUST", "SHALL": "SHALL", "REQUIRED": "REQUIRED",
+    "SHOULD": "SHOULD", "RECOMMENDED": "RECOMMENDED", "MAY": "MAY", "OPTIONAL": "OPTIONAL",
+}
+# Prose phrasing of numeric targets (first letter either case)
+TARGET_WORDS = ("targets", "targeted", "target")
+CLAIM_KEYWORDS = frozenset({"MUST", "MUST NOT", "SHALL", "SHALL NOT", "REQUIRED", "TARGET"})
+
+# Unit spelling → canonical unit
+UNITS: Dict[str, str] = {
+    **{u: "seconds" for u in ("s", "sec", "secs", "second", "seconds")},
+    **{u: "milliseconds" for u in ("ms", "millisecond", "milliseconds")},
+    **{u: "minutes" for u in ("min", "mins", "minute", "minutes")},
+    **{u: "hours" for u in ("h", "hr", "hrs", "hour", "hours")},
+    **{u: "days" for u in ("day", "days")},
+    **{u: "percent" for u in ("%", "percent", "pct")},
+    **{u: "gas" for u in ("gas",)},
+    **{u: "gwei" for u in ("gwei", "Gwei")},
+    **{u: "wei" for u in ("wei",)},
+    **{u: "ETH" for u in ("ETH", "ether")},
+    **{u: "BTC" for u in ("BTC", "bitcoin", "bitcoins")},
+    **{u: "bytes" for u in ("byte", "bytes")},
+    **{u: "kilobytes" for u in ("KB", "kB", "KiB", "kilobytes")},
+    **{u: "megabytes" for u in ("MB", "MiB", "megabytes")},
+    **{u: "blocks" for u in ("block", "blocks")},
+    **{u: "slots" for u in ("slot", "slots")},
+    **{u: "epochs" for u in ("epoch", "epochs")},
+    **{u: "validators" for u in ("validator", "validators")},
+    **{u: "blobs" for u in ("blob", "blobs")},
+    **{u: "transactions" for u in ("tx", "txs", "transaction", "transactions")},
+    **{u: "transactions per second" for u in ("tps", "TPS", "transactions per second")},
+    **{u: "confirmations" for u in ("confirmation", "confirmations")},
+}
+MULTIPLIERS = {"k": 1e3, "K": 1e3, "thousand": 1e3, "M": 1e6, "million": 1e6, "billion": 1e9}
+
+
+def _alternation(words: Sequence[str]) -> str:
+    """Longest-first alternation, so "MUST NOT" wins over "MUST"."""
+    return "|".join(re.escape(w).replace(r"\ ", r"\s+") for w in sorted(words, key=len, reverse=True))
+
+
+def _word_branches(words: Sequence[str], marker: str) -> List[Tuple[str, str, str]]:
+    """(first character class, guard, rest) per word, longest first."""
+    branches = []
+    for i, word in enumerate(sorted(words, key=len, reverse=True)):
+        first = "[%s%s]" % (word[0].upper(), word[0].lower()) if word[0].islower() else re.escape(word[0])
+        rest = re.escape(word[1:]).replace(r"\ ", r"\s+")
+        # Group names must be unique: "kw", "kw_1", ...
+        branches.append((first, r"(?<!\w.)", r"%s\b(?P<%s>)" % (rest, marker + ("_%d" % i if i else ""))))
+    return branches
+
+
+def compile_pattern(units: Dict[str, str] = UNITS) -> "re.Pattern":
+    """
+    The engine's single pattern. Every token class opens with one character
+    from a small set, so the pattern starts by consuming that character
+    class — letting sre's C-level charset search skip plain prose — and
+    dispatches on the consumed character with one lookbehind per distinct
+    first character. Branches end in an empty named group that tells the
+    scanner which token class matched (match.lastgroup); a match starts at
+    its token.
+    """
+    number = (r"(?:\d{0,2}(?:,\d{3})+(?:\.\d+)?|\d*(?:\.\d+)?)(?![\w.]\d)(?P<num>)"
+              r"(?:\s?(?P<mult>%s)(?![A-Za-z]))?"
+              r"(?:\s?(?P<unit>%s)(?![A-Za-z]))?" % (_alternation(MULTIPLIERS), _alternation(units)))
+    branches = _word_branches(list(RFC2119_KEYWORDS), "kw") + _word_branches(TARGET_WORDS, "target") + [
+        (r"\d", r"(?<![\w.\-].)", number),
+        (r"[.!?]", "", r"(?=\s|$)(?P<brk>)"),
+        (r"\n", "", r"(?:[ \t]*\n|(?=[ \t]*(?:[-*+]\s|\d+\.\s|#|\|)))(?P<brk_1>)"),
+    ]
+    grouped: Dict[Tuple[str, str], List[str]] = {}
+    for first, guard, rest in branches:
+        grouped.setdefault((first, guard), []).append(rest)
+    firsts = "".join(first.strip("[]") for first, _ in grouped)
+    dispatch = "|".join("(?<=%s)%s(?:%s)" % (first, guard, "|".join(rests)) for (first, guard), rests in grouped.items())
+    return re.compile("[%s](?:%s)" % (firsts, dispatch))
+
+
+@dataclass
+class ClaimSpan:
+    """
+    A claim-bearing sentence: character span in the document, the claim
+    keyword, and its numeric value and unit (the first number carrying a
+    known unit, else the first number; None if the sentence has none).
+    """
+    start: int
+    end: int
+    text: str
+    keyword: str  # Canonical: "MUST", "MUST NOT", "SHALL", "REQUIRED", "TARGET", ...
+    value: Optional[float] = None
+    unit: Optional[str] = None
+
+    @property
+    def measurable(self) -> bool:
+        return self.value is not None
+
+
+class ClaimExtractor:
+    """
+    Compiled single-pass extractor.
+
+    Usage:
+        extractor = ClaimExtractor()
+        for span in extractor.extract(markdown):
+            claim = ProtocolClaim(..., claim_text=span.text, expected_value=span.value, unit=span.unit)
+    """
+
+    def __init__(self, keywords: frozenset = CLAIM_KEYWORDS, units: Dict[str, str] = UNITS):
+        self.keywords = keywords
+        self.units = {_squash(u): canonical for u, canonical in units.items()}
+        self.pattern = compile_pattern(units)
+        # Marker group → token class ("kw_3" → "kw"; mult/unit close a number)
+        self.kinds = {name: name.split("_")[0] for name in self.pattern.groupindex}
+        self.kinds.update(mult="num", unit="num")
+
+    def extract(self, text: str) -> List[ClaimSpan]:
+        return list(self.iter_spans(text))
+
+    def iter_spans(self, text: str) -> Iterator[ClaimSpan]:
+        """Claim spans of `text` in document order (one scan)."""
+        start = 0
+        keyword = None
+        value = unit = None
+        has_unit = False
+        kinds = self.kinds
+        for match in self.pattern.finditer(text):
+            kind = kinds[match.lastgroup]
+            if kind == "brk":
+                end = match.end()
+                if keyword is not None:
+                    yield self._span(text, start, end, keyword, value, unit)
+                start, keyword, value, unit, has_unit = end, None, None, None, False
+            elif kind == "num":
+                if has_unit:
+                    continue
+                number = float(text[match.start():match.start("num")].replace(",", ""))
+                number *= MULTIPLIERS.get(match.group("mult"), 1.0)
+                if match.group("unit"):
+                    value, unit, has_unit = number, self._unit(match.group("unit")), True
+                elif value is None:
+                    value = number
+            elif keyword is None:
+                word = "TARGET" if kind == "target" else RFC2119_KEYWORDS.get(match.group()) or RFC2119_KEYWORDS[_squash(match.group())]
+                if word in self.keywords:
+                    keyword = word
+        if keyword is not None:
+            yield self._span(text, start, len(text), keyword, value, unit)
+
+    def _unit(self, spelling: str) -> str:
+        return self.units.get(spelling) or self.units[_squash(spelling)]
+
+    @staticmethod
+    def _span(text: str, start: int, end: int, keyword: str, value: Optional[float], unit: Optional[str]) -> ClaimSpan:
+        # Trim surrounding whitespace and markdown list/heading markers
+        raw = text[start:end]
+        stripped = raw.lstrip()
+        stripped = stripped.lstrip("-*+#> |").lstrip()
+        offset = start + len(raw) - len(stripped)
+        stripped = stripped.rstrip()
+        return ClaimSpan(offset, offset + len(stripped), " ".join(stripped.split()), keyword, value, unit)
+
+
+def _squash(word: str) -> str:
+    """Collapse internal whitespace (multi-word keywords/units may span line breaks)."""
+    return " ".join(word.split())
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+def _naive_extract(text: str, units: Dict[str, str] = UNITS) -> List[Tuple[str, str, Optional[float], Optional[str]]]:
+    """
+    Reference: split sentences, then one regex search per keyword, then a
+    number and a unit search per sentence (the multi-pass approach the
+    engine replaces). Returns (text, keyword, value, unit) tuples.
+    """
+    breaks = re.compile(r"(?<=[.!?])(?=\s|$)|\n[ \t]*\n|\n(?=[ \t]*(?:[-*+]\s|\d+\.\s|#|\|))")
+    keyword_patterns = [(canonical, re.compile(r"\b%s\b" % re.escape(word).replace(r"\ ", r"\s+")))
+                        for word, canonical in sorted(RFC2119_KEYWORDS.items(), key=lambda kv: -len(kv[0]))]
+    target = re.compile(r"\b[Tt](?:argets|argeted|arget)\b")
+    number = re.compile(r"(?<![\w.\-])(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)(?![\w.]\d)"
+                        r"(?:\s?(%s)(?![A-Za-z]))?" % _alternation(MULTIPLIERS))
+    unit_after = re.compile(r"\s?(%s)(?![A-Za-z])" % _alternation(units))
+    squashed = {_squash(u): c for u, c in units.items()}
+    results = []
+    for sentence in breaks.split(text):
+        # Earliest keyword of any kind; it opens a claim if it is a claim keyword
+        found = [(m.start(), -len(m.group(0)), canonical) for canonical, p in keyword_patterns
+                 for m in [p.search(sentence)] if m]
+        t = target.search(sentence)
+        if t:
+            found.append((t.start(), -len(t.group(0)), "TARGET"))
+        # "MUST NOT" and "MUST" start at the same offset: longest first, and a
+        # "NOT" that belongs to "MUST NOT" is not a keyword of its own
+        found.sort()
+        found = [f for f in found if not (f[2] == "NOT RECOMMENDED" and
+                                          re.search(r"\b(MUST|SHALL|SHOULD)\s+NOT\s+RECOMMENDED", sentence))]
+        keyword = next((k for _, _, k in found if k in CLAIM_KEYWORDS), None)
+        if keyword is None:
+            continue
+        value = unit = None
+        for m in number.finditer(sentence):
+            v = float(m.group(1).replace(",", "")) * MULTIPLIERS.get(m.group(2), 1.0)
+            u = unit_after.match(sentence, m.end())
+            if u:
+                value, unit = v, squashed[_squash(u.group(1))]
+                break
+            if value is None:
+                value = v
+        stripped = sentence.strip().lstrip("-*+#> |").strip()
+        results.append((" ".join(stripped.split()), keyword, value, unit))
+    return results
+
+
+def synthetic_markdown(n_docs: int, seed: int = 0) -> List[str]:
+    """EIP-like markdown documents: front matter, prose, lists, tables, code."""
+    import random
+
+    rng = random.Random(seed)
+    subjects = ["The base fee", "Block gas limit", "Each validator", "The blob count", "Slot duration",
+                "Finality", "The client", "Implementations", "The proposer", "Quorum"]
+    claims = ["{s} MUST be {v} {u}.", "{s} SHALL NOT exceed {v} {u}.", "{s} is REQUIRED to stay below {v}{u}.",
+              "The protocol targets {v} {u} for {s}.", "{s} SHOULD be about {v} {u}.", "{s} MAY log {v} entries.",
+              "{s} MUST reject invalid payloads.", "Clients MUST NOT accept more than {v} {u} per block."]
+    filler = ["This section is informative.", "See the rationale below for details.",
+              "Earlier drafts used a different encoding (see EIP-{n}).", "Version 1.2.3 introduced this field."]
+    units = ["seconds", "gas", "%", "blobs", "slots", "epochs", "ETH", "gwei", "bytes", "validators", "M gas", "ms"]
+    docs = []
+    for i in range(n_docs):
+        parts = ["---\neip: %d\ntitle: Proposal %d\nstatus: Final\ncreated: 2021-0%d-1%d\n---\n\n## Abstract\n\n"
+                 % (i, i, 1 + i % 9, i % 10)]
+        for _ in range(rng.randrange(20, 60)):
+            kind = rng.random()
+            line = rng.choice(claims).format(s=rng.choice(subjects), v=rng.choice(
+                [str(rng.randrange(1, 100)), "%d,%03d,%03d" % (rng.randrange(1, 99), rng.randrange(1000),
+                                                             rng.randrange(1000)), "12.5"]), u=rng.choice(units))
+            if kind < 0.25:
+                parts.append("- %s\n" % line)
+            elif kind < 0.35:
+                parts.append("| `PARAM_%d` | %d |\n" % (rng.randrange(100), rng.randrange(10 ** 6)))
+            elif kind < 0.42:
+                parts.append("```python\nMAX = %d  # MUST match the spec\n```\n\n" % rng.randrange(1000))
+            else:
+                parts.append("%s %s %s\n\n" % (rng.choice(filler).format(n=rng.randrange(9999)), line,
+                                               rng.choice(filler).format(n=rng.randrange(9999))))
+        docs.append("".join(parts))
+    return docs
+
+
+def test_extraction_throughput():
+    """
+    Extract claims from a synthetic EIP-style markdown corpus.
+
+    Success criteria:
+    - Identical spans (text, keyword, value, unit) to the multi-pass
+      reference extractor
+    - Known sentences: "MUST NOT" not read as MUST, decimals and thousands
+      separators kept, "30M gas" scaled, EIP numbers and versions ignored
+    - Throughput reported in MB/s, faster than the multi-pass reference
+    """
+    import time
+
+    extractor = ClaimExtractor()
+    sample = ("Blocks MUST NOT contain more than 6 blobs. The gas target is 15M gas and "
+              "the limit MUST be 30,000,000 gas. See EIP-1559 (v1.2.3); base fee MUST change by "
+              "at most 12.5% per block.\n- Clients SHOULD log 3 errors.\n- Slots MUST last 12s")
+    spans = extractor.extract(sample)
+    assert [(s.keyword, s.value, s.unit) for s in spans] == [
+        ("MUST NOT", 6.0, "blobs"), ("TARGET", 15e6, "gas"), ("MUST", 12.5, "percent"), ("MUST", 12.0, "seconds")]
+    assert spans[0].text == sample[spans[0].start:spans[0].end] == "Blocks MUST NOT contain more than 6 blobs."
+
+    docs = synthetic_markdown(6000)
+    corpus_mb = sum(len(d.encode()) for d in docs) / 1e6
+    start = time.perf_counter()
+    engine = [extractor.extract(d) for d in docs]
+    elapsed = time.perf_counter() - start
+    subset = docs[:600]
+    start = time.perf_counter()
+    reference = [_naive_extract(d) for d in subset]
+    naive_elapsed = time.perf_counter() - start
+    for spans, expected in zip(engine, reference):
+        assert [(s.text, s.keyword, s.value, s.unit) for s in spans] == expected
+
+    n_spans = sum(len(s) for s in engine)
+    measurable = sum(s.measurable for spans in engine for s in spans)
+    subset_mb = sum(len(d.encode()) for d in subset) / 1e6
+    engine_rate, naive_rate = corpus_mb / elapsed, subset_mb / naive_elapsed
+    assert engine_rate > naive_rate
+    print(f"✓ Claim extraction ({len(docs):,} markdown docs, {corpus_mb:.1f} MB):")
+    print(f"  {n_spans:,} claim sentences ({measurable / n_spans:.0%} with a value), "
+          f"{elapsed:.2f}s = {engine_rate:.1f} MB/s")
+    print(f"  Multi-pass reference: {naive_rate:.1f} MB/s (identical spans on {len(subset)} docs)")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Claim Extraction Test Suite")
+    print("=" * 60)
+    print()
+
+    test_extraction_throughput()
+    print()
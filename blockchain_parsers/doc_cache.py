@@ -0,0 +1,266 @@
+"""
+blockchain_parsers/doc_cache.py — Content-Addressed Document Cache
+
+Per-document extraction cache for TSC α-axis spec parsing: each document's
+extracted records (e.g. ProtocolClaim dicts) are stored under the git blob
+SHA-1 of its content, so a daily run over a spec checkout (thousands of
+EIP/BIP markdown files) reparses only added or modified documents. A stat
+manifest per repository (size, mtime → blob SHA, as git's index does)
+avoids even re-hashing files that have not been touched.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Callable, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import time
+
+
+# Files modified this close to a manifest save may change again within the
+# same mtime tick; they are re-hashed on the next run (git's "racily clean")
+RACY_SECONDS = 2.0
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 object id git assigns to a file with this content."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+class DocumentCache:
+    """
+    Extraction results keyed by document content hash.
+
+    Layout:
+        {root}/{chain_id}/doc_cache/{name}/{version}/
+            objects/ab/cdef0123....json   # records of the blob with SHA ab|cdef...
+            manifests/{repo key}.json     # relpath → [size, mtime_ns, blob SHA]
+
+    Objects are immutable and shared by every path (and repository) with
+    the same content, so renames and reverts cost nothing — records must
+    therefore not depend on the path; attach it after loading. Bump `version`
+    when the extraction logic changes: results of other versions are
+    never read.
+
+    Usage:
+        cache = DocumentCache(default_cache_dir(), "ethereum", "spec_claims", version="1")
+        run = cache.update("/src/EIPs", parse=lambda path, text: [...], suffixes=(".md",))
+        for path, records in run["documents"].items(): ...
+    """
+
+    def __init__(self, root: str, chain_id: str, name: str, version: str = "1"):
+        self.path = os.path.join(root, chain_id, "doc_cache", name, version)
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.path, "manifests"), exist_ok=True)
+
+    def _object(self, sha: str) -> str:
+        return os.path.join(self.path, "objects", sha[:2], sha[2:] + ".json")
+
+    def has(self, sha: str) -> bool:
+        return os.path.exists(self._object(sha))
+
+    def get(self, sha: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached records for a blob, or None."""
+        try:
+            with open(self._object(sha)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, sha: str, records: List[Dict[str, Any]]):
+        path = self._object(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp, path)
+
+    def _manifest_path(self, repo_dir: str) -> str:
+        key = hashlib.sha1(os.path.abspath(repo_dir).encode()).hexdigest()[:16]
+        return os.path.join(self.path, "manifests", key + ".json")
+
+    def scan(self, repo_dir: str, suffixes: Sequence[str] = (".md",)) -> Tuple[Dict[str, str], int]:
+        """
+        Blob SHA of every file under `repo_dir` ending in one of `suffixes`
+        (skipping .git), re-hashing only files whose size or mtime changed
+        since the last scan.
+
+        Returns:
+            ({relpath: blob SHA}, number of files hashed)
+        """
+        try:
+            with open(self._manifest_path(repo_dir)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {"saved": 0.0, "files": {}}
+        racy_after = manifest["saved"] - RACY_SECONDS
+        known = manifest["files"]
+
+        files: Dict[str, List[Any]] = {}
+        hashed = 0
+        stack = [repo_dir]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != ".git":
+                            stack.append(entry.path)
+                        continue
+                    if not entry.name.endswith(tuple(suffixes)) or not entry.is_file():
+                        continue
+                    rel = os.path.relpath(entry.path, repo_dir).replace(os.sep, "/")
+                    st = entry.stat()
+                    previous = known.get(rel)
+                    if previous and previous[0] == st.st_size and previous[1] == st.st_mtime_ns \
+                            and st.st_mtime_ns / 1e9 < racy_after:
+                        files[rel] = previous
+                        continue
+                    with open(entry.path, "rb") as f:
+                        files[rel] = [st.st_size, st.st_mtime_ns, git_blob_sha(f.read())]
+                    hashed += 1
+
+        if hashed or len(files) != len(known):
+            tmp = self._manifest_path(repo_dir) + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"saved": time.time(), "files": files}, f)
+            os.replace(tmp, self._manifest_path(repo_dir))
+        return {rel: entry[2] for rel, entry in sorted(files.items())}, hashed
+
+    def update(
+        self,
+        repo_dir: str,
+        parse: Callable[[str, str], List[Dict[str, Any]]],
+        suffixes: Sequence[str] = (".md",)
+    ) -> Dict[str, Any]:
+        """
+        Records for every matching document of `repo_dir`, calling
+        parse(relpath, text) only for content not cached yet.
+
+        Returns:
+            {"documents": {relpath: [record, ...]} (sorted by path),
+             "parsed": [relpath, ...] (documents parsed this run),
+             "hashed": int (files read and hashed this run)}
+        """
+        blobs, hashed = self.scan(repo_dir, suffixes)
+        documents: Dict[str, List[Dict[str, Any]]] = {}
+        parsed = []
+        for rel, sha in blobs.items():
+            records = self.get(sha)
+            if records is None:
+                with open(os.path.join(repo_dir, rel), encoding="utf-8", errors="replace") as f:
+                    records = parse(rel, f.read())
+                self.put(sha, records)
+                parsed.append(rel)
+            documents[rel] = records
+        return {"documents": documents, "parsed": parsed, "hashed": hashed}
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+def test_incremental_reparse():
+    """
+    Reparse a synthetic 3,000-document spec checkout across "daily" runs.
+
+    Success criteria:
+    - Object ids equal git's blob SHAs
+    - No-change rerun parses and hashes nothing, well under a second
+    - Edits/additions are reparsed; renames and deletions are not; results
+      equal a cold parse of the final tree
+    """
+    import random
+    import re
+    import shutil
+    import subprocess
+    import tempfile
+
+    rng = random.Random(0)
+    sentence = "The {p} MUST be {v} {u}. Implementations SHOULD cache {p} values. "
+    units = ["seconds", "gas", "bytes", "blocks", "percent"]
+
+    def parse(rel: str, text: str) -> List[Dict[str, Any]]:
+        return [{"text": sentence.strip()} for sentence in re.split(r"(?<=\.)\s", text) if "MUST" in sentence]
+
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as repo:
+        os.makedirs(os.path.join(repo, "EIPS"))
+        for i in range(3000):
+            body = "".join(sentence.format(p="parameter %d" % rng.randrange(500), v=rng.randrange(10_000),
+                                           u=rng.choice(units)) for _ in range(rng.randrange(20, 120)))
+            with open(os.path.join(repo, "EIPS", "eip-%d.md" % i), "w") as f:
+                f.write("---\neip: %d\nstatus: Final\n---\n\n## Specification\n\n%s\n" % (i, body))
+        corpus_mb = sum(e.stat().st_size for e in os.scandir(os.path.join(repo, "EIPS"))) / 1e6
+
+        cache = DocumentCache(root, "ethereum", "spec_claims")
+        start = time.perf_counter()
+        cold = cache.update(repo, parse)
+        cold_elapsed = time.perf_counter() - start
+        assert len(cold["parsed"]) == 3000 and cold["hashed"] == 3000
+
+        try:
+            blob = subprocess.run(["git", "hash-object", os.path.join(repo, "EIPS", "eip-7.md")],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+            assert cache.scan(repo)[0]["EIPS/eip-7.md"] == blob
+        except (OSError, subprocess.CalledProcessError):
+            pass  # git not installed: the blob SHA format is still checked below
+        assert git_blob_sha(b"") == "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+
+        # Manifest entries saved moments ago are "racy"; age them as a daily run would
+        # see them, with the files last touched well before the manifest was saved
+        manifest = cache._manifest_path(repo)
+        with open(manifest) as f:
+            data = json.load(f)
+        data["saved"] -= 3600
+        for entry in data["files"].values():
+            entry[1] -= int((3600 + 2 * RACY_SECONDS) * 1e9)
+        for rel, entry in data["files"].items():
+            os.utime(os.path.join(repo, rel), ns=(entry[1], entry[1]))
+        with open(manifest, "w") as f:
+            json.dump(data, f)
+
+        start = time.perf_counter()
+        warm = cache.update(repo, parse)
+        warm_elapsed = time.perf_counter() - start
+        assert warm["parsed"] == [] and warm["hashed"] == 0 and warm["documents"] == cold["documents"]
+
+        # A day of edits: 3 modified, 1 added, 1 renamed, 1 deleted
+        for i in (10, 20, 30):
+            with open(os.path.join(repo, "EIPS", "eip-%d.md" % i), "a") as f:
+                f.write("The new limit MUST be %d gas.\n" % i)
+        with open(os.path.join(repo, "EIPS", "eip-9999.md"), "w") as f:
+            f.write("The blob count MUST be 6 blobs.\n")
+        os.rename(os.path.join(repo, "EIPS", "eip-40.md"), os.path.join(repo, "EIPS", "eip-40-renamed.md"))
+        os.remove(os.path.join(repo, "EIPS", "eip-50.md"))
+        start = time.perf_counter()
+        daily = cache.update(repo, parse)
+        daily_elapsed = time.perf_counter() - start
+        assert sorted(daily["parsed"]) == ["EIPS/eip-10.md", "EIPS/eip-20.md", "EIPS/eip-30.md", "EIPS/eip-9999.md"]
+        assert "EIPS/eip-50.md" not in daily["documents"]
+
+        fresh = DocumentCache(root, "ethereum", "spec_claims", version="fresh").update(repo, parse)
+        assert daily["documents"] == fresh["documents"]
+        shutil.rmtree(repo, ignore_errors=True)
+
+    assert warm_elapsed < 1.0
+    print(f"✓ Document cache (3,000 spec files, {corpus_mb:.0f} MB):")
+    print(f"  Cold parse {cold_elapsed:.2f}s; no-change rerun {warm_elapsed * 1000:.0f}ms "
+          f"(0 files hashed or parsed)")
+    print(f"  Daily edit (3 modified, 1 added, 1 renamed, 1 deleted): {len(daily['parsed'])} parsed, "
+          f"{daily['hashed']} hashed, {daily_elapsed * 1000:.0f}ms")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Document Cache Test Suite")
+    print("=" * 60)
+    print()
+
+    test_incremental_reparse()
+    print()
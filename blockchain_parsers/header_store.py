@@ -0,0 +1,228 @@
+"""
+blockchain_parsers/header_store.py — Persistent Columnar Block-Header Store
+
+Local on-disk cache of block headers for β extraction: one fixed-width,
+memory-mapped column file per header field, indexed directly by block
+height. Warm reads are slices of the mapped columns — no RPC, no JSON.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Optional, Iterable
+import json
+import os
+import time
+
+import numpy as np
+
+
+# Header fields kept per block, with their on-disk fixed-width dtype.
+# base_fee is 0 for pre-London blocks; miner is the raw 20-byte address.
+COLUMNS: Dict[str, np.dtype] = {
+    "timestamp": np.dtype(np.uint64),
+    "gas_used": np.dtype(np.uint64),
+    "gas_limit": np.dtype(np.uint64),
+    "base_fee": np.dtype(np.uint64),
+    "tx_count": np.dtype(np.uint32),
+    "miner": np.dtype("S20"),
+}
+
+# Grow column files in steps of this many heights to amortize remapping
+_GROW_STEP = 1 << 16
+
+# Blocks younger than this (by their own timestamp) may still be reorged:
+# they are stored provisionally and refetched until they age past it
+FINALITY_SECONDS = 3600
+
+# present.bin flags
+_ABSENT, _FINAL, _PROVISIONAL = 0, 1, 2
+
+
+def default_cache_dir() -> str:
+    """Cache root: $TSC_CACHE_DIR, else ~/.cache/tsc-blockchain."""
+    return os.environ.get(
+        "TSC_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "tsc-blockchain")
+    )
+
+
+class HeaderStore:
+    """
+    Per-chain columnar block-header cache that survives between processes.
+
+    Layout (one directory per chain):
+        {root}/{chain_id}/headers/
+            timestamp.bin, gas_used.bin, ...   # column files, row = height
+            present.bin                        # uint8 flag: 0 absent, 1 final, 2 provisional
+            meta.json                          # head height, last finality lag
+
+    Column files are indexed by absolute height and sparse: their apparent
+    size is height × itemsize (~160 MB per uint64 column at mainnet's ~20M
+    blocks), but only written ranges take disk space, so a month of mainnet
+    headers costs a few MB. On filesystems without sparse files (or when
+    copying the cache with tools that fill holes) the full size is used.
+
+    Final rows are written once (headers past finality never change), so
+    repeat daily runs only fetch heights that `missing()` reports. Blocks
+    younger than `finality_seconds` are written as provisional: readable
+    in the same run, but reported by `missing()` (and not `is_final()`)
+    until refetched after they have aged, so a reorg near the head never
+    leaves stale timestamps or base fees behind.
+
+    Usage:
+        store = HeaderStore(default_cache_dir(), "ethereum")
+        store.put_blocks(rpc.fetch_blocks(store.missing(start, end)))
+        cols = store.read(start, end, ["timestamp", "gas_used"])
+
+    Single writer per chain directory; any number of concurrent readers.
+    """
+
+    def __init__(self, root: str, chain_id: str, finality_seconds: float = FINALITY_SECONDS):
+        self.path = os.path.join(root, chain_id, "headers")
+        os.makedirs(self.path, exist_ok=True)
+        self.finality_seconds = finality_seconds
+        self._maps: Dict[str, np.memmap] = {}
+        self._capacity = 0
+        self.meta = self._load_meta()
+
+    # -- file plumbing ----------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name + ".bin")
+
+    def _dtype(self, name: str) -> np.dtype:
+        return COLUMNS.get(name, np.dtype(np.uint8))
+
+    def _load_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"head": -1}
+
+    def _save_meta(self):
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def _column(self, name: str) -> np.ndarray:
+        """Memory-mapped column (read-only view if the file is empty)."""
+        if name not in self._maps:
+            dtype = self._dtype(name)
+            path = self._file(name)
+            rows = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+            if rows == 0:
+                return np.zeros(0, dtype=dtype)
+            self._maps[name] = np.memmap(path, dtype=dtype, mode="r+", shape=(rows,))
+        return self._maps[name]
+
+    def _ensure_capacity(self, height: int):
+        """Extend every column file so `height` is addressable."""
+        if height < self.capacity:
+            return
+        rows = (height // _GROW_STEP + 1) * _GROW_STEP
+        for name in list(COLUMNS) + ["present"]:
+            self._maps.pop(name, None)
+            size = rows * self._dtype(name).itemsize
+            with open(self._file(name), "ab") as f:
+                # Never shrink: another process may have grown the file already
+                if f.tell() < size:
+                    f.truncate(size)
+        self._capacity = rows
+
+    @property
+    def capacity(self) -> int:
+        if not self._capacity:
+            self._capacity = len(self._column("present"))
+        return self._capacity
+
+    @property
+    def head(self) -> int:
+        """Highest stored height (-1 if empty)."""
+        return self.meta["head"]
+
+    # -- public API -------------------------------------------------------
+
+    def _flags(self, start: int, end: int) -> np.ndarray:
+        present = self._column("present")[start:end + 1]
+        if len(present) < end - start + 1:
+            present = np.concatenate([present, np.zeros(end - start + 1 - len(present), np.uint8)])
+        return present
+
+    def missing(self, start: int, end: int) -> np.ndarray:
+        """Heights in [start, end] to fetch: absent or provisional (int64 array, ascending)."""
+        heights = np.arange(start, end + 1, dtype=np.int64)
+        return heights[self._flags(start, end) != _FINAL]
+
+    def has(self, height: int) -> bool:
+        """Row is readable (final or provisional)."""
+        present = self._column("present")
+        return 0 <= height < len(present) and present[height] != _ABSENT
+
+    def is_final(self, height: int) -> bool:
+        """Row is stored and past finality: no need to fetch it again."""
+        present = self._column("present")
+        return 0 <= height < len(present) and present[height] == _FINAL
+
+    def unfinalized(self, heights: Iterable[int]) -> List[int]:
+        """Heights among `heights` not stored as final (e.g. for stores derived from their blocks)."""
+        return [h for h in heights if not self.is_final(h)]
+
+    def put_blocks(self, blocks: Iterable[Dict[str, Any]]):
+        """Decode raw eth_getBlockByNumber results into the column files."""
+        blocks = [b for b in blocks if b is not None]
+        if not blocks:
+            return
+        heights = np.fromiter((int(b["number"], 16) for b in blocks), np.int64, len(blocks))
+        self._ensure_capacity(int(heights.max()))
+
+        def hex_column(key: str) -> np.ndarray:
+            return np.fromiter((int(b.get(key) or "0x0", 16) for b in blocks), np.uint64, len(blocks))
+
+        timestamps = hex_column("timestamp")
+        self._column("timestamp")[heights] = timestamps
+        self._column("gas_used")[heights] = hex_column("gasUsed")
+        self._column("gas_limit")[heights] = hex_column("gasLimit")
+        self._column("base_fee")[heights] = hex_column("baseFeePerGas")
+        self._column("tx_count")[heights] = np.fromiter(
+            (len(b["transactions"]) for b in blocks), np.uint32, len(blocks)
+        )
+        self._column("miner")[heights] = np.array(
+            [bytes.fromhex(b["miner"][2:]) for b in blocks], dtype="S20"
+        )
+        # Flag rows only after their data is in place
+        settled = timestamps.astype(np.float64) <= time.time() - self.finality_seconds
+        self._column("present")[heights] = np.where(settled, _FINAL, _PROVISIONAL).astype(np.uint8)
+        self.flush()
+
+        self.meta["head"] = max(self.head, int(heights.max()))
+        self._save_meta()
+
+    def read(
+        self,
+        start: int,
+        end: int,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Columns for heights [start, end] as zero-copy memmap slices.
+
+        Raises:
+            KeyError: if any height in the range is not stored
+        """
+        gaps = np.flatnonzero(self._flags(start, end) == _ABSENT) + start
+        if len(gaps):
+            raise KeyError("heights not in store: %d missing, first %d" % (len(gaps), gaps[0]))
+        return {name: self._column(name)[start:end + 1] for name in (columns or list(COLUMNS))}
+
+    def get(self, height: int, column: str):
+        """Single value (e.g. one timestamp) without building a range."""
+        if not self.has(height):
+            raise KeyError(height)
+        return self._column(column)[height]
+
+    def flush(self):
+        for m in self._maps.values():
+            m.flush()
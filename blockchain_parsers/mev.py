@@ -0,0 +1,340 @@
+"""
+blockchain_parsers/mev.py — Heuristic MEV Detection from Swap Logs
+
+Sandwich and same-block arbitrage detection for TSC β-axis MEV metrics:
+Uniswap V2/V3-style Swap logs are decoded into columns for a whole block
+range at once, then matched in a single ordered pass using per-pool hash
+maps. A cache of decoded swap columns makes repeat windows local.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import json
+import os
+
+import numpy as np
+
+
+# keccak256("Swap(address,uint256,uint256,uint256,uint256,address)")
+V2_SWAP_TOPIC = "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822"
+# keccak256("Swap(address,address,int256,int256,uint160,uint128,int24)")
+V3_SWAP_TOPIC = "0xc42079f94a6350d7e6235f29174924f928cc2ac818eb64fed8004e115fbcca67"
+SWAP_TOPICS = [V2_SWAP_TOPIC, V3_SWAP_TOPIC]
+
+# Profits are valued only when realized in the wrapped native token
+WRAPPED_NATIVE: Dict[str, str] = {
+    "ethereum": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2",
+}
+
+# token0() / token1() selectors, for resolving pool tokens via eth_call
+TOKEN0_SELECTOR = "0x0dfe1681"
+TOKEN1_SELECTOR = "0xd21220a7"
+
+# A back-run must sell within this fraction of what the front-run bought
+SANDWICH_TOLERANCE = 0.01
+
+SWAP_COLUMNS: Dict[str, np.dtype] = {
+    "block": np.dtype(np.int64),
+    "tx_index": np.dtype(np.int64),
+    "log_index": np.dtype(np.int64),
+    "pool": np.dtype("S20"),
+    "sender": np.dtype("S20"),
+    "recipient": np.dtype("S20"),
+    "amount0": np.dtype(np.float64),  # Signed, positive = into the pool
+    "amount1": np.dtype(np.float64),
+}
+
+
+def _address_topic(topic: str) -> bytes:
+    return bytes.fromhex(topic[-40:])
+
+
+def _words_to_float(raw: np.ndarray, signed: bool) -> np.ndarray:
+    """
+    256-bit big-endian words (uint8[n, 32]) → float64.
+
+    Signed words are two's complement (V3 amounts): negative values are
+    negated as ~x + 1 before conversion.
+    """
+    limbs = raw.copy().view(">u8").reshape(-1, 4).astype(np.uint64)
+    negative = (limbs[:, 0] >> np.uint64(63)).astype(bool) if signed else np.zeros(len(limbs), bool)
+    limbs[negative] = ~limbs[negative]
+    scale = np.ldexp(1.0, np.array([192, 128, 64, 0]))
+    value = limbs.astype(np.float64) @ scale
+    value[negative] = -(value[negative] + 1.0)
+    return value
+
+
+def decode_swap_logs(logs: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Decode raw V2/V3 Swap logs into columns (see SWAP_COLUMNS), sorted by
+    (block, tx_index, log_index). Logs with other topics are ignored.
+
+    V2 data is (amount0In, amount1In, amount0Out, amount1Out); V3 data
+    starts with signed (amount0, amount1) from the pool's perspective.
+    Both become net signed amounts into the pool.
+    """
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in SWAP_COLUMNS}
+    for topic, words in ((V2_SWAP_TOPIC, 4), (V3_SWAP_TOPIC, 5)):
+        batch = [log for log in logs if log["topics"][0] == topic and len(log["topics"]) == 3]
+        n = len(batch)
+        if n == 0:
+            continue
+        columns["block"].append(np.fromiter((int(log["blockNumber"], 16) for log in batch), np.int64, n))
+        columns["tx_index"].append(np.fromiter((int(log["transactionIndex"], 16) for log in batch), np.int64, n))
+        columns["log_index"].append(np.fromiter((int(log["logIndex"], 16) for log in batch), np.int64, n))
+        columns["pool"].append(np.array([bytes.fromhex(log["address"][2:]) for log in batch], "S20"))
+        columns["sender"].append(np.array([_address_topic(log["topics"][1]) for log in batch], "S20"))
+        columns["recipient"].append(np.array([_address_topic(log["topics"][2]) for log in batch], "S20"))
+
+        data = np.frombuffer(
+            b"".join(bytes.fromhex(log["data"][2:2 + 64 * words]) for log in batch), np.uint8
+        ).reshape(n, words, 32)
+        if topic == V2_SWAP_TOPIC:
+            amount = [_words_to_float(data[:, w], signed=False) for w in range(4)]
+            columns["amount0"].append(amount[0] - amount[2])
+            columns["amount1"].append(amount[1] - amount[3])
+        else:
+            columns["amount0"].append(_words_to_float(data[:, 0], signed=True))
+            columns["amount1"].append(_words_to_float(data[:, 1], signed=True))
+
+    swaps = {name: (np.concatenate(parts) if parts else np.zeros(0, SWAP_COLUMNS[name]))
+             for name, parts in columns.items()}
+    return sort_swaps(swaps)
+
+
+def sort_swaps(swaps: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Order swap columns by (block, tx_index, log_index)."""
+    order = np.lexsort((swaps["log_index"], swaps["tx_index"], swaps["block"]))
+    return {name: col[order] for name, col in swaps.items()}
+
+
+def concat_swaps(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not parts:
+        return {name: np.zeros(0, dtype) for name, dtype in SWAP_COLUMNS.items()}
+    return sort_swaps({name: np.concatenate([p[name] for p in parts]) for name in SWAP_COLUMNS})
+
+
+class SwapLogCache:
+    """
+    Decoded swap columns per aligned block chunk, persisted as .npz:
+
+        {root}/{chain_id}/swaps/chunk_{start:012d}.npz
+
+    Only store chunks that are complete and final (below the finalized
+    head); the parser fetches unfinalized tails without caching them.
+    """
+
+    def __init__(self, root: str, chain_id: str, chunk_size: int = 1000):
+        self.path = os.path.join(root, chain_id, "swaps")
+        os.makedirs(self.path, exist_ok=True)
+        self.chunk_size = chunk_size
+
+    def _file(self, chunk_start: int) -> str:
+        return os.path.join(self.path, "chunk_%012d.npz" % chunk_start)
+
+    def chunks(self, start: int, end: int) -> List[int]:
+        """Aligned chunk starts covering [start, end]."""
+        first = start // self.chunk_size * self.chunk_size
+        return list(range(first, end + 1, self.chunk_size))
+
+    def missing(self, start: int, end: int) -> List[int]:
+        return [c for c in self.chunks(start, end) if not os.path.exists(self._file(c))]
+
+    def put(self, chunk_start: int, swaps: Dict[str, np.ndarray]):
+        tmp = self._file(chunk_start) + ".tmp.npz"
+        np.savez(tmp, **swaps)
+        os.replace(tmp, self._file(chunk_start))
+
+    def read(self, start: int, end: int) -> Dict[str, np.ndarray]:
+        """Cached swaps in [start, end] (missing chunks are skipped)."""
+        parts = []
+        for chunk_start in self.chunks(start, end):
+            if os.path.exists(self._file(chunk_start)):
+                with np.load(self._file(chunk_start)) as data:
+                    parts.append({name: data[name] for name in SWAP_COLUMNS})
+        swaps = concat_swaps(parts)
+        keep = (swaps["block"] >= start) & (swaps["block"] <= end)
+        return {name: col[keep] for name, col in swaps.items()}
+
+
+class PoolRegistry:
+    """
+    Pool address → (token0, token1), persisted as JSON under
+    {root}/{chain_id}/pools.json. Pool tokens are immutable, so each pool
+    is resolved over RPC once. Contracts that emit a Swap topic but cannot
+    answer token0()/token1() (revert, no code) are stored as null and kept
+    in `unresolvable`, so they are neither retried nor analyzed.
+    """
+
+    def __init__(self, root: str, chain_id: str):
+        self.file = os.path.join(root, chain_id, "pools.json")
+        os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        try:
+            with open(self.file) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            stored = {}
+        self.tokens: Dict[str, Tuple[str, str]] = {
+            pool: tuple(pair) for pool, pair in stored.items() if pair is not None
+        }
+        self.unresolvable = {pool for pool, pair in stored.items() if pair is None}
+
+    def missing(self, pools: List[str]) -> List[str]:
+        return [p for p in pools if p not in self.tokens and p not in self.unresolvable]
+
+    def update(self, resolved: Dict[str, Tuple[str, str]], unresolvable: Iterable[str] = ()):
+        self.tokens.update(resolved)
+        self.unresolvable.update(unresolvable)
+        stored: Dict[str, Any] = dict(self.tokens)
+        stored.update((pool, None) for pool in self.unresolvable)
+        tmp = self.file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(stored, f)
+        os.replace(tmp, self.file)
+
+
+def _hex(address: bytes) -> str:
+    # S20 values drop trailing NUL bytes; restore the full width
+    return "0x" + address.ljust(20, b"\x00").hex()
+
+
+def detect_mev(
+    swaps: Dict[str, np.ndarray],
+    pool_tokens: Dict[str, Tuple[str, str]],
+    wrapped_native: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Detect sandwiches and cyclic arbitrage in one ordered pass.
+
+    Args:
+        swaps: Swap columns sorted by (block, tx_index, log_index)
+        pool_tokens: Pool address (hex) → (token0, token1) for every pool
+        wrapped_native: Token whose profits count toward mev_extracted_eth
+
+    Heuristics (per block):
+    - Sandwich: a front-run swap, at least one later same-direction swap
+      in the same pool from another transaction (the victim), then a
+      back-run in the opposite direction whose sender or recipient is the
+      front-run's recipient and which sells what the front-run bought
+      (within SANDWICH_TOLERANCE). Profit = back-run out - front-run in.
+    - Arbitrage: one transaction whose swaps chain token_out → token_in
+      and return to the starting token with more than it put in.
+
+    Each pool keeps a hash map of open front-runs keyed by recipient and a
+    per-direction swap counter, so every swap is O(1). Victim counts exclude
+    swaps of the front-run's own transaction (its count is taken when that
+    transaction ends) and of the back-run's (a per-transaction counter).
+
+    Returns:
+        {
+            "sandwich_attack_count": int,
+            "arbitrage_tx_count": int,
+            "mev_extracted_eth": float,   # wrapped-native profits only
+            "swap_count": int,
+        }
+    """
+    n = len(swaps["block"])
+    result = {"sandwich_attack_count": 0, "arbitrage_tx_count": 0,
+              "mev_extracted_eth": 0.0, "swap_count": n}
+    if n == 0:
+        return result
+
+    # Vectorized prep: dense pool/token ids, direction, in/out legs
+    pools, pool_ids = np.unique(swaps["pool"], return_inverse=True)
+    pairs = [pool_tokens[_hex(p)] for p in pools.tolist()]
+    tokens = sorted({t for pair in pairs for t in pair})
+    token_index = {t: i for i, t in enumerate(tokens)}
+    token0 = np.array([token_index[a] for a, _ in pairs], dtype=np.int64)[pool_ids]
+    token1 = np.array([token_index[b] for _, b in pairs], dtype=np.int64)[pool_ids]
+    zero_for_one = swaps["amount0"] > 0
+    token_in = np.where(zero_for_one, token0, token1)
+    token_out = np.where(zero_for_one, token1, token0)
+    amount_in = np.where(zero_for_one, swaps["amount0"], swaps["amount1"])
+    amount_out = -np.where(zero_for_one, swaps["amount1"], swaps["amount0"])
+    native = token_index.get(wrapped_native.lower()) if wrapped_native else None
+
+    blocks = swaps["block"].tolist()
+    txs = swaps["tx_index"].tolist()
+    pool_ids = pool_ids.tolist()
+    senders = swaps["sender"].tolist()
+    recipients = swaps["recipient"].tolist()
+    directions = zero_for_one.tolist()
+    token_in, token_out = token_in.tolist(), token_out.tolist()
+    amount_in, amount_out = amount_in.tolist(), amount_out.tolist()
+
+    profit_native = 0.0
+    open_fronts: Dict[int, Dict[bytes, Tuple[int, int]]] = {}  # pool -> recipient -> (swap, count)
+    direction_counts: Dict[Tuple[int, bool], int] = {}
+    tx_counts: Dict[Tuple[int, bool], int] = {}  # Same, within the current tx
+    tx_fronts: List[Tuple[int, bytes, int]] = []  # (pool, recipient, swap) opened in the current tx
+    current_block = None
+    tx_start = 0
+
+    def next_tx():
+        # The front-run's own later swaps are not victims: count them as seen
+        for pool, actor, j in tx_fronts:
+            front = open_fronts[pool].get(actor)
+            if front is not None and front[0] == j:
+                open_fronts[pool][actor] = (j, direction_counts[(pool, directions[j])])
+        tx_fronts.clear()
+        tx_counts.clear()
+
+    def close_tx(first: int, last: int):
+        # Cyclic arbitrage: chained legs that return to the starting token
+        nonlocal profit_native
+        if last - first < 1 or token_in[first] != token_out[last]:
+            return
+        for i in range(first, last):
+            if token_out[i] != token_in[i + 1]:
+                return
+        if amount_out[last] > amount_in[first]:
+            result["arbitrage_tx_count"] += 1
+            if token_in[first] == native:
+                profit_native += amount_out[last] - amount_in[first]
+
+    for i in range(n):
+        if blocks[i] != current_block:
+            if i:
+                close_tx(tx_start, i - 1)
+            current_block, tx_start = blocks[i], i
+            open_fronts.clear()
+            direction_counts.clear()
+            tx_fronts.clear()
+            tx_counts.clear()
+        elif txs[i] != txs[tx_start]:
+            close_tx(tx_start, i - 1)
+            next_tx()
+            tx_start = i
+
+        pool, direction = pool_ids[i], directions[i]
+        fronts = open_fronts.setdefault(pool, {})
+        matched = False
+        for actor in (senders[i], recipients[i]):
+            front = fronts.get(actor)
+            if front is None:
+                continue
+            j, seen = front
+            front_key = (pool, directions[j])
+            victims = direction_counts.get(front_key, 0) - seen - tx_counts.get(front_key, 0)
+            if (directions[j] != direction and txs[j] != txs[i] and victims > 0
+                    and abs(amount_in[i] - amount_out[j]) <= SANDWICH_TOLERANCE * amount_out[j]):
+                result["sandwich_attack_count"] += 1
+                if token_in[j] == native:
+                    profit_native += amount_out[i] - amount_in[j]
+                del fronts[actor]
+                matched = True
+                break
+
+        key = (pool, direction)
+        direction_counts[key] = direction_counts.get(key, 0) + 1
+        tx_counts[key] = tx_counts.get(key, 0) + 1
+        if not matched:
+            fronts[recipients[i]] = (i, direction_counts[key])
+            tx_fronts.append((pool, recipients[i], i))
+    close_tx(tx_start, n - 1)
+
+    result["mev_extracted_eth"] = profit_native / 1e18
+    return result
@@ -0,0 +1,396 @@
+"""
+blockchain_parsers/multicall.py — Multicall and Batch-Transaction Decoding
+
+Unpacks batch wrappers (Multicall3, router multicall(bytes[]), Uniswap
+Universal Router command streams, Safe execTransaction and MultiSend) into
+their inner calls, recursively, so TSC γ-axis classification can type the
+work a batch actually does instead of filing it under OTHER.
+
+ABI layouts are parsed once per (contract, selector) and memoized; decoding
+a hot selector is then a walk over the call data with no signature parsing.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Callable, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+MAX_DEPTH = 4  # Nested wrappers followed (e.g. Safe → MultiSend → router multicall)
+
+MULTICALL3 = "0xca11bde05977b3631167028862be2a173976ca11"
+UNIVERSAL_ROUTER_V1_2 = "0x3fc91a3afd70395cd496c647d5a6cc9d4b2b7fad"
+UNIVERSAL_ROUTER_V2 = "0x66a9893cc07d91d95644aedd05d03f95e1dba8af"
+
+
+@dataclass
+class Call:
+    """
+    One inner call of a batch. `hint` is a TransactionType value when the
+    wrapper itself says what the call does (Universal Router commands; ""
+    for plumbing such as permits and sweeps); calls with hint None are
+    classified like top-level transactions.
+    """
+    to: Optional[str]
+    value: int
+    data: bytes
+    hint: Optional[str] = None
+
+    @property
+    def selector(self) -> int:
+        return int.from_bytes(self.data[:4], "big") if len(self.data) >= 4 else 0
+
+
+# ----------------------------------------------------------------------------
+# ABI layouts
+# ----------------------------------------------------------------------------
+# Parsed types: ("address",), ("uint",), ("bool",), ("bytes32",), ("bytes",),
+# ("array", elem), ("tuple", (elem, ...)). Only what the wrappers below use.
+
+def _split_top(inner: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(inner):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(inner[start:i])
+            start = i + 1
+    if inner:
+        parts.append(inner[start:])
+    return parts
+
+
+def _parse_type(text: str) -> tuple:
+    if text.endswith("[]"):
+        return ("array", _parse_type(text[:-2]))
+    if text.startswith("("):
+        return ("tuple", tuple(_parse_type(part) for part in _split_top(text[1:-1])))
+    if text in ("bytes", "string"):
+        return ("bytes",)
+    if text.startswith(("uint", "int")):
+        return ("uint",)
+    if text in ("address", "bool", "bytes32"):
+        return (text,)
+    raise ValueError("unsupported ABI type: %s" % text)
+
+
+@lru_cache(maxsize=None)
+def parse_signature(signature: str) -> tuple:
+    """'name(type,...)' → parsed argument tuple type (memoized)."""
+    return _parse_type(signature[signature.index("("):])
+
+
+def _dynamic(t: tuple) -> bool:
+    if t[0] in ("bytes", "array"):
+        return True
+    return t[0] == "tuple" and any(_dynamic(e) for e in t[1])
+
+
+def _head_size(t: tuple) -> int:
+    if t[0] == "tuple" and not _dynamic(t):
+        return sum(_head_size(e) for e in t[1])
+    return 32
+
+
+def _word(data: bytes, at: int) -> int:
+    if at < 0 or at + 32 > len(data):
+        raise ValueError("call data truncated at byte %d" % at)
+    return int.from_bytes(data[at:at + 32], "big")
+
+
+def _decode_value(t: tuple, data: bytes, at: int) -> Any:
+    kind = t[0]
+    if kind == "address":
+        _word(data, at)
+        return "0x" + data[at + 12:at + 32].hex()
+    if kind == "uint":
+        return _word(data, at)
+    if kind == "bool":
+        return _word(data, at) != 0
+    if kind == "bytes32":
+        _word(data, at)
+        return data[at:at + 32]
+    if kind == "bytes":
+        n = _word(data, at)
+        if at + 32 + n > len(data):
+            raise ValueError("bytes value overruns call data")
+        return data[at + 32:at + 32 + n]
+    if kind == "array":
+        n = _word(data, at)
+        if n * 32 > len(data):
+            raise ValueError("array length %d overruns call data" % n)
+        return _decode_tuple((t[1],) * n, data, at + 32)
+    return _decode_tuple(t[1], data, at)
+
+
+def _decode_tuple(types: Sequence[tuple], data: bytes, base: int) -> tuple:
+    values, cursor = [], base
+    for t in types:
+        if _dynamic(t):
+            values.append(_decode_value(t, data, base + _word(data, cursor)))
+            cursor += 32
+        else:
+            values.append(_decode_value(t, data, cursor))
+            cursor += _head_size(t)
+    return tuple(values)
+
+
+def decode_args(signature: str, data: bytes) -> tuple:
+    """Decode call data (selector stripped) against a function signature."""
+    return _decode_value(parse_signature(signature), data, 0)
+
+
+def _encode_value(t: tuple, value: Any) -> bytes:
+    kind = t[0]
+    if kind == "address":
+        return bytes(12) + bytes.fromhex(value[2:])
+    if kind in ("uint", "bool"):
+        return int(value).to_bytes(32, "big")
+    if kind == "bytes32":
+        return bytes(value).ljust(32, b"\x00")
+    if kind == "bytes":
+        value = bytes(value)
+        return len(value).to_bytes(32, "big") + value + bytes(-len(value) % 32)
+    if kind == "array":
+        return len(value).to_bytes(32, "big") + _encode_tuple((t[1],) * len(value), value)
+    return _encode_tuple(t[1], value)
+
+
+def _encode_tuple(types: Sequence[tuple], values: Sequence[Any]) -> bytes:
+    head_size = sum(32 if _dynamic(t) else _head_size(t) for t in types)
+    heads, tails = [], []
+    for t, value in zip(types, values):
+        encoded = _encode_value(t, value)
+        if _dynamic(t):
+            heads.append((head_size + sum(len(x) for x in tails)).to_bytes(32, "big"))
+            tails.append(encoded)
+        else:
+            heads.append(encoded)
+    return b"".join(heads + tails)
+
+
+def encode_call(selector: int, signature: str, args: Sequence[Any]) -> bytes:
+    """ABI-encode a call (selector given: no keccak in the dependency set)."""
+    return selector.to_bytes(4, "big") + _encode_value(parse_signature(signature), args)
+
+
+# ----------------------------------------------------------------------------
+# Wrappers
+# ----------------------------------------------------------------------------
+# Each wrapper: (signature, unpack(args, to, value) → [Call]).
+
+def _call_tuples(args: tuple, to: str, value: int) -> List[Call]:
+    # Multicall3 (target, [allowFailure,] [value,] callData) tuples, last argument
+    return [Call(t[0], t[2] if len(t) == 4 else 0, t[-1]) for t in args[-1]]
+
+
+def _self_calls(args: tuple, to: str, value: int) -> List[Call]:
+    # multicall(…, bytes[]): delegatecalls into the same contract
+    return [Call(to, 0, data) for data in args[-1]]
+
+
+def _safe_exec(args: tuple, to: str, value: int) -> List[Call]:
+    return [Call(args[0], args[1], args[2])]
+
+
+def _multi_send(args: tuple, to: str, value: int) -> List[Call]:
+    # Packed: operation (1) | to (20) | value (32) | data length (32) | data
+    packed, calls, at = args[0], [], 0
+    while at < len(packed):
+        if at + 85 > len(packed):
+            raise ValueError("MultiSend entry truncated")
+        n = int.from_bytes(packed[at + 53:at + 85], "big")
+        calls.append(Call("0x" + packed[at + 1:at + 21].hex(),
+                          int.from_bytes(packed[at + 21:at + 53], "big"),
+                          packed[at + 85:at + 85 + n]))
+        at += 85 + n
+    return calls
+
+
+# Universal Router command byte (low 6 bits) → TransactionType value, or None
+# for plumbing (permits, sweeps, wraps). Command sets differ per deployment.
+_ROUTER_COMMANDS_COMMON = {
+    0x00: "dex_swap", 0x01: "dex_swap", 0x08: "dex_swap", 0x09: "dex_swap",
+    0x02: None, 0x03: None, 0x04: None, 0x05: None, 0x06: None,
+    0x0a: None, 0x0b: None, 0x0c: None, 0x0d: None, 0x0e: None,
+}
+ROUTER_COMMANDS: Dict[Optional[str], Dict[int, Optional[str]]] = {
+    None: _ROUTER_COMMANDS_COMMON,  # Unknown deployment: shared swap/permit commands only
+    UNIVERSAL_ROUTER_V1_2: {
+        **_ROUTER_COMMANDS_COMMON,
+        # Seaport, LooksRare, NFTX, CryptoPunks, X2Y2, Sudoswap, NFT20, Foundation, Element
+        **{c: "nft_trade" for c in (0x10, 0x11, 0x12, 0x13, 0x18, 0x19, 0x1a, 0x1b, 0x1c, 0x1e, 0x20)},
+        0x15: None, 0x16: None, 0x17: None, 0x1d: None, 0x22: None,
+    },
+    UNIVERSAL_ROUTER_V2: {
+        **_ROUTER_COMMANDS_COMMON,
+        0x10: "dex_swap",  # V4_SWAP
+        0x11: None, 0x12: None, 0x13: None, 0x14: None,
+    },
+}
+EXECUTE_SUB_PLAN = 0x21
+_COMMAND_MASK = 0x3f
+
+
+def _router_commands(commands: Dict[int, Optional[str]]) -> Callable[[tuple, str, int], List[Call]]:
+    def unpack(args: tuple, to: str, value: int) -> List[Call]:
+        plan, inputs = args[0], args[1]
+        if len(plan) != len(inputs):
+            raise ValueError("command/input count mismatch")
+        calls = []
+        for command, data in zip(plan, inputs):
+            command &= _COMMAND_MASK
+            if command == EXECUTE_SUB_PLAN:
+                calls.extend(unpack(decode_args("(bytes,bytes[])", data), to, 0))
+            elif command in commands:
+                calls.append(Call(to, 0, data, hint=commands[command] or ""))
+            else:
+                calls.append(Call(to, 0, data, hint="other"))
+        return calls
+    return unpack
+
+
+_MULTICALL3_WRAPPERS = {
+    0x252dba42: ("aggregate((address,bytes)[])", _call_tuples),
+    0xbce38bd7: ("tryAggregate(bool,(address,bytes)[])", _call_tuples),
+    0xc3077fa9: ("blockAndAggregate((address,bytes)[])", _call_tuples),
+    0x399542e9: ("tryBlockAndAggregate(bool,(address,bytes)[])", _call_tuples),
+    0x82ad56cb: ("aggregate3((address,bool,bytes)[])", _call_tuples),
+    0x174dea71: ("aggregate3Value((address,bool,uint256,bytes)[])", _call_tuples),
+}
+
+# selector → (signature, unpack), for any contract
+WRAPPERS: Dict[int, Tuple[str, Callable[[tuple, str, int], List[Call]]]] = {
+    **_MULTICALL3_WRAPPERS,
+    0xac9650d8: ("multicall(bytes[])", _self_calls),
+    0x5ae401dc: ("multicall(uint256,bytes[])", _self_calls),
+    0x1f0464d1: ("multicall(bytes32,bytes[])", _self_calls),
+    0x3593564c: ("execute(bytes,bytes[],uint256)", _router_commands(ROUTER_COMMANDS[None])),
+    0x24856bc3: ("execute(bytes,bytes[])", _router_commands(ROUTER_COMMANDS[None])),
+    0x6a761202: ("execTransaction(address,uint256,bytes,uint8,uint256,uint256,uint256,address,address,bytes)",
+                 _safe_exec),
+    0x8d80ff0a: ("multiSend(bytes)", _multi_send),
+}
+
+# (contract, selector) → (signature, unpack): deployment-specific layouts
+CONTRACT_WRAPPERS: Dict[Tuple[str, int], Tuple[str, Callable[[tuple, str, int], List[Call]]]] = {
+    (router, selector): (WRAPPERS[selector][0], _router_commands(ROUTER_COMMANDS[router]))
+    for router in (UNIVERSAL_ROUTER_V1_2, UNIVERSAL_ROUTER_V2)
+    for selector in (0x3593564c, 0x24856bc3)
+}
+
+WRAPPER_SELECTORS = np.array(sorted(WRAPPERS), dtype=np.uint32)
+
+
+@lru_cache(maxsize=65536)
+def layout(contract: Optional[str], selector: int) -> Optional[Tuple[tuple, Callable[[tuple, str, int], List[Call]]]]:
+    """
+    (parsed argument type, unpack) for a call to `contract` with `selector`,
+    or None if it is not a known batch wrapper. Memoized per pair.
+    """
+    spec = CONTRACT_WRAPPERS.get((contract, selector)) or WRAPPERS.get(selector)
+    if spec is None:
+        return None
+    signature, unpack = spec
+    return parse_signature(signature), unpack
+
+
+def decode_calls(
+    to: Optional[str],
+    data: bytes,
+    value: int = 0,
+    max_depth: int = MAX_DEPTH
+) -> Optional[List[Call]]:
+    """
+    Leaf calls of a batch transaction, unwrapping nested wrappers up to
+    `max_depth` levels.
+
+    Returns:
+        List of leaf Calls, or None if the call is not a known wrapper or
+        its data does not decode (callers fall back to plain rules)
+    """
+    if not to or len(data) < 4:
+        return None
+    spec = layout(to.lower(), int.from_bytes(data[:4], "big"))
+    if spec is None:
+        return None
+    types, unpack = spec
+    try:
+        calls = unpack(_decode_value(types, data, 4), to.lower(), value)
+    except (ValueError, IndexError, TypeError):
+        return None
+    leaves = []
+    for call in calls:
+        inner = decode_calls(call.to, call.data, call.value, max_depth - 1) \
+            if max_depth > 1 and call.hint is None else None
+        leaves.extend(inner if inner else [call])
+    return leaves
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+def test_decode_wrappers():
+    """
+    Round-trip nested batch wrappers.
+
+    Success criteria:
+    - Multicall3 → router multicall → swaps decode to leaf calls with targets
+    - Universal Router commands (including a sub-plan) map per deployment
+    - Safe execTransaction → MultiSend unpacks packed entries
+    - Truncated data and unknown selectors return None
+    """
+    router = "0x68b3465833fb72a70ecdf485e0e4c7bd8665fc45"
+    token = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+    swap = encode_call(0x04e45aaf, "exactInputSingle((address,address,uint24,address,uint256,uint256,uint160))",
+                       [(token, router, 500, router, 10 ** 6, 0, 0)])
+    transfer = encode_call(0xa9059cbb, "transfer(address,uint256)", [router, 5])
+    inner = encode_call(0x5ae401dc, "multicall(uint256,bytes[])", [1_700_000_000, [swap, swap]])
+    batch = encode_call(0x82ad56cb, "aggregate3((address,bool,bytes)[])",
+                        [[(router, False, inner), (token, True, transfer)]])
+    calls = decode_calls(MULTICALL3, batch)
+    assert [(c.to, c.selector) for c in calls] == [(router, 0x04e45aaf)] * 2 + [(token, 0xa9059cbb)]
+    assert calls[0].data == swap
+
+    plan = bytes([0x0b, 0x00, 0x21, 0x10])
+    sub_plan = encode_call(0, "(bytes,bytes[])", [bytes([0x08, 0x04]), [b"v2", b"sweep"]])[4:]
+    execute = encode_call(0x3593564c, "execute(bytes,bytes[],uint256)",
+                          [plan, [b"wrap", b"v3", sub_plan, b"seaport"], 1_700_000_000])
+    hints = [c.hint for c in decode_calls(UNIVERSAL_ROUTER_V1_2, execute)]
+    assert hints == ["", "dex_swap", "dex_swap", "", "nft_trade"]
+    assert [c.hint for c in decode_calls(UNIVERSAL_ROUTER_V2, execute)][-1] == "dex_swap"
+    assert [c.hint for c in decode_calls(router, execute)][-1] == "other"
+
+    packed = b"".join(bytes([0]) + bytes.fromhex(t[2:]) + v.to_bytes(32, "big") + len(d).to_bytes(32, "big") + d
+                      for t, v, d in [(token, 0, transfer), (router, 10 ** 18, b"")])
+    multisend = encode_call(0x8d80ff0a, "multiSend(bytes)", [packed])
+    safe_tx = encode_call(0x6a761202, WRAPPERS[0x6a761202][0],
+                          ["0x40a2accbd92bca938b02010e17a5b8929b49130d", 0, multisend, 1, 0, 0, 0,
+                           "0x" + "00" * 20, "0x" + "00" * 20, b"\x01" * 65])
+    calls = decode_calls("0x" + "ab" * 20, safe_tx)
+    assert [(c.to, c.value, c.selector) for c in calls] == [(token, 0, 0xa9059cbb), (router, 10 ** 18, 0)]
+
+    assert decode_calls(MULTICALL3, batch[:-40]) is None
+    assert decode_calls(MULTICALL3, transfer) is None
+    assert layout.cache_info().hits > 0
+    print("✓ Multicall decoding: Multicall3/multicall, Universal Router (v1.2, v2), Safe/MultiSend")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Multicall Decoder Test Suite")
+    print("=" * 60)
+    print()
+
+    test_decode_wrappers()
+    print()
@@ -0,0 +1,494 @@
+"""
+blockchain_parsers/retention.py — Daily Active-Sender Sets and Retention
+
+Local set-intersection engines for TSC γ-axis user retention: per-day
+distinct-sender sets stored both exactly (sorted uint64 keys) and as
+HyperLogLog sketches, so the retention between any two windows is either
+an exact sorted-array intersection or a merge of stored sketches. Full
+cohort matrices over many windows come from one pass that gives every
+sender a bitset of the windows it was active in.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple, Union
+from datetime import date, timedelta
+import math
+import os
+import time
+
+import numpy as np
+
+
+_U64 = np.uint64
+
+
+def hash64(keys: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: uint64 keys → well-mixed uint64 hashes."""
+    with np.errstate(over="ignore"):
+        z = np.asarray(keys, dtype=np.uint64) + _U64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> _U64(27))) * _U64(0x94D049BB133111EB)
+        return z ^ (z >> _U64(31))
+
+
+def address_keys(addresses: Union[np.ndarray, Iterable[str]]) -> np.ndarray:
+    """
+    20-byte addresses (S20 array or hex strings) → uint64 keys.
+
+    All 160 bits feed the key, so vanity addresses sharing a long prefix
+    stay distinct; two addresses collide with probability 2^-64.
+    """
+    if not (isinstance(addresses, np.ndarray) and addresses.dtype == np.dtype("S20")):
+        addresses = np.array([bytes.fromhex(a[2:]) for a in addresses], dtype="S20")
+    raw = np.frombuffer(np.ascontiguousarray(addresses).tobytes(), np.uint8).reshape(-1, 20)
+    high = raw[:, :8].copy().view("<u8").ravel()
+    mid = raw[:, 8:16].copy().view("<u8").ravel()
+    low = raw[:, 16:].copy().view("<u4").ravel().astype(np.uint64)
+    return hash64(high ^ hash64(mid ^ hash64(low)))
+
+
+def unique_sorted(keys: np.ndarray) -> np.ndarray:
+    """Sorted distinct values (sort + adjacent compare; faster than np.unique here)."""
+    keys = np.sort(np.asarray(keys, dtype=np.uint64))
+    if len(keys) == 0:
+        return keys
+    return keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted distinct arrays (one binary search per element of a)."""
+    if len(a) == 0 or len(b) == 0:
+        return a[:0]
+    pos = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[pos] == a]
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Exact bit length of uint64 values (float log2 rounds above 2^53)."""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= _U64(1 << shift)
+        n[big] += shift
+        x[big] >>= _U64(shift)
+    return n + (x > 0)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct counter over uint64 keys (2^p uint8 registers).
+
+    Standard error is 1.04 / sqrt(2^p): 0.81% at p=14 (16KB), 0.41% at
+    p=16. Sketches merge by register-wise max, so a window's sketch is the
+    union of its days' sketches. Intersections use inclusion-exclusion,
+    |A∩B| = |A| + |B| - |A∪B|, whose absolute error scales with |A∪B|:
+    fine for retention rates, poor for intersections much smaller than
+    the sets.
+    """
+
+    def __init__(self, p: int = 14, registers: Optional[np.ndarray] = None):
+        self.p = p
+        self.registers = registers if registers is not None else np.zeros(1 << p, dtype=np.uint8)
+
+    def add(self, keys: np.ndarray):
+        h = hash64(keys)
+        index = (h >> _U64(64 - self.p)).astype(np.intp)
+        rest = h & _U64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p + 1 - _bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def __or__(self, other: "HyperLogLog") -> "HyperLogLog":
+        return HyperLogLog(self.p, np.maximum(self.registers, other.registers))
+
+    def count(self) -> float:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # Linear counting for small sets
+        return estimate
+
+
+def _days(start: str, end: str) -> List[str]:
+    """ISO days in [start, end)."""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days)]
+
+
+class RetentionIndex:
+    """
+    Per-day distinct active senders, exact and sketched.
+
+    Layout:
+        {root}/{chain_id}/retention/v{LAYOUT_VERSION}/
+            keys_{YYYY-MM-DD}.npy   # sorted unique uint64 sender keys
+            hll_{YYYY-MM-DD}.npy    # HyperLogLog registers for the day
+
+    Keys are either address_keys() or AddressTable ids (γ records sender
+    ids), but one index must hold one key space. Layout v1 stored
+    address_keys directly under retention/; its days are ignored, since
+    mixing them with id days would silently corrupt every intersection.
+
+    Windows are [start, end) in whole UTC days, matching the γ queries.
+    Exact mode unions the days' sorted key arrays and intersects the two
+    windows by binary search (memory ~8 bytes per distinct sender);
+    approximate mode reads only the 2^p-byte sketches, so any pair of
+    windows costs milliseconds regardless of chain size.
+
+    Usage:
+        index = RetentionIndex(default_cache_dir(), "ethereum")
+        index.record("2024-01-01", address_keys(senders))
+        result = index.retention(("2023-12-01", "2024-01-01"),
+                                 ("2024-01-01", "2024-02-01"), mode="approx")
+        cohorts = index.cohort_matrix(monthly_windows)
+    """
+
+    LAYOUT_VERSION = 2
+    MODES = ("exact", "approx")
+    MAX_WINDOWS = 64  # One bit per window in a uint64 mask
+
+    def __init__(self, root: str, chain_id: str, p: int = 14):
+        self.path = os.path.join(root, chain_id, "retention", "v%d" % self.LAYOUT_VERSION)
+        os.makedirs(self.path, exist_ok=True)
+        self.p = p
+
+    def _file(self, kind: str, day: str) -> str:
+        return os.path.join(self.path, "%s_%s.npy" % (kind, day))
+
+    def _save(self, kind: str, day: str, array: np.ndarray):
+        tmp = self._file(kind, day) + ".tmp.npy"
+        np.save(tmp, array)
+        os.replace(tmp, self._file(kind, day))
+
+    def days(self) -> List[str]:
+        """Recorded days, ascending."""
+        return sorted(name[len("keys_"):-len(".npy")] for name in os.listdir(self.path)
+                      if name.startswith("keys_") and name.endswith(".npy") and ".tmp" not in name)
+
+    def missing(self, start: str, end: str) -> List[str]:
+        recorded = set(self.days())
+        return [day for day in _days(start, end) if day not in recorded]
+
+    def record(self, day: str, keys: np.ndarray):
+        """Store one UTC day's senders (any order, duplicates allowed)."""
+        keys = unique_sorted(keys)
+        sketch = HyperLogLog(self.p)
+        sketch.add(keys)
+        self._save("hll", day, sketch.registers)
+        self._save("keys", day, keys)  # Written last: marks the day complete
+
+    def _check(self, start: str, end: str):
+        gaps = self.missing(start, end)
+        if gaps:
+            raise KeyError("no active-sender data for %d day(s), first %s" % (len(gaps), gaps[0]))
+
+    def day_keys(self, day: str) -> np.ndarray:
+        return np.load(self._file("keys", day), mmap_mode="r")
+
+    def window_keys(self, start: str, end: str) -> np.ndarray:
+        """Sorted distinct sender keys active in [start, end)."""
+        self._check(start, end)
+        return unique_sorted(np.concatenate([self.day_keys(day) for day in _days(start, end)]))
+
+    def window_sketch(self, start: str, end: str) -> HyperLogLog:
+        self._check(start, end)
+        sketch = HyperLogLog(self.p)
+        for day in _days(start, end):
+            sketch.merge(HyperLogLog(self.p, np.load(self._file("hll", day))))
+        return sketch
+
+    def daily_counts(self, start: str, end: str) -> List[int]:
+        """Exact distinct senders per day in [start, end)."""
+        self._check(start, end)
+        return [len(self.day_keys(day)) for day in _days(start, end)]
+
+    def retention(self, window1: Sequence[str], window2: Sequence[str], mode: str = "exact") -> Dict[str, Any]:
+        """
+        Share of window-1 senders also active in window 2.
+
+        Args:
+            window1, window2: (start, end) ISO days, end exclusive
+            mode: "exact" (sorted-array intersection) or "approx" (HLL)
+
+        Returns:
+            {"retention_rate": float, "window1_active": float,
+             "window2_active": float, "retained": float, "mode": str,
+             "elapsed": float (seconds)}
+
+        Raises:
+            KeyError: if a day in either window was never recorded
+        """
+        if mode not in self.MODES:
+            raise ValueError("mode must be one of %s" % (self.MODES,))
+        start = time.perf_counter()
+        if mode == "exact":
+            first, second = self.window_keys(*window1), self.window_keys(*window2)
+            n1, n2 = float(len(first)), float(len(second))
+            retained = float(len(intersect_sorted(first, second)))
+        else:
+            first, second = self.window_sketch(*window1), self.window_sketch(*window2)
+            n1, n2 = first.count(), second.count()
+            retained = min(max(n1 + n2 - (first | second).count(), 0.0), n1, n2)
+        return {
+            "retention_rate": retained / n1 if n1 else 0.0,
+            "window1_active": n1,
+            "window2_active": n2,
+            "retained": retained,
+            "mode": mode,
+            "elapsed": time.perf_counter() - start,
+        }
+
+    def activity_masks(self, windows: Sequence[Tuple[str, str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (sorted distinct sender keys, uint64 mask) over all `windows`: bit w
+        of a sender's mask is set iff it was active in windows[w].
+
+        One pass over the stored day sets: each day's keys are located in
+        the global key array by binary search and OR-ed into the masks.
+        """
+        if len(windows) > self.MAX_WINDOWS:
+            raise ValueError("at most %d windows per cohort matrix" % self.MAX_WINDOWS)
+        for start, end in windows:
+            self._check(start, end)
+        window_days = [_days(start, end) for start, end in windows]
+        keys = unique_sorted(np.concatenate(
+            [self.day_keys(day) for day in sorted(set().union(*window_days))] or [np.zeros(0, _U64)]
+        ))
+        masks = np.zeros(len(keys), dtype=np.uint64)
+        for w, days in enumerate(window_days):
+            bit = _U64(1 << w)
+            for day in days:
+                masks[np.searchsorted(keys, self.day_keys(day))] |= bit
+        return keys, masks
+
+    def cohort_matrix(
+        self,
+        windows: Sequence[Tuple[str, str]],
+        cohort_bounds: Optional[Sequence[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Retention from every cohort to every window, in one pass.
+
+        Args:
+            windows: (start, end) ISO days, contiguous and ascending (each
+                window starts where the previous one ends, e.g. 24
+                consecutive months or weeks)
+            cohort_bounds: optional first key of each window's cohort, for
+                keys assigned in order of first appearance (AddressTable
+                ids): a sender is in cohort i if bounds[i] <= key <
+                bounds[i + 1] and it was active in windows[i]; senders first
+                seen before windows[0], or first seen in window i but not
+                sending until later (e.g. recipients), belong to no cohort.
+                Default: the cohort is the first of `windows` in which the
+                sender was active.
+
+        Cohort i is thus always a subset of window i's senders: the diagonal
+        is 1 and a row never depends on the windows requested after it.
+
+        Returns:
+            {"windows": list, "cohort_sizes": [int] * W,
+             "active": W×W int64 (cohort i senders active in window j),
+             "retention": W×W float (active / cohort size; NaN for j < i
+             and for empty cohorts), "elapsed": float (seconds)}
+
+        Cost is one binary search per stored (day, sender) record plus one
+        bincount per window over the distinct senders, independent of the
+        W² window pairs that pairwise retention() calls would intersect.
+
+        Raises:
+            KeyError: if a day in any window was never recorded
+            ValueError: if the windows are not contiguous
+        """
+        for (_, end), (next_start, _) in zip(windows[:-1], windows[1:]):
+            if end != next_start:
+                raise ValueError("cohort windows must be contiguous: %s != %s" % (end, next_start))
+        start = time.perf_counter()
+        n = len(windows)
+        keys, masks = self.activity_masks(windows)
+        if cohort_bounds is None:
+            # Lowest set bit = first active window (every key has some bit set)
+            cohort = _bit_length(masks & (~masks + _U64(1))).astype(np.int64) - 1
+        else:
+            cohort = np.searchsorted(np.asarray(cohort_bounds, dtype=np.uint64), keys, side="right") - 1
+            # Members must send in their own window (first-seen ids include recipients)
+            member = cohort >= 0
+            own = np.zeros(len(keys), dtype=bool)
+            own[member] = (masks[member] >> cohort[member].astype(np.uint64)) & _U64(1) == 1
+            cohort[~own] = -1
+        in_cohort = cohort >= 0
+        cohort, masks = cohort[in_cohort], masks[in_cohort]
+        sizes = np.bincount(cohort, minlength=n)[:n]
+        active = np.zeros((n, n), dtype=np.int64)
+        for w in range(n):
+            hit = (masks >> _U64(w)) & _U64(1) == 1
+            active[:, w] = np.bincount(cohort[hit], minlength=n)[:n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = active / sizes[:, None]
+        rates[np.tril_indices(n, -1)] = np.nan
+        rates[sizes == 0] = np.nan
+        return {
+            "windows": [tuple(window) for window in windows],
+            "cohort_sizes": sizes.tolist(),
+            "active": active,
+            "retention": rates,
+            "elapsed": time.perf_counter() - start,
+        }
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+def _synthetic_activity(days: int, population: int, daily: int, seed: int = 0) -> List[np.ndarray]:
+    """Daily sender keys with churn: a drifting core plus one-off senders."""
+    rng = np.random.default_rng(seed)
+    keys = address_keys(rng.integers(0, 256, size=(population, 20), dtype=np.uint8)
+                        .view("S20").ravel())
+    out = []
+    for d in range(days):
+        # Core users drift through the population; a third of each day is one-offs
+        lo = int(d * population / (2 * days))
+        core = rng.integers(lo, lo + population // 2, size=2 * daily // 3)
+        once = rng.integers(0, population, size=daily // 3)
+        out.append(keys[np.concatenate([core, once])])
+    return out
+
+
+def test_retention_engines():
+    """
+    Compare exact and sketch retention on two 30-day windows.
+
+    Success criteria:
+    - Exact mode equals a Python set computation
+    - HLL mode within 3 percentage points of exact
+    - Both modes report their timing; approx reads only sketches
+    """
+    import tempfile
+
+    activity = _synthetic_activity(days=60, population=4_000_000, daily=150_000)
+    days = _days("2024-01-01", "2024-03-01")
+    with tempfile.TemporaryDirectory() as root:
+        index = RetentionIndex(root, "ethereum")
+        start = time.perf_counter()
+        for day, keys in zip(days, activity):
+            index.record(day, keys)
+        ingest_elapsed = time.perf_counter() - start
+
+        w1, w2 = ("2024-01-01", "2024-01-31"), ("2024-01-31", "2024-03-01")
+        exact = index.retention(w1, w2, mode="exact")
+        approx = index.retention(w1, w2, mode="approx")
+        try:
+            index.retention(w1, ("2024-02-01", "2024-03-05"))
+            assert False, "Unrecorded days must raise"
+        except KeyError:
+            pass
+
+    first = set(np.concatenate(activity[:30]).tolist())
+    second = set(np.concatenate(activity[30:]).tolist())
+    assert exact["window1_active"] == len(first)
+    assert exact["retained"] == len(first & second)
+    error = abs(approx["retention_rate"] - exact["retention_rate"])
+    assert error < 0.03, error
+
+    print(f"✓ Retention ({len(first):,} → {len(second):,} distinct senders, 30-day windows):")
+    print(f"  Exact:  {exact['retention_rate']:.2%} in {exact['elapsed'] * 1000:.0f}ms")
+    print(f"  Approx: {approx['retention_rate']:.2%} in {approx['elapsed'] * 1000:.0f}ms "
+          f"(error {error * 100:.2f} pts, p=14)")
+    print(f"  Ingest 60 days: {ingest_elapsed:.2f}s")
+
+
+def test_cohort_matrix():
+    """
+    Build a 24×24 weekly cohort matrix in one pass.
+
+    Success criteria:
+    - Every cell equals the Python set computation
+    - Pairwise retention() agrees for first-window cohorts
+    - Explicit cohort bounds (ordered ids) split senders by first id;
+      ids not sending in their own window join no cohort
+    - Diagonal exactly 1; earlier rows unchanged when more windows are
+      requested; non-contiguous windows rejected
+    - Faster than the 300 pairwise retention() calls it replaces
+    """
+    import tempfile
+
+    weeks = 24
+    activity = _synthetic_activity(days=7 * weeks, population=1_000_000, daily=20_000, seed=1)
+    days = _days("2024-01-01", "2024-06-17")
+    windows = [(days[7 * w], (date.fromisoformat(days[7 * w]) + timedelta(days=7)).isoformat())
+               for w in range(weeks)]
+    with tempfile.TemporaryDirectory() as root:
+        index = RetentionIndex(root, "ethereum")
+        for day, keys in zip(days, activity):
+            index.record(day, keys)
+        result = index.cohort_matrix(windows)
+
+        start = time.perf_counter()
+        pairwise = [index.retention(windows[0], windows[w]) for w in range(weeks)]
+        pair_elapsed = (time.perf_counter() - start) * weeks * (weeks + 1) / 2 / weeks
+
+        # Ids in order of first appearance: 100 new per day plus returning old ids.
+        # Bounds include 100 ids per week first seen without sending until the
+        # next week (e.g. as recipients): they belong to no cohort
+        ids = RetentionIndex(root, "ids")
+        id_days = [np.concatenate([np.arange(100 * d, 100 * d + 100), np.arange(0, 100 * d, 7 + d % 5)])
+                   for d in range(28)]
+        for day, keys in zip(days, id_days):
+            ids.record(day, keys)
+        bounds = [0, 800, 1500, 2200]
+        by_id = ids.cohort_matrix(windows[:4], cohort_bounds=bounds)
+        by_id_short = ids.cohort_matrix(windows[:2], cohort_bounds=bounds[:2])
+        try:
+            ids.cohort_matrix([windows[0], windows[2]])
+            assert False, "Windows with a gap must raise"
+        except ValueError:
+            pass
+
+    week_sets = [set(np.concatenate(activity[7 * w:7 * w + 7]).tolist()) for w in range(weeks)]
+    seen: set = set()
+    for i in range(weeks):
+        cohort = week_sets[i] - seen
+        seen |= week_sets[i]
+        assert result["cohort_sizes"][i] == len(cohort)
+        for j in range(i, weeks):
+            assert result["active"][i, j] == len(cohort & week_sets[j]), (i, j)
+    assert np.isnan(result["retention"][3, 1]) and result["retention"][5, 5] == 1.0
+    assert np.allclose(result["retention"][0], [p["retention_rate"] for p in pairwise])
+    id_weeks = [set(np.concatenate(id_days[7 * w:7 * w + 7]).tolist()) for w in range(4)]
+    id_cohorts = [set(range(lo, hi)) & id_weeks[i] for i, (lo, hi) in enumerate(zip(bounds, bounds[1:] + [2800]))]
+    assert by_id["cohort_sizes"] == [len(c) for c in id_cohorts] == [700, 600, 600, 600]
+    assert by_id["active"].tolist() == [[len(id_cohorts[i] & id_weeks[j]) for j in range(4)] for i in range(4)]
+    for matrix in (result, by_id):
+        assert np.all(np.diag(matrix["retention"]) == 1.0)
+    # Earlier rows do not depend on the windows requested after them
+    assert by_id_short["cohort_sizes"] == by_id["cohort_sizes"][:2]
+    assert np.array_equal(by_id_short["active"], by_id["active"][:2, :2])
+    assert result["elapsed"] < pair_elapsed
+
+    print(f"✓ Cohort matrix ({weeks}×{weeks} weekly, {sum(result['cohort_sizes']):,} senders): "
+          f"{result['elapsed'] * 1000:.0f}ms (pairwise estimate {pair_elapsed:.1f}s)")
+    print("  Week-0 cohort retention: " +
+          " ".join(f"{r:.0%}" for r in result["retention"][0, :8]) + " ...")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Retention Engine Test Suite")
+    print("=" * 60)
+    print()
+
+    test_retention_engines()
+    print()
+
+    test_cohort_matrix()
+    print()
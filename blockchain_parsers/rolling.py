@@ -0,0 +1,362 @@
+"""
+blockchain_parsers/rolling.py — Rolling Fee Statistics
+
+Rolling mean, standard deviation and coefficient of variation of per-block
+fee series (base fee, effective gas price of every transaction) for TSC
+β/γ monitoring. Each block is summarized once as Welford moments (count,
+mean, sum of squared deviations); windows of any length — in blocks or in
+seconds of block time — are differences of one set of prefix sums over
+those moments, so several window lengths cost one linear pass. The
+per-block gas-price moments are cached by height and shared by the β
+fee-market and γ usage queries.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import os
+
+import numpy as np
+
+
+@dataclass
+class BlockMoments:
+    """
+    Per-block moments of a quantity: value count, mean and M2 (sum of
+    squared deviations from the block mean). Blocks with count 0 have
+    mean 0.
+    """
+    count: np.ndarray  # int64
+    mean: np.ndarray  # float64
+    m2: np.ndarray  # float64
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "BlockMoments":
+        """One value per block (e.g. base fee)."""
+        values = np.asarray(values, dtype=np.float64)
+        return cls(np.ones(len(values), dtype=np.int64), values, np.zeros(len(values)))
+
+    @classmethod
+    def from_groups(cls, groups: np.ndarray, values: np.ndarray, n_blocks: int) -> "BlockMoments":
+        """
+        Many values per block: `groups` is each value's block offset in
+        [0, n_blocks). Two passes (mean, then squared deviations), so M2
+        carries no cancellation error.
+        """
+        groups = np.asarray(groups, dtype=np.intp)
+        values = np.asarray(values, dtype=np.float64)
+        count = np.bincount(groups, minlength=n_blocks).astype(np.int64)
+        mean = np.bincount(groups, values, minlength=n_blocks) / np.maximum(count, 1)
+        m2 = np.bincount(groups, (values - mean[groups]) ** 2, minlength=n_blocks)
+        return cls(count, mean, m2)
+
+    @classmethod
+    def concat(cls, parts: Sequence["BlockMoments"]) -> "BlockMoments":
+        return cls(*(np.concatenate([getattr(p, name) for p in parts]) for name in ("count", "mean", "m2")))
+
+    def total(self) -> Tuple[int, float, float]:
+        """
+        (count, mean, population std) over all blocks: Chan's parallel
+        Welford merge, exact up to rounding (no sum-of-squares cancellation).
+        """
+        n = int(self.count.sum())
+        if n == 0:
+            return 0, float("nan"), float("nan")
+        mean = float(np.dot(self.count, self.mean)) / n
+        m2 = float(self.m2.sum()) + float(np.dot(self.count, (self.mean - mean) ** 2))
+        return n, mean, (m2 / n) ** 0.5
+
+
+@dataclass
+class RollingStats:
+    """
+    Trailing-window statistics ending at each block. Entries whose window
+    reaches back before the first block (or holds no values) are NaN.
+    """
+    count: np.ndarray  # Values in the window
+    mean: np.ndarray
+    std: np.ndarray  # Population std
+    cv: np.ndarray  # std / mean
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+
+class RollingMoments:
+    """
+    Prefix sums of block moments, centered on the series mean, answering
+    trailing windows by subtraction.
+
+    The window variance is (ΣM2 + Σn(x̄-c)²)/N - (x̄_w-c)² with c the series
+    mean; centering keeps the prefix sums small, and the relative error of
+    a window's variance is about 1e-16 × (total values / window values) ×
+    (series variance / window variance) — 1e-9 for a month of transactions
+    against one block. Single-block windows use the block's own moments.
+
+    Usage:
+        rolling = RollingMoments(BlockMoments.from_values(base_fee))
+        hourly = rolling.by_time(timestamps, 3600)
+        per_block = rolling.by_blocks(1)
+    """
+
+    def __init__(self, moments: BlockMoments):
+        self.moments = moments
+        n, mean, _ = moments.total()
+        self.center = mean if n else 0.0
+        delta = moments.mean - self.center
+        count = moments.count.astype(np.float64)
+        self._p0 = np.concatenate([[0], np.cumsum(moments.count)])
+        self._p1 = np.concatenate([[0.0], np.cumsum(count * delta)])
+        self._p2 = np.concatenate([[0.0], np.cumsum(moments.m2 + count * delta * delta)])
+
+    def __len__(self) -> int:
+        return len(self.moments)
+
+    def _windows(self, lo: np.ndarray, complete: np.ndarray) -> RollingStats:
+        """Windows [lo[i], i] for every block i."""
+        hi = np.arange(1, len(self) + 1)
+        count = self._p0[hi] - self._p0[lo]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = (self._p1[hi] - self._p1[lo]) / count
+            var = np.maximum((self._p2[hi] - self._p2[lo]) / count - delta * delta, 0.0)
+            single = hi - lo == 1
+            mean = self.center + delta
+            mean[single] = self.moments.mean[single]
+            var[single] = self.moments.m2[single] / self.moments.count[single]
+            std = np.sqrt(var)
+            cv = std / mean
+        invalid = ~complete | (count == 0)
+        for column in (mean, std, cv):
+            column[invalid] = np.nan
+        return RollingStats(count, mean, std, cv)
+
+    def by_blocks(self, window: int) -> RollingStats:
+        """Statistics over the last `window` blocks (window=1: each block alone)."""
+        if window < 1:
+            raise ValueError("window must be at least one block")
+        lo = np.arange(len(self)) + 1 - window
+        return self._windows(np.maximum(lo, 0), lo >= 0)
+
+    def by_time(self, timestamps: np.ndarray, seconds: int) -> RollingStats:
+        """
+        Statistics over blocks with timestamp in (t - seconds, t] for each
+        block's timestamp t (timestamps ascending).
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if len(timestamps) != len(self):
+            raise ValueError("one timestamp per block required")
+        start = timestamps - seconds
+        lo = np.searchsorted(timestamps, start, side="right")
+        return self._windows(lo, start >= timestamps[0] if len(timestamps) else start >= 0)
+
+
+class BlockMomentStore:
+    """
+    Per-block moments cached by height, shared between parsers.
+
+    Layout:
+        {root}/{chain_id}/moments/{name}/
+            {chunk_start}.npz   # present, count, mean, m2 for chunk_size heights
+
+    Heights are written when their full block is fetched (β fee market, γ
+    day ingestion), so either parser's fetch serves both. `present` is 1
+    for final heights, which never change, and 2 for blocks still within
+    reach of a reorg (`put(..., provisional=heights)`, see HeaderStore):
+    those are readable but stay in `missing()` until stored again as final.
+
+    Usage:
+        store = BlockMomentStore(default_cache_dir(), "ethereum", "gas_price")
+        store.put(heights, BlockMoments.from_groups(offsets, prices, len(heights)))
+        n, mean, std = store.read(start, end).total()
+    """
+
+    def __init__(self, root: str, chain_id: str, name: str, chunk_size: int = 1 << 14):
+        self.path = os.path.join(root, chain_id, "moments", name)
+        os.makedirs(self.path, exist_ok=True)
+        self.chunk_size = chunk_size
+        self._chunks: Dict[int, Dict[str, np.ndarray]] = {}
+
+    def _file(self, chunk: int) -> str:
+        return os.path.join(self.path, "%d.npz" % chunk)
+
+    def _chunk(self, chunk: int) -> Dict[str, np.ndarray]:
+        if chunk not in self._chunks:
+            try:
+                with np.load(self._file(chunk)) as data:
+                    self._chunks[chunk] = {name: data[name] for name in data.files}
+                # Chunks written before provisional heights existed hold a bool flag
+                self._chunks[chunk]["present"] = self._chunks[chunk]["present"].astype(np.uint8)
+            except FileNotFoundError:
+                size = self.chunk_size
+                self._chunks[chunk] = {"present": np.zeros(size, np.uint8), "count": np.zeros(size, np.int64),
+                                       "mean": np.zeros(size), "m2": np.zeros(size)}
+        return self._chunks[chunk]
+
+    def _spans(self, start: int, end: int):
+        """(chunk start, offset lo, offset hi) covering heights [start, end]."""
+        for chunk in range(start // self.chunk_size * self.chunk_size, end + 1, self.chunk_size):
+            lo, hi = max(start, chunk), min(end, chunk + self.chunk_size - 1)
+            yield chunk, lo - chunk, hi - chunk + 1
+
+    def _present(self, start: int, end: int) -> np.ndarray:
+        return np.concatenate([self._chunk(c)["present"][a:b] for c, a, b in self._spans(start, end)]
+                              or [np.zeros(0, np.uint8)])
+
+    def missing(self, start: int, end: int) -> np.ndarray:
+        """Heights in [start, end] to fetch: no stored moments, or provisional ones."""
+        return np.arange(start, end + 1, dtype=np.int64)[self._present(start, end) != 1]
+
+    def put(self, heights: Sequence[int], moments: BlockMoments, provisional: Iterable[int] = ()):
+        """
+        Store moments for `heights` (any order; stored heights are replaced);
+        heights in `provisional` stay in `missing()`.
+        """
+        heights = np.asarray(heights, dtype=np.int64)
+        final = ~np.isin(heights, np.fromiter(provisional, np.int64))
+        chunks = heights // self.chunk_size * self.chunk_size
+        for chunk in np.unique(chunks).tolist():
+            rows = np.flatnonzero(chunks == chunk)
+            offsets = heights[rows] - chunk
+            data = self._chunk(chunk)
+            for name in ("count", "mean", "m2"):
+                data[name][offsets] = getattr(moments, name)[rows]
+            data["present"][offsets] = np.where(final[rows], 1, 2)
+            tmp = self._file(chunk) + ".tmp.npz"
+            np.savez(tmp, **data)
+            os.replace(tmp, self._file(chunk))
+
+    def read(self, start: int, end: int) -> BlockMoments:
+        """
+        Moments for heights [start, end].
+
+        Raises:
+            KeyError: if any height in the range is not stored
+        """
+        gaps = np.flatnonzero(self._present(start, end) == 0) + start
+        if len(gaps):
+            raise KeyError("heights without moments: %d missing, first %d" % (len(gaps), gaps[0]))
+        parts = [BlockMoments(*(self._chunk(c)[name][a:b] for name in ("count", "mean", "m2")))
+                 for c, a, b in self._spans(start, end)]
+        return BlockMoments.concat(parts)
+
+
+# ============================================================================
+# Test Cases
+# ============================================================================
+
+def test_rolling_windows():
+    """
+    Rolling gas-price and base-fee statistics over a synthetic month.
+
+    Success criteria:
+    - Block and time windows match direct per-window numpy statistics
+      (relative 1e-8 mean, 1e-7 std) over per-transaction values
+    - Series totals match np.mean/np.std of every value
+    - Store round trip: missing heights, put in two batches, read
+    - Provisional heights are readable but missing until stored as final
+    - Four windows over a month of blocks in well under a second
+    """
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    n_blocks = 216_000  # ~30 days of 12 s blocks
+    timestamps = 1_704_067_200 + np.cumsum(rng.choice([12, 12, 12, 24], n_blocks))
+    # Mean-reverting log base fee around 20 gwei (stationary spread ~±45%)
+    shocks, log_fee = rng.normal(0, 0.02, n_blocks), np.zeros(n_blocks)
+    for i in range(1, n_blocks):
+        log_fee[i] = 0.999 * log_fee[i - 1] + shocks[i]
+    base_fee = 2e10 * np.exp(log_fee)
+    per_block = rng.integers(0, 300, n_blocks)
+    per_block[rng.random(n_blocks) < 0.01] = 0  # Empty blocks
+    groups = np.repeat(np.arange(n_blocks), per_block)
+    prices = base_fee[groups] + rng.lognormal(20, 1.5, len(groups))
+
+    start = time.perf_counter()
+    moments = BlockMoments.from_groups(groups, prices, n_blocks)
+    moments_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    gas = RollingMoments(moments)
+    windows = {"block": gas.by_blocks(1), "300 blocks": gas.by_blocks(300),
+               "hour": gas.by_time(timestamps, 3600), "day": gas.by_time(timestamps, 86_400)}
+    elapsed = time.perf_counter() - start
+    base = RollingMoments(BlockMoments.from_values(base_fee))
+    base_day = base.by_time(timestamps, 86_400)
+
+    n, mean, std = gas.moments.total()
+    assert n == len(prices) and abs(mean / prices.mean() - 1) < 1e-12 and abs(std / prices.std() - 1) < 1e-9
+
+    offsets = np.concatenate([[0], np.cumsum(per_block)])
+    for i in rng.integers(0, n_blocks, 200).tolist() + [0, n_blocks - 1]:
+        for name, stats, lo in (
+            ("block", windows["block"], i),
+            ("300 blocks", windows["300 blocks"], i - 299),
+            ("hour", windows["hour"], int(np.searchsorted(timestamps, timestamps[i] - 3600, side="right"))),
+            ("day", windows["day"], int(np.searchsorted(timestamps, timestamps[i] - 86_400, side="right"))),
+        ):
+            complete = lo >= 0 if name == "300 blocks" else (name == "block" or timestamps[i] -
+                                                            (3600 if name == "hour" else 86_400) >= timestamps[0])
+            values = prices[offsets[max(lo, 0)]:offsets[i + 1]]
+            if not complete or len(values) == 0:
+                assert np.isnan(stats.mean[i]), (name, i)
+                continue
+            assert stats.count[i] == len(values)
+            assert abs(stats.mean[i] / values.mean() - 1) < 1e-8, (name, i)
+            if values.std() > 0:
+                assert abs(stats.std[i] / values.std() - 1) < 1e-7, (name, i, stats.std[i], values.std())
+        day_fees = base_fee[np.searchsorted(timestamps, timestamps[i] - 86_400, side="right"):i + 1]
+        if timestamps[i] - 86_400 >= timestamps[0]:
+            assert abs(base_day.cv[i] / (day_fees.std() / day_fees.mean()) - 1) < 1e-7
+
+    with tempfile.TemporaryDirectory() as root:
+        store = BlockMomentStore(root, "ethereum", "gas_price")
+        heights = 18_000_000 + np.arange(n_blocks)
+        assert len(store.missing(heights[0], heights[-1])) == n_blocks
+        half = n_blocks // 2
+        store.put(heights[half:], BlockMoments(gas.moments.count[half:], gas.moments.mean[half:],
+                                               gas.moments.m2[half:]))
+        assert store.missing(heights[0], heights[-1]).tolist() == heights[:half].tolist()
+        store.put(heights[:half], BlockMoments(gas.moments.count[:half], gas.moments.mean[:half],
+                                               gas.moments.m2[:half]))
+        reopened = BlockMomentStore(root, "ethereum", "gas_price")
+        stored = reopened.read(heights[0], heights[-1])
+        assert np.array_equal(stored.count, gas.moments.count) and np.array_equal(stored.m2, gas.moments.m2)
+        assert reopened.read(heights[0] + 5, heights[0] + 5).total()[0] == per_block[5]
+        try:
+            reopened.read(heights[-1], heights[-1] + 1)
+            assert False, "Missing heights must raise"
+        except KeyError:
+            pass
+        head = heights[-10:]
+        reopened.put(head, BlockMoments(gas.moments.count[-10:], gas.moments.mean[-10:], gas.moments.m2[-10:]),
+                     provisional=head)
+        assert BlockMomentStore(root, "ethereum", "gas_price").missing(heights[0], heights[-1]).tolist() == head.tolist()
+        assert reopened.read(head[0], head[-1]).total()[0] == per_block[-10:].sum()
+        reopened.put(head[:5], BlockMoments(gas.moments.count[-10:-5], gas.moments.mean[-10:-5],
+                                            gas.moments.m2[-10:-5]))
+        assert reopened.missing(heights[0], heights[-1]).tolist() == head[5:].tolist()
+
+    assert elapsed < 1.0
+    print(f"✓ Rolling fee statistics ({n_blocks:,} blocks, {len(prices):,} txs):")
+    print(f"  Mean {mean / 1e9:.2f} gwei, CV {std / mean:.3f}; daily base-fee CV "
+          f"{np.nanmedian(base_day.cv):.3f} (median)")
+    print("  " + ", ".join(f"{name} CV {np.nanmedian(s.cv):.3f}" for name, s in windows.items()))
+    print(f"  Per-block moments {moments_elapsed * 1000:.0f}ms; prefix sums + 4 windows {elapsed * 1000:.0f}ms")
+
+
+# ============================================================================
+# Main: Run Tests
+# ============================================================================
+
+if __name__ == "__main__":
+    print("TSC Blockchain - Rolling Statistics Test Suite")
+    print("=" * 60)
+    print()
+
+    test_rolling_windows()
+    print()
@@ -0,0 +1,212 @@
+"""
+blockchain_parsers/timestamp_index.py — Timestamp → Block-Height Index
+
+Persistent, incrementally extended set of known (height, timestamp) samples
+used to resolve window boundaries ("first block at or after 2024-01-01")
+without a full binary search over RPC.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+import math
+import os
+
+import numpy as np
+
+
+# Nominal seconds per block, used to seed interpolation past the newest
+# known sample. Ethereum's follows from the witness spec
+# (specs/witnesses/ethereum_mainnet.yaml: window_size 7200 blocks ≈ 1 day).
+NOMINAL_BLOCK_TIME: Dict[str, float] = {
+    "ethereum": 86400 / 7200,
+    "bitcoin": 600.0,
+    "solana": 0.4,
+    "arbitrum": 0.25,
+    "optimism": 2.0,
+    "polygon": 2.0,
+}
+
+# Callback: heights -> timestamps (None for heights past the chain head).
+# Called with a small batch so each probe costs one RPC round trip.
+TimestampFetcher = Callable[[List[int]], List[Optional[int]]]
+
+
+class TimestampIndex:
+    """
+    Sorted (height, timestamp) samples with interpolation search.
+
+    Assumes block timestamps strictly increase with height (true for EVM
+    chains; Bitcoin should feed median-time-past instead of header time).
+
+    Lookup resolves locally when the two samples bracketing the target are
+    adjacent heights — the common case for boundaries seen before, answered
+    with one `searchsorted` in microseconds. Otherwise it probes the height
+    interpolated between the bracketing samples (or, past the newest sample,
+    extrapolated from the recent observed block rate, seeded by the chain's
+    nominal block time), fetching the guess and its neighbours in one batch.
+    On 12s-slot chains the first guess is usually within a block or two, so
+    new boundaries cost one or two RPC calls.
+
+    Samples persist under {root}/{chain_id}/timestamp_index/.
+
+    Usage:
+        index = TimestampIndex(default_cache_dir(), "ethereum")
+        start_block = index.lookup(1704067200, fetch=timestamps_via_rpc)
+    """
+
+    # Interpolation guesses that fail to shrink the bracket this many times
+    # in a row fall back to bisection (guards pathological spacing)
+    MAX_STALLS = 2
+
+    def __init__(
+        self,
+        root: str,
+        chain_id: str,
+        block_time: Optional[float] = None
+    ):
+        self.path = os.path.join(root, chain_id, "timestamp_index")
+        os.makedirs(self.path, exist_ok=True)
+        self.block_time = block_time or NOMINAL_BLOCK_TIME.get(chain_id, 12.0)
+        self.heights = self._load("heights")
+        self.timestamps = self._load("timestamps")
+        self.rpc_probes = 0  # Batches requested from `fetch` (for diagnostics)
+
+    def __len__(self) -> int:
+        return len(self.heights)
+
+    # -- persistence --------------------------------------------------------
+
+    def _load(self, name: str) -> np.ndarray:
+        try:
+            return np.load(os.path.join(self.path, name + ".npy"))
+        except FileNotFoundError:
+            return np.zeros(0, dtype=np.int64)
+
+    def save(self):
+        for name, arr in (("heights", self.heights), ("timestamps", self.timestamps)):
+            tmp = os.path.join(self.path, name + ".tmp.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(self.path, name + ".npy"))
+
+    # -- samples ------------------------------------------------------------
+
+    def observe(self, heights: Sequence[int], timestamps: Sequence[int]):
+        """Merge known (height, timestamp) pairs into the index."""
+        heights = np.asarray(heights, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if len(heights) == 0:
+            return
+        all_h = np.concatenate([self.heights, heights])
+        all_t = np.concatenate([self.timestamps, timestamps])
+        all_h, first = np.unique(all_h, return_index=True)
+        self.heights, self.timestamps = all_h, all_t[first]
+
+    def _bracket(self, ts: int):
+        """Known samples (lo, hi) with t[lo] < ts <= t[hi]; either may be None."""
+        i = int(np.searchsorted(self.timestamps, ts, side="left"))
+        lo = i - 1 if i > 0 else None
+        hi = i if i < len(self.timestamps) else None
+        return lo, hi
+
+    def lookup_local(self, ts: int) -> Optional[int]:
+        """First height with timestamp >= ts if resolvable without RPC, else None."""
+        lo, hi = self._bracket(ts)
+        if hi is None:
+            return None
+        if lo is None:
+            return int(self.heights[hi]) if self.heights[hi] == 0 else None
+        if self.heights[hi] == self.heights[lo] + 1:
+            return int(self.heights[hi])
+        return None
+
+    # -- search -------------------------------------------------------------
+
+    def _recent_block_time(self) -> float:
+        """Observed seconds/block over the newest ~day of samples, else nominal."""
+        if len(self.heights) < 2:
+            return self.block_time
+        h_last, t_last = int(self.heights[-1]), int(self.timestamps[-1])
+        window = 86400 / self.block_time
+        i = int(np.searchsorted(self.heights, h_last - window, side="right")) - 1
+        if i < 0 or h_last - int(self.heights[i]) < window / 2:
+            return self.block_time
+        return (t_last - int(self.timestamps[i])) / (h_last - int(self.heights[i]))
+
+    def _guess(self, ts: int, lo: Optional[int], hi: Optional[int], ceiling: Optional[int],
+               bisect: bool) -> int:
+        h_lo = int(self.heights[lo]) if lo is not None else -1
+        if hi is not None:
+            h_hi, t_hi = int(self.heights[hi]), int(self.timestamps[hi])
+        else:
+            h_hi, t_hi = None, None
+        if ceiling is not None and (h_hi is None or ceiling < h_hi):
+            h_hi, t_hi = ceiling, None
+
+        if lo is not None and t_hi is not None and not bisect:
+            # Interpolate between bracketing samples (local block rate)
+            t_lo = int(self.timestamps[lo])
+            guess = h_lo + math.ceil((ts - t_lo) * (h_hi - h_lo) / (t_hi - t_lo))
+        elif lo is not None and h_hi is None:
+            # Past the newest sample: extrapolate with the recent block rate
+            elapsed = ts - int(self.timestamps[lo])
+            guess = h_lo + max(1, math.ceil(elapsed / self._recent_block_time()))
+        elif lo is None and t_hi is not None and not bisect:
+            guess = h_hi - max(1, math.ceil((t_hi - ts) / self.block_time))
+        else:
+            guess = (max(h_lo, 0) + h_hi) // 2 if h_hi is not None else h_lo + 1
+        # Keep the probe strictly inside the open bracket
+        upper = h_hi - 1 if h_hi is not None else guess
+        return max(h_lo + 1, min(guess, upper), 0)
+
+    def lookup(self, ts: int, fetch: Optional[TimestampFetcher] = None) -> int:
+        """
+        First block height whose timestamp is >= `ts`.
+
+        Args:
+            ts: Unix timestamp (seconds)
+            fetch: Batch timestamp source for heights not in the index
+                (typically header store, then RPC). Required unless the
+                answer is already bracketed locally.
+
+        Raises:
+            LookupError: if the answer needs samples and `fetch` is None
+            ValueError: if `ts` is later than the chain head
+        """
+        ceiling: Optional[int] = None  # Smallest height known to be past head
+        stalls = 0
+        while True:
+            found = self.lookup_local(ts)
+            if found is not None:
+                return found
+            if fetch is None:
+                raise LookupError("timestamp %d not bracketed by local samples" % ts)
+
+            lo, hi = self._bracket(ts)
+            if ceiling is not None and lo is not None and int(self.heights[lo]) + 1 >= ceiling:
+                raise ValueError("timestamp %d is after the chain head" % ts)
+            width = self._width(lo, hi, ceiling)
+            guess = self._guess(ts, lo, hi, ceiling, bisect=stalls >= self.MAX_STALLS)
+
+            # The guess's neighbours ride along in the same batch, so a guess
+            # that is off by one still resolves in this round trip
+            probe = [h for h in range(guess - 2, guess + 2) if h >= 0]
+            self.rpc_probes += 1
+            stamps = fetch(probe)
+            known = [(h, t) for h, t in zip(probe, stamps) if t is not None]
+            missing = [h for h, t in zip(probe, stamps) if t is None]
+            if missing:
+                ceiling = min(missing) if ceiling is None else min(ceiling, min(missing))
+            if known:
+                self.observe(*zip(*known))
+            self.save()
+
+            stalls = stalls + 1 if self._width(*self._bracket(ts), ceiling) >= width else 0
+
+    def _width(self, lo: Optional[int], hi: Optional[int], ceiling: Optional[int]) -> float:
+        top = int(self.heights[hi]) if hi is not None else math.inf
+        if ceiling is not None:
+            top = min(top, ceiling)
+        bottom = int(self.heights[lo]) if lo is not None else -1
+        return top - bottom
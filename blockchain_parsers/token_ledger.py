@@ -0,0 +1,279 @@
+"""
+blockchain_parsers/token_ledger.py — ERC-20 Transfer-Event Balance Ledger
+
+First-party token holder distribution for TSC β-axis economics: replays
+Transfer events in block order into an address-indexed balance array,
+with periodic checkpoints so replay resumes where it stopped and holder
+statistics are available at any checkpointed height without replaying
+history.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import json
+import os
+
+import numpy as np
+
+from .concentration import concentration_summary
+
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+ZERO_ADDRESS = b"\x00" * 20
+
+# uint256 balances are held exactly as 8 little-endian 32-bit limbs in
+# int64 accumulators, so np.add.at can apply a whole batch of transfers
+# before carries are propagated (headroom for 2^31 events per batch)
+LIMB_BITS = 32
+N_LIMBS = 8
+_LIMB_MASK = (1 << LIMB_BITS) - 1
+
+# Checkpoints retained per ledger (the most recent ones): each is a full
+# snapshot of every holder, so history is not kept at checkpoint resolution
+KEEP_CHECKPOINTS = 30
+
+# (from_block, to_block) -> raw eth_getLogs results, in block/log order
+LogFetcher = Callable[[int, int], List[Dict[str, Any]]]
+
+
+def decode_transfer_logs(logs: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode raw ERC-20 Transfer logs into columns.
+
+    ERC-721 transfers share the topic but index the token id (4 topics,
+    empty data) and are skipped.
+
+    Returns:
+        (block_numbers int64, senders S20, recipients S20, amounts int64[k, N_LIMBS])
+    """
+    logs = [log for log in logs
+            if len(log["topics"]) == 3 and log["topics"][0] == TRANSFER_TOPIC]
+    n = len(logs)
+    blocks = np.fromiter((int(log["blockNumber"], 16) for log in logs), np.int64, n)
+    senders = np.array([bytes.fromhex(log["topics"][1][-40:]) for log in logs], dtype="S20")
+    recipients = np.array([bytes.fromhex(log["topics"][2][-40:]) for log in logs], dtype="S20")
+    # 32-byte big-endian words -> 8 big-endian uint32 limbs -> little-endian limb order
+    raw = b"".join(bytes.fromhex(log["data"][2:].rjust(64, "0")[-64:]) for log in logs)
+    amounts = np.frombuffer(raw, dtype=">u4").reshape(n, N_LIMBS)[:, ::-1].astype(np.int64)
+    return blocks, senders, recipients, amounts
+
+
+def limbs_to_float(limbs: np.ndarray) -> np.ndarray:
+    """Balances from limb columns (shape [N_LIMBS, n]) as float64."""
+    scale = np.ldexp(1.0, LIMB_BITS * np.arange(N_LIMBS))
+    return scale @ limbs.astype(np.float64)
+
+
+class TransferLedger:
+    """
+    Exact token balances rebuilt from Transfer events.
+
+    State is a column-major [N_LIMBS, capacity] int64 array indexed by a
+    dense address id (first-seen order) plus the id → address table.
+    Checkpoints are full snapshots written every `checkpoint_interval`
+    blocks (aligned to multiples of the interval) and at every explicit
+    replay target:
+
+        {root}/{chain_id}/ledgers/{token}/checkpoint_{height:012d}.npz
+
+    Only the latest `keep_checkpoints` are retained (None keeps all), so
+    the queryable heights are the most recent checkpoints — about the last
+    `keep_checkpoints` intervals — plus the ledger's current block. A long
+    replay (e.g. cold, from deployment) therefore writes interval
+    checkpoints only for the boundaries it will retain; before those it
+    checkpoints every `keep_checkpoints` intervals, just often enough to
+    resume if interrupted.
+
+    A new ledger resumes from its latest checkpoint, so a daily job only
+    replays the blocks since yesterday. Replay only finalized heights —
+    the ledger does not unwind reorgs.
+
+    Usage:
+        ledger = TransferLedger(default_cache_dir(), "ethereum", "0xToken...")
+        ledger.replay(fetch_logs, to_block=19_000_000)
+        stats = ledger.stats_at(19_000_000)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        chain_id: str,
+        token_address: str,
+        checkpoint_interval: int = 7200,
+        start_block: int = 0,
+        keep_checkpoints: Optional[int] = KEEP_CHECKPOINTS
+    ):
+        self.token_address = token_address.lower()
+        self.path = os.path.join(root, chain_id, "ledgers", self.token_address)
+        os.makedirs(self.path, exist_ok=True)
+        self.checkpoint_interval = checkpoint_interval
+        self.keep_checkpoints = keep_checkpoints
+        self._reset(start_block - 1)
+        latest = self.checkpoints()
+        if latest:
+            self._load(latest[-1])
+
+    # -- state ------------------------------------------------------------
+
+    def _reset(self, last_block: int):
+        self.last_block = last_block
+        self.addresses: List[bytes] = []
+        self._ids: Dict[bytes, int] = {}
+        self._limbs = np.zeros((N_LIMBS, 1024), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def _intern(self, addresses: np.ndarray) -> np.ndarray:
+        ids = np.empty(len(addresses), dtype=np.int64)
+        table = self._ids
+        for i, addr in enumerate(addresses.tolist()):
+            idx = table.get(addr)
+            if idx is None:
+                idx = table[addr] = len(self.addresses)
+                self.addresses.append(addr)
+            ids[i] = idx
+        if len(self.addresses) > self._limbs.shape[1]:
+            grown = np.zeros((N_LIMBS, max(len(self.addresses), 2 * self._limbs.shape[1])), np.int64)
+            grown[:, :self._limbs.shape[1]] = self._limbs
+            self._limbs = grown
+        return ids
+
+    def _normalize(self, touched: np.ndarray):
+        """Propagate carries/borrows so limbs 0..6 are in [0, 2^32)."""
+        limbs = self._limbs
+        for k in range(N_LIMBS - 1):
+            carry = limbs[k, touched] >> LIMB_BITS  # Arithmetic shift: floor division
+            limbs[k, touched] &= _LIMB_MASK
+            limbs[k + 1, touched] += carry
+
+    def apply_logs(self, logs: List[Dict[str, Any]]):
+        """Apply one batch of Transfer logs (must follow `last_block`, in order)."""
+        blocks, senders, recipients, amounts = decode_transfer_logs(logs)
+        if len(blocks) == 0:
+            return
+        if blocks[0] <= self.last_block:
+            raise ValueError("logs for block %d already applied (ledger at %d)"
+                             % (blocks[0], self.last_block))
+        from_ids = self._intern(senders)
+        to_ids = self._intern(recipients)
+        for k in range(N_LIMBS):
+            np.subtract.at(self._limbs[k], from_ids, amounts[:, k])
+            np.add.at(self._limbs[k], to_ids, amounts[:, k])
+        self._normalize(np.unique(np.concatenate([from_ids, to_ids])))
+
+    def balance_of(self, address: str) -> int:
+        """Exact balance (Python int) of a hex address."""
+        # Keys come from S20 arrays, which drop trailing NUL bytes
+        idx = self._ids.get(bytes.fromhex(address[2:].lower()).rstrip(b"\x00"))
+        if idx is None:
+            return 0
+        return sum(int(self._limbs[k, idx]) << (LIMB_BITS * k) for k in range(N_LIMBS))
+
+    # -- replay -----------------------------------------------------------
+
+    def replay(self, fetch_logs: LogFetcher, to_block: int):
+        """
+        Advance the ledger to `to_block`, checkpointing along the way
+        (interval boundaries older than the retained checkpoints are
+        checkpointed only every `keep_checkpoints` intervals).
+
+        `fetch_logs` is called once per checkpoint interval; splitting that
+        range to respect provider eth_getLogs limits is the fetcher's job.
+
+        Args:
+            fetch_logs: Returns Transfer logs for an inclusive block range
+            to_block: Last block to apply (a checkpoint is written here)
+        """
+        interval, keep = self.checkpoint_interval, self.keep_checkpoints
+        last_boundary = (to_block + 1) // interval  # Index of the last boundary <= to_block
+        block = self.last_block + 1
+        while block <= to_block:
+            index = block // interval + 1
+            boundary = index * interval - 1
+            end = min(boundary, to_block)
+            self.apply_logs(fetch_logs(block, end))
+            self.last_block = end
+            retained = keep is None or index > last_boundary - keep or index % keep == 0
+            if end == to_block or (end == boundary and retained):
+                self.checkpoint()
+            block = end + 1
+
+    def checkpoint(self):
+        """Write the current state as the checkpoint for `last_block`."""
+        n = len(self.addresses)
+        path = os.path.join(self.path, "checkpoint_%012d.npz" % self.last_block)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            limbs=self._limbs[:, :n],
+            addresses=np.array(self.addresses, dtype="S20"),
+        )
+        os.replace(tmp, path)
+        with open(os.path.join(self.path, "state.json"), "w") as f:
+            json.dump({"last_block": self.last_block, "holders_seen": n}, f)
+        if self.keep_checkpoints is not None:
+            for height in self.checkpoints()[:-self.keep_checkpoints]:
+                os.remove(os.path.join(self.path, "checkpoint_%012d.npz" % height))
+
+    def checkpoints(self) -> List[int]:
+        """Heights with a stored checkpoint, ascending."""
+        return sorted(
+            int(name[len("checkpoint_"):-len(".npz")])
+            for name in os.listdir(self.path)
+            if name.startswith("checkpoint_") and name.endswith(".npz") and ".tmp" not in name
+        )
+
+    def _read_checkpoint(self, height: int) -> Tuple[np.ndarray, np.ndarray]:
+        path = os.path.join(self.path, "checkpoint_%012d.npz" % height)
+        if not os.path.exists(path):
+            raise KeyError("no checkpoint at block %d" % height)
+        with np.load(path) as data:
+            return data["limbs"], data["addresses"]
+
+    def _load(self, height: int):
+        limbs, addresses = self._read_checkpoint(height)
+        self._reset(height)
+        self.addresses = addresses.tolist()
+        self._ids = {addr: i for i, addr in enumerate(self.addresses)}
+        self._limbs = np.zeros((N_LIMBS, max(len(self.addresses), 1024)), np.int64)
+        self._limbs[:, :len(self.addresses)] = limbs
+
+    # -- statistics -------------------------------------------------------
+
+    def stats_at(self, height: int, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Holder statistics at a retained checkpoint or the ledger's current
+        block (no replay); other heights raise KeyError.
+
+        Returns:
+            {
+                "token_holder_count": int,   # addresses with balance > 0
+                "token_holder_gini": float,  # over holders
+                "top10_concentration": float,  # share held by top `top_n`
+                "total_supply": float,       # minted - burned (token base units)
+            }
+        """
+        if height == self.last_block:
+            limbs, addresses = self._limbs[:, :len(self.addresses)], np.array(self.addresses, "S20")
+        else:
+            limbs, addresses = self._read_checkpoint(height)
+        return self._holder_stats(limbs, addresses, top_n)
+
+    @staticmethod
+    def _holder_stats(limbs: np.ndarray, addresses: np.ndarray, top_n: int) -> Dict[str, Any]:
+        # Mints come from (and burns go to) the zero address, which carries -supply
+        real = addresses != np.array(ZERO_ADDRESS, dtype="S20")
+        positive = (limbs[-1] >= 0) & limbs.any(axis=0) & real
+        balances = limbs_to_float(limbs[:, positive])
+        summary = concentration_summary(balances, top_n=top_n)
+        return {
+            "token_holder_count": int(positive.sum()),
+            "token_holder_gini": summary["gini"],
+            "top10_concentration": summary["top_n_share"],
+            "total_supply": float(balances.sum()),
+        }
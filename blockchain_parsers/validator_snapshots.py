@@ -0,0 +1,207 @@
+"""
+blockchain_parsers/validator_snapshots.py — Delta-Encoded Validator-Set Store
+
+Historical beacon validator sets for TSC β-axis backfills: one full base
+snapshot plus compact per-epoch deltas (activations, exits, effective
+balance changes), so any recorded epoch's stake array is rebuilt from local
+data instead of re-downloading the full validator list.
+
+Part of TSC-blockchain Phase 0 (Partner implementation).
+
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import os
+
+import numpy as np
+
+
+SLOTS_PER_EPOCH = 32
+FAR_FUTURE_EPOCH = 2 ** 64 - 1
+PUBKEY_BYTES = 48
+
+# Per-validator fields kept in the store (pubkeys are append-only and kept apart)
+FIELDS = ("activation_epoch", "exit_epoch", "effective_balance")
+
+
+def decode_validators(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Beacon /states/{id}/validators records → dense columns by validator index.
+
+    Records must cover every index 0..n-1 (i.e. fetched without a status
+    filter). effective_balance is in Gwei; pubkeys are uint8 rows of 48
+    bytes (fixed-width bytes dtypes would drop trailing NULs).
+
+    Raises:
+        ValueError: if the record indices are not dense
+    """
+    n = len(records)
+    order = np.fromiter((int(r["index"]) for r in records), np.int64, n)
+    if not np.array_equal(np.sort(order), np.arange(n)):
+        raise ValueError("validator records must cover indices 0..%d" % (n - 1))
+    columns = {
+        field: np.fromiter((int(r["validator"][field]) for r in records), np.uint64, n)
+        for field in FIELDS
+    }
+    columns["pubkeys"] = np.frombuffer(
+        b"".join(bytes.fromhex(r["validator"]["pubkey"][2:]) for r in records), np.uint8
+    ).reshape(n, PUBKEY_BYTES)
+    rank = np.argsort(order)
+    return {name: col[rank] for name, col in columns.items()}
+
+
+def active_mask(state: Dict[str, np.ndarray], epoch: int) -> np.ndarray:
+    """Validators active at `epoch` (activation_epoch <= epoch < exit_epoch)."""
+    epoch = np.uint64(epoch)
+    return (state["activation_epoch"] <= epoch) & (epoch < state["exit_epoch"])
+
+
+class ValidatorSnapshotStore:
+    """
+    Validator sets by epoch as a base snapshot plus per-epoch deltas.
+
+    Layout:
+        {root}/{chain_id}/validator_snapshots/
+            base.npz                    # full set at the earliest epoch
+            delta_{epoch:010d}.npz      # rows changed since the previous epoch
+
+    A delta holds the indices whose activation/exit epoch or effective
+    balance changed (new validators included) with their new values, plus
+    pubkeys for appended indices. Validator indices are permanent, so sets
+    only grow. Daily mainnet deltas touch a few thousand of ~1M rows.
+
+    Epochs may be recorded in any order: inserting between two recorded
+    epochs rewrites the following delta, and inserting before the base
+    turns the old base into a delta.
+
+    Reconstruction keeps a cursor at the last rebuilt epoch, so walking
+    epochs in ascending order (backfills) applies each delta once.
+
+    Usage:
+        store = ValidatorSnapshotStore(default_cache_dir(), "ethereum")
+        store.record(epoch, beacon_records)
+        stakes, indices = store.active_stakes(epoch)
+    """
+
+    def __init__(self, root: str, chain_id: str):
+        self.path = os.path.join(root, chain_id, "validator_snapshots")
+        os.makedirs(self.path, exist_ok=True)
+        self._epochs = self._scan()
+        self._cursor: Optional[Tuple[int, Dict[str, np.ndarray], int]] = None
+
+    # -- persistence --------------------------------------------------------
+
+    def _scan(self) -> List[int]:
+        epochs = [int(name[len("delta_"):-len(".npz")]) for name in os.listdir(self.path)
+                  if name.startswith("delta_") and name.endswith(".npz")]
+        base = os.path.join(self.path, "base.npz")
+        if os.path.exists(base):
+            with np.load(base) as data:
+                epochs.append(int(data["epoch"]))
+        return sorted(epochs)
+
+    def _write(self, name: str, **arrays: np.ndarray):
+        tmp = os.path.join(self.path, name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, os.path.join(self.path, name + ".npz"))
+
+    def _read(self, name: str) -> Dict[str, np.ndarray]:
+        with np.load(os.path.join(self.path, name + ".npz")) as data:
+            return {key: data[key] for key in data.files}
+
+    def epochs(self) -> List[int]:
+        """Recorded epochs, ascending."""
+        return list(self._epochs)
+
+    def __contains__(self, epoch: int) -> bool:
+        return epoch in self._epochs
+
+    def nbytes(self) -> int:
+        """On-disk size of the base and all deltas."""
+        return sum(os.path.getsize(os.path.join(self.path, name))
+                   for name in os.listdir(self.path) if name.endswith(".npz"))
+
+    # -- recording ----------------------------------------------------------
+
+    @staticmethod
+    def _diff(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        n_old, n_new = len(old["pubkeys"]), len(new["pubkeys"])
+        if n_new < n_old or not np.array_equal(new["pubkeys"][:n_old], old["pubkeys"]):
+            raise ValueError("validator set must extend the previous epoch's set")
+        changed = np.zeros(n_old, dtype=bool)
+        for field in FIELDS:
+            changed |= old[field] != new[field][:n_old]
+        index = np.concatenate([np.flatnonzero(changed), np.arange(n_old, n_new)])
+        delta = {field: new[field][index] for field in FIELDS}
+        delta["index"] = index
+        delta["pubkeys"] = new["pubkeys"][n_old:]
+        return delta
+
+    def record(self, epoch: int, records: List[Dict[str, Any]]):
+        """
+        Store the validator set at `epoch` from a full (unfiltered) beacon
+        validator list. Already-recorded epochs are left unchanged.
+        """
+        if epoch in self._epochs:
+            return
+        new = decode_validators(records)
+        earlier = [e for e in self._epochs if e < epoch]
+        later = [e for e in self._epochs if e > epoch]
+        following = ({name: col.copy() for name, col in self.state(later[0]).items()}
+                     if later else None)
+
+        if earlier:
+            self._write("delta_%010d" % epoch, **self._diff(self.state(earlier[-1]), new))
+        else:
+            self._write("base", epoch=np.int64(epoch), **new)
+        if following is not None:
+            self._write("delta_%010d" % later[0], **self._diff(new, following))
+
+        self._epochs = sorted(self._epochs + [epoch])
+        if self._cursor is not None and self._cursor[0] > epoch:
+            self._cursor = None
+
+    # -- reconstruction -----------------------------------------------------
+
+    def state(self, epoch: int) -> Dict[str, np.ndarray]:
+        """
+        Full validator columns at a recorded epoch (activation_epoch,
+        exit_epoch, effective_balance, pubkeys). Arrays are views into the
+        reconstruction buffer: copy them to keep past the next call.
+
+        Raises:
+            KeyError: if `epoch` was not recorded
+        """
+        if epoch not in self._epochs:
+            raise KeyError("no validator snapshot at epoch %d" % epoch)
+        if self._cursor is None or self._cursor[0] > epoch:
+            base = self._read("base")
+            n = len(base["pubkeys"])
+            buffers = {name: base[name].copy() for name in list(FIELDS) + ["pubkeys"]}
+            self._cursor = (int(base["epoch"]), buffers, n)
+
+        current, buffers, n = self._cursor
+        for e in self._epochs[self._epochs.index(current) + 1:self._epochs.index(epoch) + 1]:
+            delta = self._read("delta_%010d" % e)
+            appended = len(delta["pubkeys"])
+            if n + appended > len(buffers["pubkeys"]):
+                grow = max(n + appended, 2 * len(buffers["pubkeys"]))
+                for name, buf in buffers.items():
+                    grown = np.zeros((grow,) + buf.shape[1:], dtype=buf.dtype)
+                    grown[:n] = buf[:n]
+                    buffers[name] = grown
+            buffers["pubkeys"][n:n + appended] = delta["pubkeys"]
+            for field in FIELDS:
+                buffers[field][delta["index"]] = delta[field]
+            n += appended
+        self._cursor = (epoch, buffers, n)
+        return {name: buf[:n] for name, buf in buffers.items()}
+
+    def active_stakes(self, epoch: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Effective balances (ETH, float64) of validators active at a
+        recorded epoch, and their validator indices.
+        """
+        state = self.state(epoch)
+        indices = np.flatnonzero(active_mask(state, epoch))
+        return state["effective_balance"][indices] / 1e9, indices